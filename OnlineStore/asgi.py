@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'OnlineStore.settings')
+# під ASGI сторінки каталогу обслуговують async-версії view (myapp/urls.py)
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
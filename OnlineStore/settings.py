@@ -43,14 +43,34 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # читання з реплік і "липкість" до основної БД після запису (myapp/db_router.py); до SessionMiddleware
+    'myapp.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # ролі та права користувача з кешу (myapp/roles.py)
+    'myapp.roles.UserRolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'myapp.instrumentation.QueryInstrumentationMiddleware',
 ]
 
+# лічильник SQL на кожен запит і пошук N+1 (myapp/instrumentation.py), звіт: /store/debug/queries/
+# Кожен запит з інструментуванням платить за обгортку execute, нормалізацію SQL і запис у кеш, тож
+# за замовчуванням воно увімкнене лише при DEBUG; на продакшені — QUERY_INSTRUMENTATION=1 і частка запитів
+# QUERY_INSTRUMENTATION_SAMPLE_RATE (з locmem звіт збирає лише процес, що показує сторінку звіту)
+QUERY_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('QUERY_INSTRUMENTATION', '1' if DEBUG else '0') == '1',
+    # частка HTTP-запитів, що інструментуються (0.1 — кожен десятий у середньому)
+    'SAMPLE_RATE': float(os.environ.get('QUERY_INSTRUMENTATION_SAMPLE_RATE', '1')),
+    # однакова форма запиту, повторена стільки разів за один HTTP-запит, — ознака N+1
+    'N_PLUS_ONE_THRESHOLD': 5,
+    # X-Query-Count, X-Query-Time-Ms, X-Query-Repeated-Shapes у відповідях усім відвідувачам
+    # (персонал отримує їх завжди); на продакшені лишайте вимкненим
+    'RESPONSE_HEADERS': DEBUG,
+}
+
 ROOT_URLCONF = 'OnlineStore.urls'
 
 TEMPLATES = [
@@ -63,24 +83,63 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'myapp.context_processors.user_roles',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'OnlineStore.wsgi.application'
+# async-версії сторінок каталогу (myapp/views.py); asgi.py вмикає їх за замовчуванням, під WSGI — sync
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# --- SQLite: режим конкурентності
+# PRAGMA виконуються на кожному новому з'єднанні (OPTIONS['init_command']):
+# WAL — читачі не блокуються записом і навпаки; busy_timeout — запис чекає на блокування
+# замість миттєвого "database is locked"; synchronous=NORMAL — у режимі WAL безпечно для цілісності
+# БД (втрата хіба що останніх транзакцій при вимкненні живлення); mmap_size і cache_size (KiB, від'ємне
+# значення) — читання сторінок з пам'яті.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32 * 1024,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # транзакція (atomic) одразу бере блокування на запис: інакше читання на початку оформлення
+            # замовлення не може перейти в запис, поки пише інший процес, і падає з "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# --- Репліки для читання
+# DATABASE_REPLICAS — шляхи до файлів-копій основної БД через os.pathsep (":" / ";"), напр.
+# DATABASE_REPLICAS=/srv/db/replica1.sqlite3:/srv/db/replica2.sqlite3; копії оновлює команда sync_replicas.
+# Без реплік усе читається з default. В тестах репліки дзеркалять тестову default, а читання з них
+# вимикає тестовий runner (myapp/test_runner.py).
+DATABASE_REPLICAS = []
+for number, replica_name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(os.pathsep)), start=1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'NAME': replica_name, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['myapp.db_router.PrimaryReplicaRouter']
+# скільки секунд після запису браузер читає лише з основної БД (read-your-writes)
+DATABASE_REPLICA_STICKY_SECONDS = 10
+
+TEST_RUNNER = 'myapp.test_runner.TestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +180,19 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'myapp/static'),
 ]
+# збірка: python manage.py collectstatic — файли з хешем у назві + .gz/.br копії (myapp/static_assets.py).
+# .br створюються лише з необов'язковим пакетом brotli (pip install brotli), без нього — тільки .gz.
+# Без DEBUG {% static %} бере назви з manifest, тож collectstatic обов'язковий перед запуском
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'myapp.static_assets.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -129,6 +201,59 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# 'python' | 'x-accel-redirect' (nginx) | 'x-sendfile' (Apache/lighttpd), див. myapp/media_serving.py
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'python')
+# internal location у nginx, що вказує на MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+
+# --- Кеш
+# CACHE_BACKEND: 'locmem' — у пам'яті процесу (за замовчуванням, без залежностей);
+# 'file' — каталог на диску, спільний для всіх процесів на сервері; 'redis' / 'memcached' — спільний сервер
+# (потрібні пакети redis / pymemcache). CACHE_LOCATION перевизначає адресу або каталог.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'onlinestore'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'onlinestore',
+    }
+}
+# кошики (myapp/cart.py) — окремий псевдонім: фрагменти карток та інші записи кешу їх не витісняють.
+# Write-behind (кліки змінюють лише кеш) — тільки зі спільним і постійним кешем: file або redis
+# (з maxmemory-policy noeviction); з locmem (окремий у кожному процесі) чи memcached (LRU)
+# кошик користувача пишеться одразу в БД, анонімний — у сесію.
+# Обмеження за замовчуванням (locmem): "кліки без запису в БД" не виконується — кожен клік користувача —
+# один запит до одного рядка BookingItem, а клік анонімного відвідувача оновлює рядок django_session
+# (SESSION_ENGINE нижче — cached_db). Без записів у БД кліки лише з CACHE_BACKEND=file або redis.
+CART_WRITE_BEHIND = CACHE_BACKEND in ('file', 'redis')
+CACHES['carts'] = {
+    'BACKEND': CACHES['default']['BACKEND'],
+    'LOCATION': {
+        'file': os.path.join(CACHES['default']['LOCATION'], 'carts'),
+        'locmem': 'onlinestore-carts',
+    }.get(CACHE_BACKEND, CACHES['default']['LOCATION']),
+    'KEY_PREFIX': 'onlinestore-carts',
+}
+if CACHE_BACKEND == 'file':
+    # FileBasedCache при переповненні видаляє частину записів — для кошиків ліміт не досяжний
+    CACHES['carts']['OPTIONS'] = {'MAX_ENTRIES': 10 ** 9}
+
+# сесії: читання з кешу, запис і в кеш, і в БД (сесія переживає очищення кешу)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# користувач сесії береться з кешу (myapp/auth_backends.py); права — як у ModelBackend.
+# Нові входи записуються в сесію з CachedUserBackend; ModelBackend лишається у списку, бо Django розлогінює
+# сесію, backend якої немає в AUTHENTICATION_BACKENDS, — старі сесії працюють (без кешу) до наступного входу
+AUTHENTICATION_BACKENDS = [
+    'myapp.auth_backends.CachedUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 LOGIN_REDIRECT_URL = '/'
 LOGIN_URL = '/store/login/'
\ No newline at end of file
@@ -15,16 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.contrib.auth.views import LoginView, LogoutView
-from myapp.views import index_page, RegisterView, ConfirmLogoutView
+from myapp.views import index_page, async_index_page, RegisterView, ConfirmLogoutView
 from myapp.forms import LoginForm
 from django.conf import settings
-from django.conf.urls.static import static
+from myapp.static_assets import serve_static
+from myapp.media_serving import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', index_page, name='index'),
+    path('', async_index_page if settings.ASYNC_VIEWS else index_page, name='index'),
     path('store/', include('myapp.urls')),
+    # media з ETag/304, Range та передачею вебсерверу (X-Accel-Redirect / X-Sendfile)
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+]
 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# у DEBUG статику віддає runserver; інакше — зібрані collectstatic файли з .br/.gz та immutable-кешуванням
+if not settings.DEBUG:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static),
+    ]
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+
+
+# --- Користувач сесії з кешу
+# AuthenticationMiddleware на кожен запит викликає backend.get_user(id) — тут це читання з кешу замість SELECT.
+# Перевірка хешу сесії (зміна пароля розлогінює інші сесії) лишається в Django і працює з кешованим об'єктом,
+# тому кеш обов'язково скидається при збереженні User / UserProfile (signals.py).
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def invalidate_cached_user(*user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedUserBackend(ModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        # ModelBackend стоїть далі у списку лише для старих сесій — не даємо йому вдруге хешувати невірний пароль
+        if user is None and password is not None:
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            # профіль (телефон) показується в шапці профілю — завантажуємо одразу
+            user = UserModel._default_manager.select_related('userprofile').filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,149 @@
+import multiprocessing
+import queue
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+
+from myapp.benchmarks.runner import percentile
+from myapp.benchmarks.workers import ASGI_ROUTES, asgi_worker, concurrency_worker
+
+
+# --- Конкурентне навантаження на SQLite з кількох процесів (команда run_concurrency_benchmark)
+# читачі переглядають каталог, письменники кладуть товар у кошик і оформлюють замовлення —
+# через справжні view, як воркери gunicorn/uwsgi, кожен зі своїм з'єднанням з файлом БД (див. workers.py)
+
+def benchmark_modes():
+    """
+    Режими для порівняння "до / після": default — стандартний SQLite (rollback journal,
+    DEFERRED-транзакції, без PRAGMA), tuned — OPTIONS з settings.DATABASES.
+    """
+    return {
+        'default': {'journal_mode': 'delete', 'options': {}},
+        'tuned': {
+            'journal_mode': str(getattr(settings, 'SQLITE_PRAGMAS', {}).get('journal_mode', 'wal')).lower(),
+            'options': dict(settings.DATABASES['default'].get('OPTIONS', {})),
+        },
+    }
+
+
+def set_journal_mode(db_name, journal_mode):
+    """Режим журналу зберігається у файлі БД — перемикаємо до старту воркерів, поки інших з'єднань немає."""
+    conn = sqlite3.connect(db_name)
+    try:
+        conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    finally:
+        conn.close()
+
+
+def run_concurrency(db_name, mode, readers, writers, duration, customer_ids, product_ids, category_ids, seed=0):
+    """
+    Запускає readers + writers процесів на duration секунд у режимі mode (див. benchmark_modes).
+    Повертає по ролях: успішні операції за секунду, p95 латентності, помилки та з них "database is locked".
+    """
+    modes = benchmark_modes()
+    connections.close_all()
+    set_journal_mode(db_name, modes[mode]['journal_mode'])
+
+    roles = ['reader'] * readers + ['writer'] * writers
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(len(roles))
+    results = context.Queue()
+    processes = []
+    for i, role in enumerate(roles):
+        task = {
+            'db_name': str(db_name),
+            'options': modes[mode]['options'],
+            'role': role,
+            'duration': duration,
+            # кожен письменник — окремий покупець зі своїм кошиком
+            'user_id': customer_ids[i % len(customer_ids)] if role == 'writer' else None,
+            'product_ids': product_ids,
+            'category_ids': category_ids,
+            'seed': f'{seed}:{mode}:{i}',
+        }
+        process = context.Process(target=concurrency_worker, args=(task, barrier, results))
+        process.start()
+        processes.append(process)
+
+    collected = []
+    # на старт spawn-процесу йде кілька секунд; воркер, що впав до бар'єра, не повинен підвісити команду
+    timeout = duration + 120
+    try:
+        for _ in processes:
+            collected.append(results.get(timeout=timeout))
+    except queue.Empty:
+        raise RuntimeError(f'Не всі воркери завершились за {timeout} с')
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    report = {}
+    for role in ('reader', 'writer'):
+        role_stats = [stats for stats in collected if stats['role'] == role]
+        if not role_stats:
+            continue
+        latencies = sorted(latency * 1000 for stats in role_stats for latency in stats['latencies']) or [0.0]
+        ops = sum(stats['ops'] for stats in role_stats)
+        report[role] = {
+            'processes': len(role_stats),
+            'ops': ops,
+            'ops_per_sec': round(ops / duration, 1),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'errors': sum(stats['errors'] for stats in role_stats),
+            'locked': sum(stats['locked'] for stats in role_stats),
+        }
+    return report
+
+
+# --- ASGI: sync- проти async-view під однаковою конкуренцією (команда run_async_benchmark)
+ASGI_VARIANTS = ('sync', 'async')
+
+
+def run_asgi_views(db_name, variant, clients, duration, warmup, user_ids, product_ids, category_ids, search_terms, seed=0):
+    """
+    Один ASGI-процес (як воркер uvicorn) з clients конкурентними клієнтами на duration секунд;
+    variant — sync (view виконуються в потоках через sync_to_async) або async (ASYNC_VIEWS).
+    Повертає по маршрутах: запити за секунду, p50/p95 латентності, помилки.
+    """
+    connections.close_all()
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    task = {
+        'db_name': str(db_name),
+        'variant': variant,
+        'clients': clients,
+        'duration': duration,
+        'warmup': warmup,
+        'user_ids': user_ids,
+        'product_ids': product_ids,
+        'category_ids': category_ids,
+        'search_terms': search_terms,
+        'seed': f'{seed}:{variant}',
+    }
+    process = context.Process(target=asgi_worker, args=(task, results))
+    process.start()
+    timeout = warmup + duration + 120
+    try:
+        stats = results.get(timeout=timeout)
+    except queue.Empty:
+        raise RuntimeError(f'ASGI-воркер не завершився за {timeout} с')
+    finally:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    report = {}
+    for route in ASGI_ROUTES:
+        route_stats = stats['routes'][route]
+        latencies = sorted(latency * 1000 for latency in route_stats['latencies']) or [0.0]
+        report[route] = {
+            'requests': len(route_stats['latencies']),
+            'rps': round(len(route_stats['latencies']) / duration, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'errors': route_stats['errors'],
+        }
+    return report
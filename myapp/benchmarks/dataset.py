@@ -0,0 +1,169 @@
+import random
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import call_command
+from django.db import transaction
+
+from myapp.models import Category, Comment, Order, OrderItem, OrderNotification, Product
+
+
+# --- Синтетичний каталог для навантажувального тесту (див. команду run_benchmark)
+# розмір за замовчуванням — порядок реального магазину: 100k товарів, 1M відгуків, 50k замовлень
+DEFAULT_SCALE = {
+    'categories': 50,
+    'products': 100_000,
+    'comments': 1_000_000,
+    'orders': 50_000,
+    'customers': 2_000,
+    'managers': 20,
+}
+BATCH_SIZE = 5_000
+BENCHMARK_PASSWORD = 'benchmark-password'
+USERNAME_PREFIX = 'bench_'
+
+# права груп такі самі, як у робочій БД (групи там створені вручну, а не міграцією)
+GROUP_PERMISSIONS = {
+    'Client': [
+        'add_booking', 'change_booking', 'delete_booking', 'view_booking',
+        'add_bookingitem', 'change_bookingitem', 'delete_bookingitem', 'view_bookingitem',
+        'view_category', 'add_comment', 'change_comment', 'delete_comment', 'view_comment',
+        'add_order', 'change_order', 'delete_order', 'view_order',
+        'add_orderitem', 'change_orderitem', 'delete_orderitem', 'view_orderitem', 'view_product',
+    ],
+    'Manager': [
+        'add_category', 'change_category', 'view_category', 'delete_comment', 'view_comment',
+        'view_order', 'view_orderitem', 'add_ordernotification', 'view_ordernotification',
+        'add_product', 'change_product', 'view_product',
+    ],
+}
+
+ADJECTIVES = ['Новий', 'Компактний', 'Професійний', 'Бездротовий', 'Легкий', 'Смарт', 'Класичний', 'Преміум', 'Дитячий', 'Спортивний']
+NOUNS = ['телефон', 'ноутбук', 'чайник', 'рюкзак', 'годинник', 'навушники', 'планшет', 'светр', 'кавоварка', 'ліхтар', 'монітор', 'велосипед']
+COMMENT_TEXTS = ['Все добре, рекомендую', 'Якість могла б бути кращою', 'Швидка доставка', 'Відповідає опису', 'Не сподобалось', 'Чудовий товар за свої гроші']
+
+
+def is_dataset_built():
+    return User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+
+
+def _bulk_create(model, objects, stdout=None, label=''):
+    """bulk_create з генератора пачками по BATCH_SIZE — пам'ять не залежить від кількості рядків."""
+    created = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+            if stdout and created % (BATCH_SIZE * 20) == 0:
+                stdout.write(f'  {label}: {created}')
+    if batch:
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def _create_groups():
+    groups = {}
+    for name, codenames in GROUP_PERMISSIONS.items():
+        group, _ = Group.objects.get_or_create(name=name)
+        group.permissions.set(Permission.objects.filter(content_type__app_label='myapp', codename__in=codenames))
+        groups[name] = group
+    return groups
+
+
+def build_dataset(scale=None, seed=42, stdout=None):
+    """
+    Заповнює поточну БД синтетичними даними. Сигнали не викликаються (bulk_create),
+    тому статистика відгуків і пошуковий індекс перебудовуються в кінці.
+    Повертає словник з кількістю створених рядків.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    if scale['comments'] > scale['products'] * scale['customers']:
+        raise ValueError('comments не може перевищувати products × customers (один відгук на товар від користувача)')
+
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+    created = {}
+
+    with transaction.atomic():
+        groups = _create_groups()
+
+        _bulk_create(User, (
+            User(username=f'{USERNAME_PREFIX}customer_{i}', password=password, email=f'customer_{i}@example.com')
+            for i in range(scale['customers'])
+        ))
+        _bulk_create(User, (
+            User(username=f'{USERNAME_PREFIX}manager_{i}', password=password, is_staff=False)
+            for i in range(scale['managers'])
+        ))
+        User.objects.create(username=f'{USERNAME_PREFIX}admin', password=password, is_staff=True, is_superuser=True)
+
+        customer_ids = list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').order_by('id').values_list('id', flat=True))
+        manager_ids = list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}manager_').order_by('id').values_list('id', flat=True))
+        groups['Client'].user_set.add(*customer_ids)
+        groups['Manager'].user_set.add(*manager_ids)
+        created['users'] = len(customer_ids) + len(manager_ids) + 1
+
+        created['categories'] = _bulk_create(Category, (Category(name=f'Категорія {i}') for i in range(scale['categories'])))
+        category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+
+        created['products'] = _bulk_create(Product, (
+            Product(
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}',
+                description=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} для дому та роботи. Артикул {i}.',
+                category_id=rng.choice(category_ids),
+                price=Decimal(rng.randint(100, 100_000)) / 100,
+                is_active=rng.random() > 0.05,
+            )
+            for i in range(scale['products'])
+        ), stdout, 'products')
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        product_prices = dict(Product.objects.values_list('id', 'price'))
+
+        # i-й відгук: товар i % P, автор (i // P) % U — пара (product, user) завжди унікальна
+        created['comments'] = _bulk_create(Comment, (
+            Comment(
+                product_id=product_ids[i % len(product_ids)],
+                user_id=customer_ids[(i // len(product_ids)) % len(customer_ids)],
+                text=rng.choice(COMMENT_TEXTS),
+                rating=rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0],
+            )
+            for i in range(scale['comments'])
+        ), stdout, 'comments')
+
+        # склад замовлень генеруємо наперед, щоб total_price відповідав позиціям
+        order_plans = [
+            [(product_id, rng.randint(1, 3)) for product_id in rng.sample(product_ids, rng.randint(1, min(4, len(product_ids))))]
+            for _ in range(scale['orders'])
+        ]
+        created['orders'] = _bulk_create(Order, (
+            Order(
+                user_id=customer_ids[i % len(customer_ids)],
+                total_price=sum(product_prices[product_id] * quantity for product_id, quantity in plan),
+                delivery_address=f'вул. Тестова, {i}',
+            )
+            for i, plan in enumerate(order_plans)
+        ), stdout, 'orders')
+        order_ids = list(Order.objects.order_by('id').values_list('id', flat=True))
+
+        created['order_items'] = _bulk_create(OrderItem, (
+            OrderItem(order_id=order_id, product_id=product_id, quantity=quantity, price=product_prices[product_id])
+            for order_id, plan in zip(order_ids, order_plans)
+            for product_id, quantity in plan
+        ), stdout, 'order items')
+        del order_plans
+
+        # кожен менеджер отримує сповіщення про кожне замовлення; більша частина вже прочитана
+        created['notifications'] = _bulk_create(OrderNotification, (
+            OrderNotification(user_id=manager_id, order_id=order_id, message=f'Нове замовлення № {order_id}', is_read=rng.random() > 0.1)
+            for order_id in order_ids
+            for manager_id in manager_ids
+        ), stdout, 'notifications')
+
+    call_command('rebuild_ratings', stdout=stdout or StringIO())
+    return created
@@ -0,0 +1,294 @@
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+from django.urls import get_resolver, reverse
+
+from myapp.benchmarks.dataset import USERNAME_PREFIX
+from myapp.instrumentation import QueryCounter
+from myapp.models import Category, Comment, Order, Product
+
+
+logger = logging.getLogger(__name__)
+
+
+# --- Маршрути навантажувального тесту
+class Route:
+    """
+    Один сценарій: name — ім'я URL з myapp/urls.py; role — від чийого імені виконується
+    (anonymous / customer / manager / admin); kwargs, params, data — функції від BenchmarkContext;
+    setup — непідрахована підготовка (напр. покласти товар у кошик перед оформленням замовлення);
+    content_type — для JSON-запитів (data серіалізує тестовий клієнт).
+    """
+
+    def __init__(self, name, role='anonymous', method='get', kwargs=None, params=None, data=None, setup=None, content_type=None):
+        self.name = name
+        self.role = role
+        self.method = method
+        self.kwargs = kwargs
+        self.params = params
+        self.data = data
+        self.setup = setup
+        self.content_type = content_type
+
+    def request(self, client, ctx):
+        url = reverse(self.name, kwargs=self.kwargs(ctx) if self.kwargs else None)
+        if self.method == 'post':
+            if self.content_type:
+                return client.post(url, self.data(ctx) if self.data else {}, content_type=self.content_type)
+            return client.post(url, self.data(ctx) if self.data else {})
+        return client.get(url, self.params(ctx) if self.params else {})
+
+
+def _add_to_booking(client, ctx):
+    ctx.booked_product_id = ctx.product_id()
+    client.post(reverse('booking_create'), {'product_id': ctx.booked_product_id})
+
+
+ROUTES = [
+    Route('index_page'),
+    Route('product_list'),
+    Route('product_list', params=lambda ctx: {'category': ctx.category_id(), 'sort': 'price_asc'}),
+    Route('product_search', params=lambda ctx: {'q': ctx.search_term()}),
+    Route('product_detail', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+    Route('comment_list', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+    Route('category_list'),
+    Route('login'),
+    Route('register'),
+
+    Route('booking_create', 'customer', 'post', data=lambda ctx: {'product_id': ctx.product_id()}),
+    Route('booking_detail', 'customer'),
+    Route('booking_update_quantity', 'customer', 'post', setup=_add_to_booking,
+          data=lambda ctx: {'product_id': ctx.booked_product_id, 'quantity': 2}),
+    Route('booking_delete', 'customer', 'post', setup=_add_to_booking,
+          data=lambda ctx: {'product_id': ctx.booked_product_id}),
+    Route('booking_clear', 'customer', 'post', setup=_add_to_booking),
+    Route('booking_batch_update', 'customer', 'post', setup=_add_to_booking, content_type='application/json', data=lambda ctx: {
+        'items': [{'product_id': ctx.booked_product_id, 'quantity': 3}, {'product_id': ctx.product_id(), 'quantity': 1}],
+    }),
+    Route('order_create', 'customer', setup=_add_to_booking),
+    Route('order_create', 'customer', 'post', setup=_add_to_booking, data=lambda ctx: {
+        'action_type': 'submit_order', 'delivery_address': 'вул. Тестова, 1', 'payment_method': 'cash_on_delivery',
+    }),
+    Route('order_confirm', 'customer', kwargs=lambda ctx: {'order_id': ctx.order_id()}),
+    Route('order_list', 'customer'),
+    Route('profile_user', 'customer'),
+    Route('profile_update', 'customer'),
+    Route('password_update', 'customer'),
+    Route('user_comments', 'customer'),
+    Route('user_favorites', 'customer'),
+    Route('favorite_product', 'customer', 'post', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+    Route('comment_create', 'customer', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+    Route('comment_update', 'customer', kwargs=lambda ctx: {'pk': ctx.comment_id()}),
+    Route('comment_delete', 'customer', kwargs=lambda ctx: {'pk': ctx.comment_id()}),
+    Route('confirm_logout', 'customer'),
+
+    Route('order_notification', 'manager'),
+    Route('order_notification', 'manager', params=lambda ctx: {'filter': 'unread'}),
+    Route('order_notification_unread_count', 'manager'),
+    Route('order_export', 'manager'),
+    Route('order_export', 'manager', params=lambda ctx: {'format': 'csv', 'payment_method': 'card'}),
+    Route('category_create', 'manager'),
+    Route('category_update', 'manager', kwargs=lambda ctx: {'pk': ctx.category_id()}),
+    Route('product_create', 'manager'),
+    Route('product_update', 'manager', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+
+    Route('category_delete', 'admin', kwargs=lambda ctx: {'pk': ctx.category_id()}),
+    Route('product_delete', 'admin', kwargs=lambda ctx: {'pk': ctx.product_id()}),
+    Route('card_cache_stats', 'admin'),
+    Route('query_report', 'admin'),
+]
+
+SEARCH_TERMS = ['телефон', 'ноутбук', 'смарт', 'преміум навушники', 'чайник', 'легкий рюкзак']
+
+
+def missing_routes(routes=ROUTES):
+    """Імена URL з myapp/urls.py, для яких немає сценарію (новий view має потрапити в тест)."""
+    app_names = set()
+    for url_pattern in get_resolver().url_patterns:
+        if getattr(url_pattern, 'urlconf_name', None) is not None and getattr(url_pattern.urlconf_name, '__name__', '') == 'myapp.urls':
+            app_names.update(pattern.name for pattern in url_pattern.url_patterns if pattern.name)
+    return sorted(app_names - {route.name for route in routes})
+
+
+def route_label(route):
+    """Унікальна назва сценарію у звіті: ім'я URL + метод і параметри, якщо сценаріїв кілька."""
+    label = route.name
+    if route.method != 'get':
+        label += f' {route.method.upper()}'
+    if route.params:
+        label += ' ?' + '&'.join(sorted(route.params(_LabelContext())))
+    return label
+
+
+class _LabelContext:
+    def __getattr__(self, name):
+        return lambda: 0
+
+
+# --- Контекст клієнта
+class BenchmarkContext:
+    """Ідентифікатори, з якими працює один віртуальний клієнт; вибір випадковий, але відтворюваний."""
+
+    def __init__(self, user, rng, product_ids, category_ids):
+        self.user = user
+        self.rng = rng
+        self.product_ids = product_ids
+        self.category_ids = category_ids
+        self.order_ids = list(Order.objects.filter(user=user).values_list('id', flat=True)[:50]) if user else []
+        self.comment_ids = list(Comment.objects.filter(user=user).values_list('id', flat=True)[:50]) if user else []
+        self.booked_product_id = None
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+    def category_id(self):
+        return self.rng.choice(self.category_ids)
+
+    def order_id(self):
+        return self.rng.choice(self.order_ids)
+
+    def comment_id(self):
+        return self.rng.choice(self.comment_ids)
+
+    def search_term(self):
+        return self.rng.choice(SEARCH_TERMS)
+
+
+def _users_for_role(role, count):
+    if role == 'anonymous':
+        return [None] * count
+    if role == 'admin':
+        return list(User.objects.filter(username=f'{USERNAME_PREFIX}admin')) * count
+    prefix = f'{USERNAME_PREFIX}{role}_'
+    users = list(User.objects.filter(username__startswith=prefix).order_by('id')[:count])
+    if not users:
+        raise LookupError(f'Немає користувачів {prefix}*: спочатку заповніть БД (build_dataset)')
+    return [users[i % len(users)] for i in range(count)]
+
+
+# --- Вимірювання
+def percentile(sorted_values, percent):
+    """Percentile методом nearest-rank; sorted_values — відсортований непорожній список."""
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _client_session(route, ctx, requests, warmup):
+    client = Client()
+    if ctx.user is not None:
+        client.force_login(ctx.user)
+
+    samples = []
+    try:
+        for i in range(warmup + requests):
+            counter = QueryCounter()
+            try:
+                if route.setup:
+                    route.setup(client, ctx)
+            except Exception as error:
+                # запит не виконувався — рахуємо як помилку, але без латентності
+                logger.warning('Benchmark setup for %s failed: %s', route_label(route), error)
+                if i >= warmup:
+                    samples.append((None, 0, 599))
+                continue
+            started = time.perf_counter()
+            try:
+                with counter:
+                    response = route.request(client, ctx)
+                status = response.status_code
+            except Exception as error:
+                logger.warning('Benchmark request %s failed: %s', route_label(route), error)
+                status = 599
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                samples.append((elapsed, counter.count, status))
+    finally:
+        # у потоках ThreadPoolExecutor з'єднання з БД свої — закриваємо, щоб не накопичувати
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+    return samples
+
+
+def run_route(route, clients=4, requests=20, warmup=2, seed=0, product_ids=None, category_ids=None):
+    """
+    Запускає clients паралельних клієнтів, кожен робить warmup + requests запитів.
+    Повертає зведення: латентність (мс), пропускна здатність, кількість SQL та помилок.
+    """
+    product_ids = product_ids or list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:10_000])
+    category_ids = category_ids or list(Category.objects.values_list('id', flat=True))
+    contexts = [
+        BenchmarkContext(user, random.Random(f'{seed}:{route_label(route)}:{i}'), product_ids, category_ids)
+        for i, user in enumerate(_users_for_role(route.role, clients))
+    ]
+
+    started = time.perf_counter()
+    if clients == 1:
+        results = [_client_session(route, contexts[0], requests, warmup)]
+    else:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(lambda ctx: _client_session(route, ctx, requests, warmup), contexts))
+    wall_time = time.perf_counter() - started
+
+    samples = [sample for result in results for sample in result]
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples if elapsed is not None) or [0.0]
+    queries = [count for elapsed, count, _ in samples if elapsed is not None] or [0]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        # прогрів входить у wall_time, тому враховуємо і його запити
+        'throughput_rps': round(clients * (warmup + requests) / wall_time, 1),
+        'queries_avg': round(sum(queries) / len(queries), 1),
+        'queries_max': max(queries),
+    }
+
+
+def run_benchmark(routes=ROUTES, clients=4, requests=20, warmup=2, seed=0, only=None, stdout=None):
+    product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:10_000])
+    category_ids = list(Category.objects.values_list('id', flat=True))
+
+    report = {}
+    for route in routes:
+        label = route_label(route)
+        if only and route.name not in only:
+            continue
+        report[label] = run_route(route, clients, requests, warmup, seed, product_ids, category_ids)
+        if stdout:
+            stats = report[label]
+            stdout.write(
+                f"{label:<45} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                f"{stats['throughput_rps']:>7} rps  SQL {stats['queries_avg']:>5}  errors {stats['errors']}"
+            )
+    return report
+
+
+# --- Порівняння з базовою лінією
+def compare_with_baseline(report, baseline, threshold=0.2):
+    """
+    Повертає список регресій (рядків): p95 зріс більше ніж на threshold, зросла максимальна
+    кількість SQL (для сталого набору даних вона детермінована) або з'явились помилки.
+    Маршрути, яких немає в baseline, не порівнюються.
+    """
+    regressions = []
+    for label, stats in report.items():
+        base = baseline.get(label)
+        if base is None:
+            continue
+        if stats['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(f"{label}: p95 {base['p95_ms']} → {stats['p95_ms']} ms")
+        if stats['queries_max'] > base['queries_max']:
+            regressions.append(f"{label}: SQL {base['queries_max']} → {stats['queries_max']}")
+        if stats['errors'] > base.get('errors', 0):
+            regressions.append(f"{label}: помилок {base.get('errors', 0)} → {stats['errors']}")
+    return regressions
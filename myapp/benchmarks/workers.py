@@ -0,0 +1,185 @@
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+
+# --- Код, що виконується в окремих процесах (multiprocessing, spawn)
+# spawn однаково працює на Linux, macOS і Windows, але дочірній процес імпортує цей модуль ще до
+# django.setup() — тому тут немає імпортів моделей; Django ініціалізується в самому воркері
+
+def _is_locked_error(error):
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+def _reader_step(client, rng, task):
+    client.get(reverse('product_list'), {'category': rng.choice(task['category_ids'])})
+    return client.get(reverse('product_detail', kwargs={'pk': rng.choice(task['product_ids'])}))
+
+
+def _writer_step(client, rng, task):
+    # кошик, потім оформлення (OrderCreateView.post) — обидва запити пишуть у БД
+    response = client.post(reverse('booking_create'), {'product_id': rng.choice(task['product_ids'])})
+    if response.status_code >= 400:
+        return response
+    return client.post(reverse('order_create'), {
+        'action_type': 'submit_order', 'delivery_address': 'вул. Тестова, 1', 'payment_method': 'cash_on_delivery',
+    })
+
+
+def concurrency_worker(task, barrier, results):
+    django.setup()
+    from myapp.static_assets import storages_without_manifest
+    # з'єднання ще не відкрите — підставляємо файл тестової БД і параметри режиму
+    connection = connections['default']
+    connection.settings_dict['NAME'] = task['db_name']
+    connection.settings_dict['OPTIONS'] = task['options']
+    # репліки — дзеркала тестової БД (як у run_benchmark): той самий файл, окремі з'єднання
+    for alias in settings.DATABASE_REPLICAS:
+        connections[alias].settings_dict['NAME'] = task['db_name']
+    override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], STORAGES=storages_without_manifest()).enable()
+
+    client = Client(raise_request_exception=False)
+    if task['user_id'] is not None:
+        client.force_login(get_user_model().objects.get(pk=task['user_id']))
+    connection.close()
+    step = _writer_step if task['role'] == 'writer' else _reader_step
+    rng = random.Random(task['seed'])
+
+    stats = {'role': task['role'], 'ops': 0, 'errors': 0, 'locked': 0, 'latencies': []}
+    # усі процеси стартують навантаження одночасно (spawn і django.setup() займають різний час)
+    barrier.wait(timeout=120)
+    deadline = time.perf_counter() + task['duration']
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = step(client, rng, task)
+            error = response.status_code >= 500
+            # з raise_request_exception=False виняток view доступний у response.exc_info
+            locked = error and response.exc_info is not None and _is_locked_error(response.exc_info[1])
+        except Exception as exc:
+            error, locked = True, _is_locked_error(exc)
+        stats['latencies'].append(time.perf_counter() - started)
+        if error:
+            stats['errors'] += 1
+            stats['locked'] += int(locked)
+        else:
+            stats['ops'] += 1
+    connections.close_all()
+    results.put(stats)
+
+
+# --- ASGI: ті самі сторінки каталогу sync- і async-view (команда run_async_benchmark)
+# воркер викликає ASGI-застосунок напряму, як це робить uvicorn/daphne в одному процесі:
+# clients конкурентних задач asyncio, кожен запит — окремий ThreadSensitiveContext Django
+ASGI_ROUTES = ('index_page', 'product_list', 'product_search', 'product_detail', 'comment_list')
+
+
+def _asgi_route(rng, task):
+    route = rng.choice(ASGI_ROUTES)
+    if route == 'product_search':
+        return route, reverse(route), urlencode({'q': rng.choice(task['search_terms'])})
+    if route in ('product_detail', 'comment_list'):
+        return route, reverse(route, kwargs={'pk': rng.choice(task['product_ids'])}), ''
+    if route == 'product_list':
+        return route, reverse(route), urlencode({'category': rng.choice(task['category_ids'])})
+    return route, reverse(route), ''
+
+
+async def _asgi_get(application, path, query_string, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query_string.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    finished = asyncio.Event()
+    response = {'status': None, 'size': 0}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django слухає http.disconnect паралельно з view — "клієнт" від'єднується лише після відповіді
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['size'] += len(message.get('body', b''))
+            if not message.get('more_body'):
+                finished.set()
+
+    await application(scope, receive, send)
+    finished.set()
+    return response['status']
+
+
+def asgi_worker(task, results):
+    # ASYNC_VIEWS читається в settings і myapp/urls.py — до django.setup()
+    os.environ['ASYNC_VIEWS'] = '1' if task['variant'] == 'async' else '0'
+    django.setup()
+    from django.core.asgi import get_asgi_application
+    from myapp.static_assets import storages_without_manifest
+
+    connection = connections['default']
+    connection.settings_dict['NAME'] = task['db_name']
+    for alias in settings.DATABASE_REPLICAS:
+        connections[alias].settings_dict['NAME'] = task['db_name']
+    override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], STORAGES=storages_without_manifest()).enable()
+
+    # половина клієнтів — покупці з сесією (кошик і обране на сторінці товару), половина — анонімні
+    cookies = []
+    for i in range(task['clients']):
+        cookie = ''
+        if i % 2 and task['user_ids']:
+            client = Client()
+            client.force_login(get_user_model().objects.get(pk=task['user_ids'][i % len(task['user_ids'])]))
+            cookie = '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+        cookies.append(cookie)
+    connections.close_all()
+
+    application = get_asgi_application()
+    stats = {'variant': task['variant'], 'routes': {route: {'latencies': [], 'errors': 0} for route in ASGI_ROUTES}}
+
+    async def client_loop(index, deadline):
+        rng = random.Random(f"{task['seed']}:{index}")
+        while time.perf_counter() < deadline:
+            route, path, query_string = _asgi_route(rng, task)
+            started = time.perf_counter()
+            try:
+                status = await _asgi_get(application, path, query_string, cookies[index])
+            except Exception:
+                status = 500
+            route_stats = stats['routes'][route]
+            if status is None or status >= 400:
+                route_stats['errors'] += 1
+            else:
+                route_stats['latencies'].append(time.perf_counter() - started)
+
+    async def run(duration):
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(i, deadline) for i in range(task['clients'])))
+
+    # прогрів: шаблони, кеш карток, з'єднання
+    asyncio.run(run(task['warmup']))
+    for route_stats in stats['routes'].values():
+        route_stats['latencies'].clear()
+        route_stats['errors'] = 0
+    asyncio.run(run(task['duration']))
+    connections.close_all()
+    results.put(stats)
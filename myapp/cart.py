@@ -0,0 +1,482 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+
+from myapp.models import Booking, BookingItem, Product
+
+
+logger = logging.getLogger(__name__)
+
+
+# --- Кошик у кеші (write-behind)
+# кліки +/−, додавання і видалення змінюють лише кеш; у Booking/BookingItem кошик записується
+# при оформленні замовлення, вході/виході користувача і періодично (команда flush_carts).
+# Анонімний кошик живе в кеші під випадковим токеном із сесії, при вході зливається з кошиком користувача.
+# Write-behind вмикає settings.CART_WRITE_BEHIND — лише зі спільним і постійним кешем (псевдонім 'carts');
+# інакше (locmem — окремий у кожному процесі і з обмеженням на кількість записів) кошик користувача
+# пишеться одразу в БД (одним запитом до одного рядка на клік), а анонімний — у сесію (з cached_db — теж запис у БД).
+CART_CACHE_ALIAS = 'carts'
+CART_SESSION_KEY = 'cart_token'
+CART_SESSION_ITEMS_KEY = 'cart_items'
+CART_TIMEOUT = 60 * 60 * 24 * 30
+# блокування кошика на час read-modify-write у кеші (locked_cart)
+CART_LOCK_TIMEOUT = 5
+CART_LOCK_WAIT = 2
+# найбільша кількість одного товару в кошику (з запасом менша за межу PositiveIntegerField)
+MAX_ITEM_QUANTITY = 999
+
+# журнал кошиків, змінених після останнього запису в БД: лічильник (cache.incr — атомарний)
+# і ключ на кожен запис; кошик потрапляє в журнал один раз до наступного persist()
+DIRTY_SEQ_KEY = 'cart:dirty:seq'
+DIRTY_FLUSHED_KEY = 'cart:dirty:flushed'
+
+# бекенди, що втрачають записи (окремі в кожному процесі або витісняють за LRU), — не для write-behind
+VOLATILE_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+def is_write_behind():
+    return getattr(settings, 'CART_WRITE_BEHIND', False)
+
+
+def get_cart_cache():
+    return caches[CART_CACHE_ALIAS]
+
+
+@checks.register()
+def check_cart_cache(app_configs, **kwargs):
+    if is_write_behind() and settings.CACHES.get(CART_CACHE_ALIAS, {}).get('BACKEND') in VOLATILE_CACHE_BACKENDS:
+        return [checks.Error(
+            'CART_WRITE_BEHIND потребує спільного постійного кешу для псевдоніма "carts"',
+            hint='Використайте CACHE_BACKEND file або redis, або вимкніть CART_WRITE_BEHIND',
+            id='myapp.E001',
+        )]
+    return []
+
+
+def _user_cart_key(user_id):
+    return f'cart:user:{user_id}'
+
+
+def _anonymous_cart_key(token):
+    return f'cart:anon:{token}'
+
+
+def _dirty_entry_key(seq):
+    return f'cart:dirty:{seq}'
+
+
+def _load_user_items(user_id):
+    return dict(
+        BookingItem.objects.filter(booking__user_id=user_id, product__isnull=False)
+        .order_by('pk').values_list('product_id', 'quantity')
+    )
+
+
+class Cart:
+    """
+    Вміст кошика {product_id: quantity}; порядок — порядок додавання товарів.
+    key — ключ у кеші кошиків (write-behind), session — сесія анонімного кошика без write-behind,
+    in_db — кошик користувача без write-behind: рядки читаються з БД лише за потреби, а кожна зміна
+    записується окремим запитом до одного рядка BookingItem (див. _apply_changes).
+    """
+
+    def __init__(self, key=None, user_id=None, items=None, dirty=False, session=None, in_db=False):
+        self.key = key
+        self.user_id = user_id
+        self.in_db = in_db
+        self._items = None if in_db else dict(items or {})
+        self.dirty = dirty
+        self.session = session
+        self._was_dirty = dirty
+        self._booking = None
+        self._changes = []
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = _load_user_items(self.user_id)
+        return self._items
+
+    # --- Завантаження
+    @classmethod
+    def for_user(cls, user_id):
+        if not is_write_behind():
+            return cls(user_id=user_id, in_db=True)
+
+        key = _user_cart_key(user_id)
+        data = get_cart_cache().get(key)
+        if data is None:
+            # кешу немає — кошик з БД (одним запитом), він і так збережений
+            cart = cls(key, user_id, _load_user_items(user_id))
+            cart.save()
+            return cart
+        return cls(key, user_id, data['items'], data['dirty'])
+
+    @classmethod
+    def for_request(cls, request, create=False):
+        """
+        Кошик поточного користувача. Анонімний кошик без create не створює сесію:
+        порожній кошик без ключа нічого не зберігає.
+        """
+        if request.user.is_authenticated:
+            return cls.for_user(request.user.pk)
+
+        if not is_write_behind():
+            # JSON-серіалізація сесії: пари [product_id, quantity]
+            return cls(items=request.session.get(CART_SESSION_ITEMS_KEY), session=request.session)
+
+        token = request.session.get(CART_SESSION_KEY)
+        if token is None:
+            if not create:
+                return cls()
+            token = uuid.uuid4().hex
+            request.session[CART_SESSION_KEY] = token
+        key = _anonymous_cart_key(token)
+        data = get_cart_cache().get(key)
+        return cls(key, items=data['items'] if data else None)
+
+    # --- Вміст
+    def __contains__(self, product_id):
+        return int(product_id) in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def quantity(self, product_id):
+        return self.items.get(int(product_id), 0)
+
+    # зміни кошика в БД не читають його вміст: рядки, якщо вже завантажені, оновлюються і в пам'яті
+    def add(self, product_id, quantity=1):
+        product_id = int(product_id)
+        if self.in_db:
+            self._changes.append(('add', product_id, quantity))
+            if self._items is None:
+                return
+        self.items[product_id] = min(self.items.get(product_id, 0) + quantity, MAX_ITEM_QUANTITY)
+        self.dirty = True
+
+    def set_quantity(self, product_id, quantity):
+        product_id = int(product_id)
+        if self.in_db:
+            self._changes.append(('set', product_id, quantity))
+            if self._items is None:
+                return
+        self.items[product_id] = quantity
+        self.dirty = True
+
+    def update_quantity(self, product_id, quantity):
+        """Як set_quantity, але лише для товару, що вже є в кошику."""
+        product_id = int(product_id)
+        if self.in_db:
+            self._changes.append(('update', product_id, quantity))
+            if self._items is None:
+                return
+        if product_id in self.items:
+            self.items[product_id] = quantity
+            self.dirty = True
+
+    def remove(self, product_id):
+        product_id = int(product_id)
+        if self.in_db:
+            self._changes.append(('remove', product_id, None))
+            if self._items is None:
+                return
+        if self.items.pop(product_id, None) is not None:
+            self.dirty = True
+
+    def clear(self):
+        if self.in_db:
+            self._changes.append(('clear', None, None))
+            if self._items is None:
+                return
+        if self.items:
+            self.items.clear()
+            self.dirty = True
+
+    def get_lines(self):
+        """Рядки для сторінок кошика і оформлення: товари одним запитом, видалені товари пропускаються."""
+        products = Product.objects.in_bulk(list(self.items))
+        return [
+            {'product': products[product_id], 'quantity': quantity, 'total': products[product_id].price * quantity}
+            for product_id, quantity in self.items.items()
+            if product_id in products
+        ]
+
+    def get_totals(self, lines=None):
+        """
+        Сума і кількість товарів; без lines — кошик у БД бере кешовані підсумки Booking.get_totals,
+        інші — лише ціни товарів кошика одним запитом.
+        """
+        if lines is None and self.in_db and not self._changes:
+            booking = self.get_booking()
+            if booking is not None:
+                return booking.get_totals()
+            lines = []
+        if lines is None:
+            prices = dict(Product.objects.filter(pk__in=list(self.items)).values_list('pk', 'price')) if self.items else {}
+            lines = [
+                {'quantity': quantity, 'total': prices[product_id] * quantity}
+                for product_id, quantity in self.items.items()
+                if product_id in prices
+            ]
+        return {
+            'total_price': Decimal(sum(line['total'] for line in lines)).quantize(Decimal('0.01')),
+            'item_count': sum(line['quantity'] for line in lines),
+        }
+
+    # --- Збереження
+    def save(self):
+        """
+        Write-behind: записує кошик у кеш, змінений кошик користувача один раз потрапляє в журнал для flush_carts.
+        Без write-behind: змінений кошик одразу в БД (користувач) або в сесію (анонімний).
+        """
+        if self.session is not None:
+            if self.dirty:
+                self.session[CART_SESSION_ITEMS_KEY] = [[product_id, quantity] for product_id, quantity in self.items.items()]
+                self.dirty = False
+            return
+        if self.in_db:
+            if self._changes:
+                self._apply_changes()
+            self.dirty = False
+            return
+        if self.key is None:
+            return
+
+        if self.user_id is None:
+            self.dirty = False
+        get_cart_cache().set(self.key, {'items': self.items, 'dirty': self.dirty}, CART_TIMEOUT)
+        if self.dirty and not self._was_dirty:
+            _mark_dirty(self.user_id)
+        self._was_dirty = self.dirty
+
+    def persist(self):
+        """
+        Записує змінений кошик користувача в Booking/BookingItem однією транзакцією: прибрані товари — DELETE,
+        решта — один upsert (INSERT ... ON CONFLICT (booking, product) DO UPDATE). Повертає Booking
+        (None для анонімного або порожнього кошика без Booking).
+        """
+        if self.user_id is None:
+            return None
+        if self.in_db:
+            # зміни вже записані в save()
+            self.save()
+            return self.get_booking()
+        booking = get_user_booking(self.user_id)
+        if not self.dirty:
+            # незмінений кошик уже збігається з БД
+            return booking
+
+        with transaction.atomic():
+            if booking is None:
+                if not self.items:
+                    self._mark_clean()
+                    return None
+                booking = get_user_booking(self.user_id, create=True)
+
+            # прибрані з кошика товари і рядки, товар яких видалено з каталогу
+            BookingItem.objects.filter(booking=booking).exclude(product_id__in=list(self.items)).delete()
+            # товари, видалені з каталогу після додавання в кошик, не записуємо
+            existing = set(Product.objects.filter(pk__in=list(self.items)).values_list('pk', flat=True))
+            BookingItem.objects.bulk_create(
+                [
+                    BookingItem(booking=booking, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in self.items.items()
+                    if product_id in existing
+                ],
+                update_conflicts=True, unique_fields=['booking', 'product'], update_fields=['quantity'],
+            )
+            # bulk_create не надсилає сигналів BookingItem
+            booking_id = booking.pk
+            transaction.on_commit(lambda: Booking.invalidate_totals(booking_id))
+
+        self._mark_clean()
+        return booking
+
+    def get_booking(self, create=False):
+        if self._booking is None or (create and self._booking.pk is None):
+            self._booking = get_user_booking(self.user_id, create=create) or Booking()
+        return self._booking if self._booking.pk is not None else None
+
+    def _apply_changes(self):
+        """
+        Кожна зміна — запит до одного рядка: додавання — UPDATE ... SET quantity = quantity + n (Booking.add_quantities),
+        нова кількість — upsert одного рядка, видалення — DELETE одного рядка. Кошик при цьому не читається і не
+        перезаписується цілком, паралельні кліки не губляться без блокування Booking.
+        """
+        changes, self._changes = self._changes, []
+        booking = self.get_booking(create=any(op in ('add', 'set') for op, _, _ in changes))
+        if booking is None:
+            return
+
+        items = BookingItem.objects.filter(booking=booking)
+        with transaction.atomic():
+            for op, product_id, quantity in changes:
+                if op == 'add':
+                    booking.add_quantities({product_id: quantity}, max_quantity=MAX_ITEM_QUANTITY)
+                elif op == 'set':
+                    BookingItem.objects.bulk_create(
+                        [BookingItem(booking=booking, product_id=product_id, quantity=quantity)],
+                        update_conflicts=True, unique_fields=['booking', 'product'], update_fields=['quantity'],
+                    )
+                elif op == 'update':
+                    items.filter(product_id=product_id).update(quantity=quantity)
+                elif op == 'remove':
+                    items.filter(product_id=product_id).delete()
+                else:
+                    items.delete()
+        # UPDATE і upsert не надсилають сигналів BookingItem; підсумки цього ж запиту читаються одразу
+        Booking.invalidate_totals(booking.pk)
+
+    def reset(self):
+        """Порожній збережений кошик — після оформлення замовлення (рядки вже видалені в БД)."""
+        self._changes = []
+        self.items.clear()
+        self.dirty = False
+        self.save()
+
+    def _mark_clean(self):
+        if self.key is None:
+            self.dirty = False
+            return
+        current = get_cart_cache().get(self.key)
+        if current is not None and current['items'] != self.items:
+            # паралельний запит змінив кошик під час запису — він лишається зміненим до наступного persist()
+            _mark_dirty(self.user_id)
+            return
+        self.dirty = False
+        self.save()
+
+
+def _mark_dirty(user_id):
+    cart_cache = get_cart_cache()
+    try:
+        seq = cart_cache.incr(DIRTY_SEQ_KEY)
+    except ValueError:
+        cart_cache.add(DIRTY_SEQ_KEY, 0, None)
+        seq = cart_cache.incr(DIRTY_SEQ_KEY)
+    cart_cache.set(_dirty_entry_key(seq), user_id, CART_TIMEOUT)
+
+
+@contextmanager
+def locked_cart(request, create=False):
+    """
+    Кошик запиту для зміни; після блоку кошик зберігається. Паралельні кліки того самого кошика не губляться:
+    write-behind — read-modify-write у кеші під коротким блокуванням (cache.add атомарний у всіх бекендах кешу),
+    без write-behind — кошик користувача змінюється атомарними запитами до окремих рядків (Cart._apply_changes).
+    """
+    if not is_write_behind():
+        cart = Cart.for_request(request, create=create)
+        yield cart
+        cart.save()
+        return
+
+    cart = Cart.for_request(request, create=create)
+    if cart.key is None:
+        yield cart
+        return
+
+    cart_cache = get_cart_cache()
+    lock_key = f'{cart.key}:lock'
+    locked = cart_cache.add(lock_key, 1, CART_LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + CART_LOCK_WAIT
+        while not locked and time.monotonic() < deadline:
+            time.sleep(0.01)
+            locked = cart_cache.add(lock_key, 1, CART_LOCK_TIMEOUT)
+        if locked:
+            # поки чекали, кошик змінив інший запит
+            cart = Cart.for_request(request, create=create)
+        else:
+            logger.warning('Cart %s: lock wait timed out, updating without lock', cart.key)
+    try:
+        yield cart
+        cart.save()
+    finally:
+        if locked:
+            cart_cache.delete(lock_key)
+
+
+def get_user_booking(user_id, create=False):
+    booking = Booking.objects.filter(user_id=user_id).order_by('pk').first()
+    if booking is None and create:
+        booking = Booking.objects.create(user_id=user_id)
+    return booking
+
+
+def is_in_cart(request, product_id):
+    return product_id in Cart.for_request(request)
+
+
+# --- Синхронізація з БД
+def _pop_anonymous_items(request):
+    if CART_SESSION_ITEMS_KEY in request.session:
+        return dict(request.session.pop(CART_SESSION_ITEMS_KEY))
+    token = request.session.pop(CART_SESSION_KEY, None)
+    if token is None:
+        return {}
+    cart_cache = get_cart_cache()
+    data = cart_cache.get(_anonymous_cart_key(token))
+    cart_cache.delete(_anonymous_cart_key(token))
+    return data['items'] if data else {}
+
+
+def merge_anonymous_cart(request, user):
+    """
+    При вході: кількості анонімного кошика атомарно додаються до кошика користувача в БД
+    (Booking.add_quantities), кеш кошика користувача потім перечитується з БД.
+    """
+    items = _pop_anonymous_items(request)
+    if not items:
+        return
+    # незаписані зміни кошика користувача (інший пристрій) — спершу в БД, щоб додавати до актуальних кількостей
+    persist_user_cart(user.pk)
+    existing = set(Product.objects.filter(pk__in=list(items)).values_list('pk', flat=True))
+    with transaction.atomic():
+        get_user_booking(user.pk, create=True).add_quantities(
+            {product_id: quantity for product_id, quantity in items.items() if product_id in existing}
+        )
+    if is_write_behind():
+        get_cart_cache().delete(_user_cart_key(user.pk))
+
+
+def persist_user_cart(user_id):
+    """Записує кошик користувача, якщо він змінювався після останнього запису."""
+    if not is_write_behind():
+        return False
+    data = get_cart_cache().get(_user_cart_key(user_id))
+    if data is None or not data['dirty']:
+        return False
+    Cart(_user_cart_key(user_id), user_id, data['items'], dirty=True).persist()
+    return True
+
+
+def flush_dirty_carts():
+    """Записує в БД усі кошики з журналу змінених (команда flush_carts). Повертає кількість записаних."""
+    if not is_write_behind():
+        return 0
+    cart_cache = get_cart_cache()
+    flushed = cart_cache.get(DIRTY_FLUSHED_KEY, 0)
+    seq = cart_cache.get(DIRTY_SEQ_KEY, 0)
+    if seq <= flushed:
+        return 0
+
+    keys = [_dirty_entry_key(n) for n in range(flushed + 1, seq + 1)]
+    count = 0
+    for user_id in dict.fromkeys(cart_cache.get_many(keys).values()):
+        count += persist_user_cart(user_id)
+    cart_cache.set(DIRTY_FLUSHED_KEY, seq, None)
+    cart_cache.delete_many(keys)
+    return count
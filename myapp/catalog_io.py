@@ -0,0 +1,250 @@
+import csv
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+
+from myapp.featured import invalidate_featured_pool
+from myapp.fragments import bump_product_card_version
+from myapp.models import Booking, BookingItem, Category, Product
+
+
+# --- Імпорт / експорт каталогу (команди import_catalog, export_catalog)
+# рядок каталогу: товар з назвою категорії замість id; ключ — артикул постачальника (Product.sku)
+CATALOG_FIELDS = ['sku', 'name', 'category', 'description', 'price', 'is_active', 'image']
+# поля, які імпорт перезаписує в наявних товарах
+# (image_variants — скидаються при зміні зображення, нові створить команда build_image_variants)
+UPDATE_FIELDS = ['name', 'category_id', 'description', 'price', 'is_active', 'image', 'image_variants']
+CATALOG_FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 1000
+# зберігаємо лише перші помилки, щоб пам'ять не росла на "битому" файлі
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = {'1', 'true', 'yes', 'так', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'ні', 'n'}
+
+
+def detect_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+# --- Читання
+def read_rows(file, fmt):
+    """Генератор (номер рядка, dict) — файл читається потоково, без завантаження в пам'ять."""
+    if fmt == 'csv':
+        # номер рядка з урахуванням заголовка
+        for line_no, row in enumerate(csv.DictReader(file), start=2):
+            yield line_no, row
+    else:
+        for line_no, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError:
+                # битий рядок не зупиняє імпорт — parse_row поверне помилку для нього
+                yield line_no, None
+
+
+def parse_row(row):
+    """Перевіряє і нормалізує рядок каталогу; ValueError з описом проблеми."""
+    if not isinstance(row, dict):
+        raise ValueError('рядок не є JSON-об\'єктом')
+    sku = str(row.get('sku') or '').strip()
+    name = str(row.get('name') or '').strip()
+    category = str(row.get('category') or '').strip()
+    if not sku:
+        raise ValueError('немає sku')
+    if len(sku) > Product._meta.get_field('sku').max_length:
+        raise ValueError('задовгий sku')
+    if not name:
+        raise ValueError('немає name')
+    if not category:
+        raise ValueError('немає category')
+
+    try:
+        price = Decimal(str(row.get('price', '')).strip().replace(',', '.'))
+    except ArithmeticError:
+        raise ValueError(f"некоректна ціна {row.get('price')!r}")
+    # NaN та нескінченність (зокрема NaN / Infinity у JSONL) — не ціна; порівняння з NaN кидає InvalidOperation
+    if not price.is_finite():
+        raise ValueError(f"некоректна ціна {row.get('price')!r}")
+    if not 0 <= price < 10 ** 8:
+        # max_digits=10, decimal_places=2
+        raise ValueError(f'ціна поза межами: {price}')
+    price = price.quantize(Decimal('0.01'))
+
+    parsed = {
+        'sku': sku,
+        'name': name[:Product._meta.get_field('name').max_length],
+        'category': category,
+        'price': price,
+    }
+    # необов'язкові поля: відсутні (або порожні is_active / image) не змінюють наявний товар
+    if row.get('description') is not None:
+        parsed['description'] = str(row['description'])
+    is_active = str(row.get('is_active') or '').strip().lower()
+    if is_active:
+        if is_active not in TRUE_VALUES | FALSE_VALUES:
+            raise ValueError(f"некоректне is_active {row.get('is_active')!r}")
+        parsed['is_active'] = is_active in TRUE_VALUES
+    image = str(row.get('image') or '').strip()
+    if image:
+        parsed['image'] = image
+    return parsed
+
+
+# --- Запис пачками
+def _resolve_categories(names, category_ids):
+    """
+    Доповнює кеш category_ids {назва: id}: одна вибірка наявних і один bulk_create нових категорій.
+    Повертає назви створених категорій.
+    """
+    missing = {name for name in names if name not in category_ids}
+    if not missing:
+        return []
+
+    # Category.name не унікальне — при сортуванні за -id останньою запишеться найстаріша категорія з такою назвою
+    category_ids.update(Category.objects.filter(name__in=missing).order_by('-id').values_list('name', 'id'))
+    new_names = sorted(missing - category_ids.keys())
+    if new_names:
+        Category.objects.bulk_create([Category(name=name) for name in new_names])
+        category_ids.update(Category.objects.filter(name__in=new_names).order_by('-id').values_list('name', 'id'))
+    return new_names
+
+
+def _import_chunk(rows, category_ids, stats):
+    stats['categories_created'].update(_resolve_categories({row['category'] for row in rows}, category_ids))
+
+    # у межах пачки останній рядок з тим самим sku перемагає
+    rows_by_sku = {row['sku']: row for row in rows}
+    existing = {product.sku: product for product in Product.objects.filter(sku__in=rows_by_sku)}
+
+    to_create, to_update, price_changed = [], [], []
+    for sku, row in rows_by_sku.items():
+        values = {
+            'name': row['name'],
+            'category_id': category_ids[row['category']],
+            'price': row['price'],
+        }
+        values.update({field: row[field] for field in ('description', 'is_active', 'image') if field in row})
+
+        product = existing.get(sku)
+        if product is None:
+            to_create.append(Product(sku=sku, **values))
+            continue
+
+        changed = False
+        for field, value in values.items():
+            current = product.image.name if field == 'image' else getattr(product, field)
+            if current != value:
+                setattr(product, field, value)
+                changed = True
+                if field == 'image':
+                    # варіанти старого зображення більше не відповідають товару
+                    product.image_variants = {}
+        if not changed:
+            stats['unchanged'] += 1
+            continue
+        if product.price != product._loaded_price:
+            price_changed.append(product.pk)
+        to_update.append(product)
+
+    Product.objects.bulk_create(to_create)
+    Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+    stats['created'] += len(to_create)
+    stats['updated'] += len(to_update)
+
+    # bulk-операції не надсилають сигналів — скидаємо кеші, як це зробили б signals.py (після commit,
+    # тож dry-run і відкочена пачка кеш не чіпають)
+    updated_ids = [product.pk for product in to_update]
+    booking_ids = []
+    if price_changed:
+        booking_ids = list(BookingItem.objects.filter(product_id__in=price_changed).values_list('booking_id', flat=True).distinct())
+
+    def invalidate_caches():
+        for product_id in updated_ids:
+            bump_product_card_version(product_id)
+        Booking.invalidate_totals(*booking_ids)
+
+    transaction.on_commit(invalidate_caches)
+
+
+def import_catalog(rows, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Імпортує рядки (номер рядка, dict) пачками по chunk_size: для кожної пачки — одна вибірка
+    наявних товарів за sku, bulk_create нових і bulk_update змінених. Кожна пачка — окрема транзакція.
+    dry_run — все виконується, але транзакція пачки відкочується.
+    progress(stats) викликається після кожної пачки. Повертає stats.
+    """
+    stats = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'categories_created': set(), 'error_count': 0, 'errors': []}
+    category_ids = {}
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            break
+
+        chunk = []
+        for line_no, row in batch:
+            stats['rows'] += 1
+            try:
+                chunk.append(parse_row(row))
+            except (ValueError, ArithmeticError) as error:
+                stats['error_count'] += 1
+                if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                    stats['errors'].append((line_no, str(error)))
+
+        if chunk:
+            with transaction.atomic():
+                _import_chunk(chunk, category_ids, stats)
+                if dry_run:
+                    transaction.set_rollback(True)
+            if dry_run:
+                # відкочені категорії не можна використовувати в наступних пачках
+                category_ids.clear()
+        if progress:
+            progress(stats)
+
+    stats['categories_created'] = len(stats['categories_created'])
+    # повнотекстовий індекс оновлюють тригери БД (search.py), тож bulk_create / bulk_update його не минають
+    if not dry_run and (stats['created'] or stats['updated']):
+        invalidate_featured_pool()
+    return stats
+
+
+# --- Експорт
+def iter_catalog(chunk_size=DEFAULT_CHUNK_SIZE, queryset=None):
+    """Рядки каталогу для експорту; iterator() читає таблицю пачками (на PostgreSQL — серверним курсором)."""
+    queryset = Product.objects.all() if queryset is None else queryset
+    values = queryset.order_by('id').values_list(
+        'sku', 'name', 'category__name', 'description', 'price', 'is_active', 'image',
+    )
+    for sku, name, category, description, price, is_active, image in values.iterator(chunk_size=chunk_size):
+        yield {
+            'sku': sku or '',
+            'name': name,
+            'category': category,
+            'description': description,
+            'price': str(price),
+            'is_active': int(is_active),
+            'image': image or '',
+        }
+
+
+def export_catalog(file, fmt, chunk_size=DEFAULT_CHUNK_SIZE, queryset=None):
+    """Пише каталог у file у форматі csv/jsonl. Повертає кількість рядків."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, fieldnames=CATALOG_FIELDS)
+        writer.writeheader()
+        for row in iter_catalog(chunk_size, queryset):
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in iter_catalog(chunk_size, queryset):
+            file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
@@ -0,0 +1,11 @@
+from myapp.roles import ROLE_CLIENT, ROLE_MANAGER, get_user_roles
+
+
+# --- is_manager / is_client / user_roles у всіх шаблонах замість циклів по user.groups.all
+def user_roles(request):
+    roles = get_user_roles(request.user)
+    return {
+        'user_roles': roles,
+        'is_manager': ROLE_MANAGER in roles,
+        'is_client': ROLE_CLIENT in roles,
+    }
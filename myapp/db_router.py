@@ -0,0 +1,168 @@
+import random
+import re
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from myapp.instrumentation import wrap_connections
+
+
+# --- Маршрутизація читання на репліки (settings.DATABASE_ROUTERS)
+# запис — завжди в основну БД (default); читання — з реплік, але лише в межах HTTP-запиту, який
+# ReplicaRoutingMiddleware дозволив читати з реплік: GET/HEAD без "липкості" після запису.
+# Команди, фоновий воркер і POST-запити читають з основної БД.
+PRIMARY_ONLY_APPS = {
+    # сесії та облікові записи: вихід чи зміна пароля мають діяти одразу, а не після синхронізації репліки
+    'sessions',
+    'auth',
+}
+DEFAULT_STICKY_SECONDS = 10
+# запити, що нічого не змінюють: читання і керування транзакцією (atomic() у get_or_create теж шле SAVEPOINT)
+READ_ONLY_SQL_RE = re.compile(r'\s*(SELECT|SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT|PRAGMA|EXPLAIN)\b', re.IGNORECASE)
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+def get_replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+class RoutingState:
+    """
+    Стан маршрутизації одного HTTP-запиту (contextvar — окремий для кожного потоку і async-задачі).
+    Водночас execute_wrapper основної БД: запит вважається записом лише після SQL, що справді щось змінює,
+    а не після db_for_write — його викликають і get_or_create/update_or_create, які нічого не записали.
+    """
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+        self.replica = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not READ_ONLY_SQL_RE.match(sql):
+            # після запису решта запиту теж читає з основної БД, а відповідь ставить cookie "липкості"
+            self.wrote = True
+            self.use_replicas = False
+        return execute(sql, params, many, context)
+
+
+class PrimaryReplicaRouter:
+    def __init__(self, replicas=None):
+        self._replicas = replicas
+
+    @property
+    def replicas(self):
+        return get_replica_aliases() if self._replicas is None else self._replicas
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if not self.replicas or state is None or not state.use_replicas or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # одна репліка на весь запит — сторінка не змішує дані з реплік з різним відставанням
+        if state.replica is None:
+            state.replica = random.choice(self.replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # репліки — копії основної БД, зв'язки між об'єктами з різних псевдонімів коректні
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема реплік з'являється разом з копією основної БД (команда sync_replicas)
+        return db == DEFAULT_DB_ALIAS
+
+
+# --- Middleware: read-your-writes
+STICKY_COOKIE_NAME = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Дозволяє читання з реплік для безпечних запитів. Після будь-якого запису (кошик, оформлення,
+    відгук, збереження сесії) браузер отримує cookie, і на DATABASE_REPLICA_STICKY_SECONDS всі його
+    запити читають з основної БД — користувач не бачить застарілих даних поки репліка відстає.
+    Має стояти перед SessionMiddleware, щоб бачити і запис сесії у відповіді.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self._start(request)
+        token = _routing_state.set(state)
+        try:
+            with wrap_connections(state, DEFAULT_DB_ALIAS):
+                response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        # sync_to_async (async ORM) переносить contextvars у потік, тож стан бачить і маршрутизатор
+        # з'єднання прив'язані до потоку, тож обгортку ставимо і знімаємо в потоці sync-коду запиту
+        state = self._start(request)
+        token = _routing_state.set(state)
+        try:
+            stack = await sync_to_async(wrap_connections)(state, DEFAULT_DB_ALIAS)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _routing_state.reset(token)
+        return self._finish(state, response)
+
+    def _start(self, request):
+        return RoutingState(use_replicas=request.method in SAFE_METHODS and not self._is_sticky(request))
+
+    @staticmethod
+    def _finish(state, response):
+        if state.wrote:
+            sticky_seconds = get_sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE_NAME, str(int(time.time() + sticky_seconds)),
+                max_age=sticky_seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def _is_sticky(request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE_NAME, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+# --- Локальні репліки-копії (команда sync_replicas)
+def sync_replica(alias):
+    """
+    Копіює основну БД у файл репліки через backup API SQLite: знімок узгоджений навіть під час
+    запису в основну БД, а читачі репліки просто чекають (busy_timeout) завершення копіювання.
+    """
+    source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+    target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,103 @@
+from django.db.models import Count, Q
+
+
+# --- Фасети для результатів пошуку
+# усі лічильники рахуються в БД по відфільтрованому queryset, товари в Python не завантажуються
+
+# (ключ, нижня межа включно, верхня межа не включно, підпис)
+PRICE_BUCKETS = [
+    ('0-1000', None, 1000, 'до 1 000 грн'),
+    ('1000-5000', 1000, 5000, '1 000 – 5 000 грн'),
+    ('5000-10000', 5000, 10000, '5 000 – 10 000 грн'),
+    ('10000-20000', 10000, 20000, '10 000 – 20 000 грн'),
+    ('20000-', 20000, None, 'від 20 000 грн'),
+]
+
+# мінімальна середня оцінка товару
+RATING_BUCKETS = [4, 3, 2, 1]
+
+
+def price_bucket_filter(key):
+    for bucket_key, low, high, _ in PRICE_BUCKETS:
+        if bucket_key == key:
+            condition = Q()
+            if low is not None:
+                condition &= Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            return condition
+    return None
+
+
+def rating_bucket_filter(value):
+    try:
+        min_rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    if min_rating not in RATING_BUCKETS:
+        return None
+    return Q(average_rating__gte=min_rating)
+
+
+def _category_facet_rows(queryset):
+    return (
+        queryset.order_by()
+        .values('category_id', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('category__name')
+    )
+
+
+def _category_facets_from_rows(rows):
+    return [
+        {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def category_facets(queryset):
+    """Один GROUP BY: [{'id', 'name', 'count'}] за назвою категорії."""
+    return _category_facets_from_rows(_category_facet_rows(queryset))
+
+
+async def acategory_facets(queryset):
+    return _category_facets_from_rows([row async for row in _category_facet_rows(queryset)])
+
+
+def _price_and_rating_aggregates(price_filter=None, rating_filter=None):
+    # лічильник діапазону ціни враховує вибрану оцінку, і навпаки — але не власний вибраний діапазон
+    aggregates = {
+        f'price_{index}': Count('id', filter=price_bucket_filter(key) & (rating_filter or Q()))
+        for index, (key, _, _, _) in enumerate(PRICE_BUCKETS)
+    }
+    aggregates.update({
+        f'rating_{stars}': Count('id', filter=rating_bucket_filter(stars) & (price_filter or Q()))
+        for stars in RATING_BUCKETS
+    })
+    return aggregates
+
+
+def _price_and_rating_facets_from_counts(counts):
+    price_facets = [
+        {'key': key, 'label': label, 'count': counts[f'price_{index}']}
+        for index, (key, _, _, label) in enumerate(PRICE_BUCKETS)
+    ]
+    rating_facets = [
+        {'key': stars, 'label': f'{stars} ⭐ і вище', 'count': counts[f'rating_{stars}']}
+        for stars in RATING_BUCKETS
+    ]
+    return price_facets, rating_facets
+
+
+def price_and_rating_facets(queryset, price_filter=None, rating_filter=None):
+    """
+    Один агрегатний запит з умовними COUNT для цінових і рейтингових діапазонів.
+    queryset — без фільтрів ціни та оцінки; вибрані фільтри передаються окремо (price_bucket_filter / rating_bucket_filter).
+    """
+    counts = queryset.order_by().aggregate(**_price_and_rating_aggregates(price_filter, rating_filter))
+    return _price_and_rating_facets_from_counts(counts)
+
+
+async def aprice_and_rating_facets(queryset, price_filter=None, rating_filter=None):
+    counts = await queryset.order_by().aaggregate(**_price_and_rating_aggregates(price_filter, rating_filter))
+    return _price_and_rating_facets_from_counts(counts)
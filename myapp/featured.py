@@ -0,0 +1,68 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from myapp.models import Product
+
+
+# --- Рекомендовані товари для головної сторінки
+# замість ORDER BY RANDOM() по всій таблиці тримаємо в кеші пул випадкових активних товарів
+# і на кожен запит беремо з нього випадкову вибірку (0 запитів до БД, поки пул живий)
+FEATURED_POOL_CACHE_KEY = 'featured_products_pool'
+FEATURED_POOL_SIZE = 60
+FEATURED_POOL_TIMEOUT = 60 * 5
+FEATURED_COUNT = 10
+SAMPLE_ATTEMPTS = 5
+
+
+def build_featured_pool(pool_size=FEATURED_POOL_SIZE):
+    """Вибирає випадкові активні товари через випадкові id у діапазоні [min_id, max_id] без сортування таблиці."""
+    bounds = Product.objects.filter(is_active=True).aggregate(low=Min('id'), high=Max('id'))
+    low, high = bounds['low'], bounds['high']
+    if low is None:
+        return []
+
+    pool = {}
+    span = range(low, high + 1)
+    for _ in range(SAMPLE_ATTEMPTS):
+        missing = pool_size - len(pool)
+        if missing <= 0:
+            break
+        # беремо з запасом, бо частина id може бути видалена або неактивна
+        candidates = random.sample(span, min(len(span), missing * 2))
+        for product in Product.objects.filter(id__in=candidates, is_active=True):
+            pool[product.pk] = product
+
+    # розріджені id: добираємо послідовним діапазоном від випадкової точки (індексний range scan)
+    missing = pool_size - len(pool)
+    if missing > 0:
+        start = random.choice(span)
+        for queryset in (
+            Product.objects.filter(is_active=True, id__gte=start).order_by('id'),
+            Product.objects.filter(is_active=True, id__lt=start).order_by('id'),
+        ):
+            for product in queryset.exclude(id__in=list(pool))[:missing]:
+                pool[product.pk] = product
+            missing = pool_size - len(pool)
+            if missing <= 0:
+                break
+
+    return list(pool.values())[:pool_size]
+
+
+def refresh_featured_pool():
+    pool = build_featured_pool()
+    cache.set(FEATURED_POOL_CACHE_KEY, pool, FEATURED_POOL_TIMEOUT)
+    return pool
+
+
+def invalidate_featured_pool():
+    cache.delete(FEATURED_POOL_CACHE_KEY)
+
+
+def get_featured_products(count=FEATURED_COUNT):
+    pool = cache.get(FEATURED_POOL_CACHE_KEY)
+    if pool is None:
+        pool = refresh_featured_pool()
+    return random.sample(pool, min(count, len(pool)))
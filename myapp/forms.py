@@ -1,5 +1,5 @@
 from django import forms
-from myapp.models import Category, Product, Comment, UserProfile
+from myapp.models import Category, Product, Comment, UserProfile, Order
 from django.forms import ModelForm
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
@@ -20,8 +20,9 @@ class CategoryForm(forms.ModelForm):
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
-        fields = ['name', 'category', 'description', 'price', 'image']
+        fields = ['sku', 'name', 'category', 'description', 'price', 'image']
         labels = {
+                    'sku': 'Артикул (SKU)',
                     'name': 'Назва товару',
                     'category': 'Категорія',
                     'description': 'Опис',
@@ -31,6 +32,23 @@ class ProductForm(forms.ModelForm):
 
 
 
+# --- Фільтри експорту замовлень (OrderExportView)
+class OrderExportForm(forms.Form):
+    date_from = forms.DateField(label='Дата з', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(label='Дата по', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    delivery_method = forms.ChoiceField(label='Спосіб доставки', required=False, choices=[('', 'Усі')] + Order.DELIVERY_CHOICES)
+    payment_method = forms.ChoiceField(label='Спосіб оплати', required=False, choices=[('', 'Усі')] + Order.PAYMENT_CHOICES)
+    format = forms.ChoiceField(label='Формат', choices=[('csv', 'CSV (Excel)'), ('jsonl', 'JSON Lines')], initial='csv')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError('Дата початку не може бути пізніше дати завершення')
+        return cleaned_data
+
+
+
 # --- RegistrationForm
 class MyUserRegistrationForm(UserCreationForm):
     username = forms.CharField(
@@ -0,0 +1,111 @@
+import uuid
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+# --- Кеш відрендерених карток товарів
+# ключ фрагмента містить версію товару та версію його категорії; сигнали (signals.py) лише
+# змінюють версію, тож застарілі фрагменти більше не читаються і просто витісняються з кешу
+CARD_VARIANTS = {
+    'home': ('myapp/product/product_card.html', {'name_slice': ':40', 'name_length': 40}),
+    'catalog': ('myapp/product/product_card.html', {'name_slice': ':30', 'name_length': 30}),
+    'favorite': ('myapp/product/product_favorite_card.html', {}),
+}
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+CARD_HITS_KEY = 'product_card_hits'
+CARD_MISSES_KEY = 'product_card_misses'
+
+
+def _product_version_key(product_id):
+    return f'product_card_version:product:{product_id}'
+
+
+def _category_version_key(category_id):
+    return f'product_card_version:category:{category_id}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def bump_product_card_version(product_id):
+    cache.set(_product_version_key(product_id), _new_version(), None)
+
+
+def bump_category_card_version(category_id):
+    cache.set(_category_version_key(category_id), _new_version(), None)
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    # версію, якої немає (новий товар або витіснена з кешу), створюємо заново, а не беремо за замовчуванням,
+    # щоб випадково не прочитати старий фрагмент
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def _incr(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def render_product_cards(products, variant='catalog'):
+    """Повертає [(product, html)]: готові фрагменти з кешу, відсутні рендеряться і кешуються."""
+    products = list(products)
+    if not products:
+        return []
+
+    template_name, extra_context = CARD_VARIANTS[variant]
+    version_keys = set()
+    for product in products:
+        version_keys.add(_product_version_key(product.pk))
+        version_keys.add(_category_version_key(product.category_id))
+    versions = _get_versions(list(version_keys))
+
+    fragment_keys = [
+        'product_card:{}:{}:{}:{}'.format(
+            variant,
+            product.pk,
+            versions[_product_version_key(product.pk)],
+            versions[_category_version_key(product.category_id)],
+        )
+        for product in products
+    ]
+    fragments = cache.get_many(fragment_keys)
+
+    rendered = {}
+    cards = []
+    for product, key in zip(products, fragment_keys):
+        html = fragments.get(key)
+        if html is None:
+            html = render_to_string(template_name, {'product': product, **extra_context})
+            rendered[key] = html
+        cards.append((product, mark_safe(html)))
+
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+    _incr(CARD_HITS_KEY, len(products) - len(rendered))
+    _incr(CARD_MISSES_KEY, len(rendered))
+    return cards
+
+
+def get_card_cache_stats():
+    counters = cache.get_many([CARD_HITS_KEY, CARD_MISSES_KEY])
+    hits = counters.get(CARD_HITS_KEY, 0)
+    misses = counters.get(CARD_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else 0.0,
+    }
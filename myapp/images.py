@@ -0,0 +1,89 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# --- Зменшені варіанти зображень товару
+# (назва варіанта, максимальна ширина в px); зберігаються у WebP поруч з оригіналом у variants/
+IMAGE_VARIANTS = [
+    ('thumb', 160),
+    ('card', 400),
+    ('detail', 900),
+]
+VARIANT_FORMAT = 'WEBP'
+VARIANT_EXTENSION = 'webp'
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'variants'
+
+
+def variant_path(image_name, variant):
+    directory, filename = os.path.split(image_name)
+    # розширення оригіналу входить у назву, щоб Picture1.jpg і Picture1.png не перетиралися
+    stem = filename.replace('.', '_')
+    return os.path.join(directory, VARIANTS_DIR, f'{stem}_{variant}.{VARIANT_EXTENSION}')
+
+
+def generate_variants(image_name, storage=default_storage):
+    """
+    Створює всі варіанти для файлу image_name у сховищі й повертає
+    {variant: {'name': шлях, 'width': ширина}} для Product.image_variants.
+    Функція не залежить від моделей, тому її можна виконувати в окремому процесі.
+    """
+    with storage.open(image_name, 'rb') as source:
+        original = Image.open(source)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    variants = {}
+    for variant, max_width in IMAGE_VARIANTS:
+        image = original.copy()
+        # thumbnail() лише зменшує, тож малі оригінали не розтягуються
+        image.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+
+        buffer = BytesIO()
+        image.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=6)
+
+        name = variant_path(image_name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+        variants[variant] = {'name': name, 'width': image.width}
+
+    return variants
+
+
+def delete_variants(variants, storage=default_storage):
+    for data in variants.values():
+        storage.delete(data['name'])
+
+
+def update_product_variants(product, old_image_name=''):
+    """
+    Генерує варіанти для product.image і зберігає їх у product.image_variants.
+    Варіанти попереднього зображення old_image_name видаляються, якщо воно більше ні в кого не лишилось.
+    """
+    old_variants = product.image_variants or {}
+    if not product.image:
+        product.image_variants = {}
+    else:
+        try:
+            product.image_variants = generate_variants(product.image.name)
+        except OSError as error:
+            # файлу немає у сховищі (або він не зображення) — показуємо оригінал, як до генерації варіантів
+            logger.warning('Product %s: cannot build image variants for %s: %s', product.pk, product.image.name, error)
+            product.image_variants = {}
+    product.save(update_fields=['image_variants'])
+
+    if old_image_name and old_image_name != product.image.name:
+        # одне зображення може бути в кількох товарів (імпорт, копіювання) — тоді варіанти ще потрібні
+        if not type(product)._default_manager.filter(image=old_image_name).exists():
+            delete_variants(old_variants)
@@ -0,0 +1,241 @@
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# --- Підрахунок SQL-запитів
+class QueryCounter:
+    """
+    Контекстний менеджер, що рахує запити до БД через execute_wrapper
+    (працює і з DEBUG=False, на відміну від connection.queries).
+    using=None — усі псевдоніми БД разом з репліками (див. db_router.py).
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.count = 0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = wrap_connections(self, self.using)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._stack.__exit__(exc_type, exc_value, traceback)
+
+
+def wrap_connections(wrapper, using=None):
+    """Вмикає execute_wrapper на одному або всіх з'єднаннях; повертає ExitStack, що його знімає."""
+    stack = ExitStack()
+    for connection in ([connections[using]] if using else connections.all(initialized_only=False)):
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+# --- Інструментування запитів та пошук N+1
+# QueryInstrumentationMiddleware рахує для кожного HTTP-запиту кількість SQL-запитів, їхній сумарний час
+# і повтори однакових "форм" запиту (SQL без значень). Форма, що повторилась >= N_PLUS_ONE_THRESHOLD разів,
+# вважається ознакою N+1. Підсумки по імені URL показуються на сторінці query_report.
+# Кожен процес накопичує підсумки у себе (під замком) і публікує знімок під власним ключем кешу:
+# у ключ пише лише один процес, тож паралельні запити не перетирають лічильники один одного
+# (read-modify-write спільного ключа губив оновлення). Звіт складає знімки всіх процесів.
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+WHITESPACE_RE = re.compile(r'\s+')
+
+REPORT_INDEX_KEY = 'query_report:index'
+REPORT_GENERATION_KEY = 'query_report:generation'
+REPORT_TIMEOUT = 60 * 60 * 24
+MAX_SUSPECTS_PER_ROUTE = 5
+
+PROCESS_REPORT_KEY = f'query_report:process:{socket.gethostname()}:{os.getpid()}'
+_process_stats = {}
+_process_generation = None
+_process_lock = threading.Lock()
+
+
+def get_instrumentation_settings():
+    defaults = {
+        'ENABLED': settings.DEBUG,
+        'SAMPLE_RATE': 1.0,
+        'N_PLUS_ONE_THRESHOLD': 5,
+        'RESPONSE_HEADERS': settings.DEBUG,
+    }
+    return {**defaults, **getattr(settings, 'QUERY_INSTRUMENTATION', {})}
+
+
+def is_sampled(options):
+    """Чи інструментувати цей HTTP-запит: вимкнено — ні, інакше з імовірністю SAMPLE_RATE."""
+    if not options['ENABLED']:
+        return False
+    return options['SAMPLE_RATE'] >= 1 or random.random() < options['SAMPLE_RATE']
+
+
+def normalize_sql(sql):
+    """Форма запиту: значення та списки IN (...) замінено, щоб однакові запити з різними id збігалися."""
+    shape = STRING_RE.sub('?', sql)
+    shape = IN_LIST_RE.sub('IN (...)', shape)
+    shape = NUMBER_RE.sub('?', shape)
+    return WHITESPACE_RE.sub(' ', shape).strip()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[normalize_sql(sql)] += 1
+
+    def suspects(self, threshold):
+        return [(shape, repeats) for shape, repeats in self.shapes.most_common() if repeats >= threshold]
+
+
+def _empty_stats(route):
+    return {
+        'route': route, 'requests': 0, 'queries': 0, 'max_queries': 0,
+        'time_ms': 0.0, 'n_plus_one_requests': 0, 'suspects': {},
+    }
+
+
+def _merge_suspects(target, suspects):
+    for shape, repeats in suspects:
+        target[shape] = max(target.get(shape, 0), repeats)
+    return dict(sorted(target.items(), key=lambda item: -item[1])[:MAX_SUSPECTS_PER_ROUTE])
+
+
+def record_route_stats(route, recorder, suspects):
+    global _process_generation
+    shared = cache.get_many([REPORT_GENERATION_KEY, REPORT_INDEX_KEY])
+    generation = shared.get(REPORT_GENERATION_KEY)
+    with _process_lock:
+        # звіт скинуто (reset_query_report) — починаємо підсумки процесу з нуля
+        if generation != _process_generation:
+            _process_stats.clear()
+            _process_generation = generation
+        stats = _process_stats.setdefault(route, _empty_stats(route))
+        stats['requests'] += 1
+        stats['queries'] += recorder.count
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        stats['time_ms'] += recorder.duration * 1000
+        if suspects:
+            stats['n_plus_one_requests'] += 1
+            stats['suspects'] = _merge_suspects(stats['suspects'], suspects)
+        snapshot = {route: {**stats, 'suspects': dict(stats['suspects'])} for route, stats in _process_stats.items()}
+    cache.set(PROCESS_REPORT_KEY, snapshot, REPORT_TIMEOUT)
+
+    # індекс процесів змінюється лише при першому записі процесу; якщо його перетерли — допишемо наступного разу
+    processes = shared.get(REPORT_INDEX_KEY) or []
+    if PROCESS_REPORT_KEY not in processes:
+        cache.set(REPORT_INDEX_KEY, processes + [PROCESS_REPORT_KEY], REPORT_TIMEOUT)
+
+
+def get_query_report():
+    processes = cache.get(REPORT_INDEX_KEY) or []
+    merged = {}
+    for snapshot in cache.get_many(processes).values():
+        for route, stats in snapshot.items():
+            total = merged.setdefault(route, _empty_stats(route))
+            for field in ('requests', 'queries', 'time_ms', 'n_plus_one_requests'):
+                total[field] += stats[field]
+            total['max_queries'] = max(total['max_queries'], stats['max_queries'])
+            total['suspects'] = _merge_suspects(total['suspects'], stats['suspects'].items())
+
+    rows = []
+    for stats in merged.values():
+        requests = stats['requests'] or 1
+        rows.append({
+            **stats,
+            'avg_queries': round(stats['queries'] / requests, 1),
+            'avg_time_ms': round(stats['time_ms'] / requests, 2),
+            'suspects': sorted(stats['suspects'].items(), key=lambda item: -item[1]),
+        })
+    return sorted(rows, key=lambda row: (-row['n_plus_one_requests'], -row['avg_queries']))
+
+
+def reset_query_report():
+    # нове покоління змушує кожен процес забути свої підсумки при наступному записі
+    processes = cache.get(REPORT_INDEX_KEY) or []
+    cache.delete_many(processes + [REPORT_INDEX_KEY])
+    cache.set(REPORT_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        options = get_instrumentation_settings()
+        if not is_sampled(options):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with wrap_connections(recorder):
+            response = self.get_response(request)
+        return self._report(request, response, recorder, options)
+
+    async def __acall__(self, request):
+        options = get_instrumentation_settings()
+        if not is_sampled(options):
+            return await self.get_response(request)
+
+        # з'єднання з БД прив'язані до потоку: під ASGI весь sync-код запиту (і async ORM) виконується
+        # в одному потоці запиту, тому обгортку ставимо і знімаємо саме там
+        recorder = QueryRecorder()
+        stack = await sync_to_async(wrap_connections)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return await sync_to_async(self._report)(request, response, recorder, options)
+
+    @staticmethod
+    def _report(request, response, recorder, options):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unresolved'
+        suspects = recorder.suspects(options['N_PLUS_ONE_THRESHOLD'])
+        if suspects:
+            logger.warning('Possible N+1 in %s: %s', route, '; '.join(f'{repeats}× {shape[:200]}' for shape, repeats in suspects))
+        record_route_stats(route, recorder, suspects)
+
+        # заголовки розкривають внутрішню роботу сервера: за замовчуванням лише при DEBUG, персоналу — завжди
+        user = getattr(request, 'user', None)
+        if options['RESPONSE_HEADERS'] or (user is not None and user.is_staff):
+            response['X-Query-Count'] = recorder.count
+            response['X-Query-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+            response['X-Query-Repeated-Shapes'] = len(suspects)
+        return response
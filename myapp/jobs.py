@@ -0,0 +1,113 @@
+import logging
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from myapp.models import BackgroundJob, Order, OrderNotification
+from myapp.notifications import invalidate_unread_notifications_count
+
+
+logger = logging.getLogger(__name__)
+
+# затримка перед повтором: RETRY_BASE_DELAY * 2 ** (спроба - 1)
+RETRY_BASE_DELAY = timedelta(seconds=10)
+# задача у статусі "running" довше цього вважається покинутою (воркер впав) і повертається в чергу
+STALE_RUNNING_AFTER = timedelta(minutes=10)
+
+
+# --- Постановка задач
+def enqueue(kind, payload, dedup_key=None):
+    """Одним INSERT ставить задачу в чергу; повторна постановка з тим самим dedup_key ігнорується."""
+    BackgroundJob.objects.bulk_create(
+        [BackgroundJob(kind=kind, payload=payload, dedup_key=dedup_key)],
+        ignore_conflicts=True,
+    )
+
+
+# --- Обробники
+def notify_managers_about_order(order_id):
+    order = Order.objects.filter(pk=order_id).only('id', 'date').first()
+    if order is None:
+        return
+
+    formatted_date = localtime(order.date).strftime('%d.%m.%Y, %H:%M')
+    message = f"Нове замовлення № {order.id} від {formatted_date}"
+    manager_ids = list(User.objects.filter(groups__name='Manager').values_list('id', flat=True))
+
+    # один INSERT на всіх менеджерів; unique (user, order) робить повтор безпечним
+    OrderNotification.objects.bulk_create(
+        [OrderNotification(user_id=manager_id, order_id=order.id, message=message) for manager_id in manager_ids],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: invalidate_unread_notifications_count(*manager_ids))
+
+
+JOB_HANDLERS = {
+    'notify_managers': lambda payload: notify_managers_about_order(payload['order_id']),
+}
+
+
+# --- Виконання (див. команду run_worker)
+def claim_jobs(batch_size):
+    """Атомарно забирає пачку готових задач: UPDATE ... WHERE status='pending' захищає від інших воркерів."""
+    now = timezone.now()
+    BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_RUNNING, updated_at__lt=now - STALE_RUNNING_AFTER,
+    ).update(status=BackgroundJob.STATUS_PENDING, updated_at=now)
+
+    candidate_ids = list(
+        BackgroundJob.objects.filter(status=BackgroundJob.STATUS_PENDING, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return []
+
+    claimed = []
+    for job_id in candidate_ids:
+        updated = BackgroundJob.objects.filter(pk=job_id, status=BackgroundJob.STATUS_PENDING).update(
+            status=BackgroundJob.STATUS_RUNNING, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if updated:
+            claimed.append(job_id)
+    return list(BackgroundJob.objects.filter(pk__in=claimed).order_by('run_after', 'id'))
+
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'Невідомий тип задачі: {job.kind}')
+        with transaction.atomic():
+            handler(job.payload)
+    except Exception as error:
+        job.last_error = f'{type(error).__name__}: {error}'
+        if job.attempts >= job.max_attempts:
+            job.status = BackgroundJob.STATUS_FAILED
+            logger.error('Job %s (%s) failed permanently: %s', job.pk, job.kind, job.last_error)
+        else:
+            job.status = BackgroundJob.STATUS_PENDING
+            job.run_after = timezone.now() + RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            logger.warning('Job %s (%s) failed, retry #%s at %s', job.pk, job.kind, job.attempts, job.run_after)
+        job.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+        return False
+
+    job.status = BackgroundJob.STATUS_DONE
+    job.last_error = ''
+    job.save(update_fields=['status', 'last_error', 'updated_at'])
+    return True
+
+
+def run_pending_jobs(batch_size=50):
+    """Виконує одну пачку задач. Повертає (успішні, невдалі)."""
+    succeeded = failed = 0
+    for job in claim_jobs(batch_size):
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.fragments import bump_product_card_version
+from myapp.images import generate_variants
+from myapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Генерує зменшені варіанти (thumb, card, detail) для наявних зображень товарів у пулі процесів'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Кількість процесів (за замовчуванням — кількість CPU)')
+        parser.add_argument('--all', action='store_true', help='Перегенерувати і ті товари, що вже мають варіанти')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').only('id', 'image', 'image_variants')
+        if not options['all']:
+            products = products.filter(image_variants={})
+
+        # одне зображення (напр. no-image.jpg) може використовуватись кількома товарами — обробляємо його раз
+        product_ids_by_image = {}
+        for product_id, image_name in products.values_list('id', 'image'):
+            product_ids_by_image.setdefault(image_name, []).append(product_id)
+
+        if not product_ids_by_image:
+            self.stdout.write('Немає зображень для обробки')
+            return
+
+        variants_by_image = {}
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(generate_variants, image_name): image_name for image_name in product_ids_by_image}
+            for done, future in enumerate(as_completed(futures), start=1):
+                image_name = futures[future]
+                try:
+                    variants_by_image[image_name] = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{image_name}: {error}')
+                if done % 100 == 0:
+                    self.stdout.write(f'Оброблено зображень: {done}/{len(futures)}')
+
+        updated = []
+        for image_name, variants in variants_by_image.items():
+            for product_id in product_ids_by_image[image_name]:
+                updated.append(Product(pk=product_id, image_variants=variants))
+
+        with transaction.atomic():
+            Product.objects.bulk_update(updated, ['image_variants'], batch_size=500)
+        # bulk_update не надсилає сигналів, тому кешовані картки скидаємо вручну
+        for product in updated:
+            bump_product_card_version(product.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Варіанти створено для {len(variants_by_image)} зображень ({len(updated)} товарів), помилок: {failed}'
+        ))
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from myapp.catalog_io import CATALOG_FORMATS, DEFAULT_CHUNK_SIZE, detect_format, export_catalog
+from myapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Експортує каталог товарів у CSV/JSONL у форматі import_catalog, читаючи таблицю пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл для запису або '-' для stdout")
+        parser.add_argument('--format', choices=CATALOG_FORMATS, help='За замовчуванням — за розширенням файлу')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--active-only', action='store_true', help='Лише активні товари')
+        parser.add_argument('--with-sku-only', action='store_true', help='Лише товари з артикулом')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else detect_format(path))
+
+        queryset = Product.objects.all()
+        if options['active_only']:
+            queryset = queryset.filter(is_active=True)
+        if options['with_sku_only']:
+            queryset = queryset.filter(sku__isnull=False)
+
+        if path == '-':
+            count = export_catalog(sys.stdout, fmt, options['chunk_size'], queryset)
+            self.stderr.write(f'Експортовано товарів: {count}')
+            return
+
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            count = export_catalog(file, fmt, options['chunk_size'], queryset)
+        self.stdout.write(self.style.SUCCESS(f'Експортовано товарів: {count} → {path}'))
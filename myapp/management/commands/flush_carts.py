@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.cart import flush_dirty_carts, is_write_behind
+
+
+class Command(BaseCommand):
+    help = (
+        'Записує в Booking/BookingItem кошики, змінені в кеші після останнього запису (write-behind); '
+        'з --interval працює постійно. Потребує CART_WRITE_BEHIND (CACHE_BACKEND file або redis)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Повторювати запис кожні N секунд')
+
+    def handle(self, *args, **options):
+        if not is_write_behind():
+            self.stdout.write('CART_WRITE_BEHIND вимкнено: кошики записуються в БД одразу, записувати нічого')
+            return
+        while True:
+            flushed = flush_dirty_carts()
+            if flushed or not options['interval']:
+                self.stdout.write(f'Записано кошиків: {flushed}')
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
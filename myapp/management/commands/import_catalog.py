@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.catalog_io import CATALOG_FORMATS, DEFAULT_CHUNK_SIZE, detect_format, import_catalog, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Імпортує каталог товарів з CSV/JSONL (поля: sku, name, category, description, price, is_active, image). '
+        'Товари шукаються за sku: нові створюються, наявні оновлюються; категорії створюються за назвою'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл каталогу або '-' для stdin")
+        parser.add_argument('--format', choices=CATALOG_FORMATS, help='За замовчуванням — за розширенням файлу')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Перевірити файл і порахувати зміни без запису')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+
+        def progress(stats):
+            self.stdout.write(
+                f"Рядків: {stats['rows']}, створено: {stats['created']}, оновлено: {stats['updated']}, "
+                f"без змін: {stats['unchanged']}, помилок: {stats['error_count']}"
+            )
+
+        try:
+            file = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as error:
+            raise CommandError(f'Не вдалося відкрити {path}: {error}')
+        with file:
+            stats = import_catalog(read_rows(file, fmt), options['chunk_size'], options['dry_run'], progress)
+
+        for line_no, message in stats['errors']:
+            self.stderr.write(f'Рядок {line_no}: {message}')
+        if stats['error_count'] > len(stats['errors']):
+            self.stderr.write(f"... і ще {stats['error_count'] - len(stats['errors'])} помилок")
+
+        summary = (
+            f"Імпорт завершено{' (dry-run, нічого не збережено)' if options['dry_run'] else ''}: "
+            f"створено {stats['created']}, оновлено {stats['updated']}, без змін {stats['unchanged']}, "
+            f"нових категорій {stats['categories_created']}, помилок {stats['error_count']}"
+        )
+        self.stdout.write(self.style.WARNING(summary) if stats['error_count'] else self.style.SUCCESS(summary))
@@ -0,0 +1,44 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from myapp.models import Product, Comment, RATING_STATS_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Перераховує збережену статистику відгуків (середня оцінка, кількість, гістограма) для всіх товарів'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # один згрупований прохід по Comment: (product_id, rating, count), впорядковано за товаром
+        rows = (
+            Comment.objects.values_list('product_id', 'rating')
+            .annotate(total=Count('id'))
+            .order_by('product_id', 'rating')
+        )
+
+        updated = 0
+        with transaction.atomic():
+            Product.objects.update(**{field: 0 for field in RATING_STATS_FIELDS})
+
+            batch = []
+            for product_id, group in groupby(rows.iterator(), key=lambda row: row[0]):
+                product = Product(pk=product_id)
+                product.set_rating_stats({rating: total for _, rating, total in group})
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    Product.objects.bulk_update(batch, RATING_STATS_FIELDS)
+                    updated += len(batch)
+                    batch = []
+
+            if batch:
+                Product.objects.bulk_update(batch, RATING_STATS_FIELDS)
+                updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Статистику відгуків перераховано для {updated} товарів з відгуками'))
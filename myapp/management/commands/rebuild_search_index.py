@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp.search import is_search_index_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перебудовує повнотекстовий індекс товарів (SQLite FTS5)'
+
+    def handle(self, *args, **options):
+        if not is_search_index_enabled():
+            raise CommandError('Повнотекстовий індекс підтримується лише для SQLite')
+
+        with transaction.atomic():
+            indexed = rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f'Проіндексовано товарів: {indexed}'))
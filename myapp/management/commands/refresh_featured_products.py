@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.featured import refresh_featured_pool
+
+
+class Command(BaseCommand):
+    help = 'Оновлює пул рекомендованих товарів головної сторінки в кеші (для запуску за розкладом)'
+
+    def handle(self, *args, **options):
+        pool = refresh_featured_pool()
+        self.stdout.write(self.style.SUCCESS(f'У пулі рекомендованих товарів: {len(pool)}'))
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from myapp.benchmarks.concurrency import ASGI_VARIANTS, benchmark_modes, run_asgi_views, set_journal_mode
+from myapp.benchmarks.dataset import USERNAME_PREFIX, build_dataset, is_dataset_built
+from myapp.benchmarks.runner import SEARCH_TERMS
+from myapp.db_router import get_replica_aliases
+from myapp.management.commands.run_benchmark import DEFAULT_BENCHMARK_DB
+from myapp.management.commands.run_concurrency_benchmark import CONCURRENCY_SCALE
+from myapp.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Сторінки каталогу під ASGI: sync-view (у потоках) проти async-view (async ORM) '
+        'з однаковою кількістю конкурентних клієнтів'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in CONCURRENCY_SCALE.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--clients', type=int, default=32, help='Конкурентних клієнтів в ASGI-процесі')
+        parser.add_argument('--duration', type=float, default=10, help='Тривалість виміру кожного варіанта, с')
+        parser.add_argument('--warmup', type=float, default=2, help='Непідрахований прогрів перед виміром, с')
+        parser.add_argument('--variant', action='append', dest='variants', choices=ASGI_VARIANTS,
+                            help='Лише вказані варіанти (за замовчуванням — обидва, для порівняння)')
+        parser.add_argument('--db-name', default=DEFAULT_BENCHMARK_DB, help='Файл тестової БД (SQLite)')
+        parser.add_argument('--keepdb', action='store_true', help='Не видаляти тестову БД і не заповнювати її повторно')
+        parser.add_argument('--output', help='Записати звіт у JSON-файл')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = options['db_name']
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        for alias in get_replica_aliases():
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            if not (options['keepdb'] and is_dataset_built()):
+                scale = {name: options[name] for name in CONCURRENCY_SCALE}
+                self.stdout.write(f'Заповнення тестової БД: {scale}')
+                build_dataset(scale, stdout=self.stdout)
+
+            user_ids = list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').order_by('id').values_list('id', flat=True))
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:10_000])
+            category_ids = list(Category.objects.values_list('id', flat=True))
+            if not product_ids:
+                raise CommandError('У тестовій БД немає активних товарів')
+            if connection.vendor == 'sqlite':
+                # як у робочій конфігурації (settings.SQLITE_PRAGMAS): читачі не блокують один одного
+                connections.close_all()
+                set_journal_mode(connection.settings_dict['NAME'], benchmark_modes()['tuned']['journal_mode'])
+
+            report = {}
+            for variant in options['variants'] or ASGI_VARIANTS:
+                self.stdout.write(f"Варіант {variant}: {options['clients']} клієнтів, {options['duration']} с")
+                report[variant] = run_asgi_views(
+                    connection.settings_dict['NAME'], variant, options['clients'], options['duration'], options['warmup'],
+                    user_ids, product_ids, category_ids, SEARCH_TERMS,
+                )
+                for route, stats in report[variant].items():
+                    self.stdout.write(
+                        f"  {route:<15} {stats['rps']:>8} зап/с  p50 {stats['p50_ms']:>8} ms  "
+                        f"p95 {stats['p95_ms']:>8} ms  помилок {stats['errors']}"
+                    )
+                total = sum(stats['rps'] for stats in report[variant].values())
+                self.stdout.write(f'  {"разом":<15} {total:>8.1f} зап/с')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'meta': {
+                        'clients': options['clients'],
+                        'duration': options['duration'],
+                        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    },
+                    'variants': report,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Звіт: {os.path.abspath(options['output'])}")
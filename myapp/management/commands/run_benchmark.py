@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from myapp.benchmarks.dataset import DEFAULT_SCALE, build_dataset, is_dataset_built
+from myapp.benchmarks.runner import ROUTES, compare_with_baseline, missing_routes, run_benchmark
+from myapp.db_router import get_replica_aliases
+from myapp.static_assets import storages_without_manifest
+
+
+DEFAULT_BENCHMARK_DB = os.path.join(settings.BASE_DIR, 'benchmark.sqlite3')
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'myapp', 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Навантажувальний тест: створює окрему тестову БД з великим синтетичним каталогом, '
+        'проганяє всі маршрути myapp паралельними клієнтами і порівнює з базовою лінією'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--clients', type=int, default=8, help='Кількість паралельних клієнтів на маршрут')
+        parser.add_argument('--requests', type=int, default=25, help='Запитів на клієнта (без прогріву)')
+        parser.add_argument('--warmup', type=int, default=2, help='Непідраховані запити на клієнта перед виміром')
+        parser.add_argument('--route', action='append', dest='routes', help="Лише вказані імена URL (можна повторювати)")
+        parser.add_argument('--db-name', default=DEFAULT_BENCHMARK_DB, help='Файл тестової БД (SQLite)')
+        parser.add_argument('--keepdb', action='store_true', help='Не видаляти тестову БД і не заповнювати її повторно')
+        parser.add_argument('--output', help='Записати звіт у JSON-файл')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help='Зберегти результат як нову базову лінію')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Допустимий ріст p95 (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        missing = missing_routes()
+        if missing:
+            self.stderr.write(self.style.WARNING(f'Маршрути без сценарію: {", ".join(missing)}'))
+
+        # окрема БД: робоча ніколи не змінюється; файл (а не :memory:) потрібен для паралельних клієнтів
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = options['db_name']
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        # репліки (DATABASE_REPLICAS) вказують на робочі копії — під час тесту читаємо лише тестову БД
+        for alias in get_replica_aliases():
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            if not (options['keepdb'] and is_dataset_built()):
+                scale = {name: options[name] for name in DEFAULT_SCALE}
+                self.stdout.write(f'Заповнення тестової БД: {scale}')
+                started = time.perf_counter()
+                created = build_dataset(scale, stdout=self.stdout)
+                self.stdout.write(f'Створено {created} за {time.perf_counter() - started:.0f} с')
+
+            cache.clear()
+            # підозри на N+1 видно у звіті query_report; у консолі лишаємо тільки таблицю результатів
+            logging.getLogger('myapp.instrumentation').setLevel(logging.ERROR)
+            # DEBUG=False: без накопичення connection.queries; testserver — хост тестового клієнта;
+            # статика без manifest — бенчмарк не вимагає collectstatic
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], STORAGES=storages_without_manifest()):
+                routes = run_benchmark(
+                    ROUTES, options['clients'], options['requests'], options['warmup'],
+                    only=options['routes'], stdout=self.stdout,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'meta': {
+                'clients': options['clients'],
+                'requests': options['requests'],
+                'scale': {name: options[name] for name in DEFAULT_SCALE},
+                'database': connection.vendor,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'routes': routes,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Базову лінію збережено: {options["baseline"]}'))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write('Базової лінії немає — порівняння пропущено (див. --save-baseline)')
+            return
+
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['meta']['scale'] != report['meta']['scale'] or baseline['meta']['clients'] != report['meta']['clients']:
+            self.stderr.write(self.style.WARNING('Базова лінія знята з іншими параметрами — порівняння може бути некоректним'))
+
+        regressions = compare_with_baseline(routes, baseline['routes'], options['threshold'])
+        if regressions:
+            raise CommandError('Регресії продуктивності:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регресій відносно базової лінії немає'))
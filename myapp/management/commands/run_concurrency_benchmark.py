@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from myapp.benchmarks.concurrency import benchmark_modes, run_concurrency
+from myapp.benchmarks.dataset import USERNAME_PREFIX, build_dataset, is_dataset_built
+from myapp.db_router import get_replica_aliases
+from myapp.management.commands.run_benchmark import DEFAULT_BENCHMARK_DB
+from myapp.models import Category, Product
+
+
+# невеликий каталог за замовчуванням: вимірюємо блокування, а не швидкість запитів на великих таблицях
+CONCURRENCY_SCALE = {'categories': 20, 'products': 5_000, 'comments': 20_000, 'orders': 2_000, 'customers': 50, 'managers': 3}
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускна здатність SQLite на читання і запис з кількох процесів: каталог (читачі) паралельно '
+        'з кошиком і оформленням замовлень (письменники) — у стандартному режимі SQLite і з налаштуваннями '
+        'settings.DATABASES (WAL, PRAGMA, BEGIN IMMEDIATE)'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in CONCURRENCY_SCALE.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--readers', type=int, default=4, help='Процесів, що читають каталог')
+        parser.add_argument('--writers', type=int, default=4, help='Процесів, що оформлюють замовлення')
+        parser.add_argument('--duration', type=float, default=10, help='Тривалість виміру кожного режиму, с')
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(benchmark_modes()),
+                            help='Лише вказані режими (за замовчуванням — усі, для порівняння)')
+        parser.add_argument('--db-name', default=DEFAULT_BENCHMARK_DB, help='Файл тестової БД (SQLite)')
+        parser.add_argument('--keepdb', action='store_true', help='Не видаляти тестову БД і не заповнювати її повторно')
+        parser.add_argument('--output', help='Записати звіт у JSON-файл')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Тест режимів блокування має сенс лише для SQLite')
+
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = options['db_name']
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        for alias in get_replica_aliases():
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            if not (options['keepdb'] and is_dataset_built()):
+                scale = {name: options[name] for name in CONCURRENCY_SCALE}
+                self.stdout.write(f'Заповнення тестової БД: {scale}')
+                build_dataset(scale, stdout=self.stdout)
+
+            customer_ids = list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').order_by('id').values_list('id', flat=True))
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:10_000])
+            category_ids = list(Category.objects.values_list('id', flat=True))
+            if len(customer_ids) < options['writers']:
+                raise CommandError(f"Покупців ({len(customer_ids)}) менше, ніж письменників ({options['writers']})")
+
+            report = {}
+            for mode in options['modes'] or benchmark_modes():
+                self.stdout.write(f"Режим {mode}: {options['readers']} читачів + {options['writers']} письменників, {options['duration']} с")
+                report[mode] = run_concurrency(
+                    connection.settings_dict['NAME'], mode, options['readers'], options['writers'], options['duration'],
+                    customer_ids, product_ids, category_ids,
+                )
+                for role, stats in report[mode].items():
+                    self.stdout.write(
+                        f"  {role:<7} {stats['ops_per_sec']:>8} оп/с  p95 {stats['p95_ms']:>8} ms  "
+                        f"помилок {stats['errors']} (database is locked: {stats['locked']})"
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'meta': {
+                        'readers': options['readers'],
+                        'writers': options['writers'],
+                        'duration': options['duration'],
+                        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    },
+                    'modes': report,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Звіт: {os.path.abspath(options['output'])}")
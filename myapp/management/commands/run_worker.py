@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Фоновий воркер: виконує задачі з черги BackgroundJob (сповіщення менеджерів тощо)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Обробити готові задачі та завершити роботу')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=1.0, help='Пауза між опитуваннями черги, с')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            succeeded, failed = run_pending_jobs(batch_size)
+            if succeeded or failed:
+                self.stdout.write(f'Виконано задач: {succeeded}, з помилкою: {failed}')
+
+            if options['once']:
+                # дочищаємо чергу, поки є готові задачі
+                if succeeded or failed:
+                    continue
+                break
+
+            if not (succeeded or failed):
+                time.sleep(options['sleep'])
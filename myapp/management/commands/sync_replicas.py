@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from myapp.db_router import get_replica_aliases, sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        'Оновлює локальні репліки (settings.DATABASE_REPLICAS) копією основної БД SQLite; '
+        'з --interval працює постійно, імітуючи відставання реплікації'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Повторювати копіювання кожні N секунд')
+
+    def handle(self, *args, **options):
+        replicas = get_replica_aliases()
+        if not replicas:
+            raise CommandError('Репліки не налаштовані: задайте змінну середовища DATABASE_REPLICAS')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Копіювання файлом підтримується лише для SQLite; для інших БД — реплікація сервера')
+
+        while True:
+            for alias in replicas:
+                started = time.perf_counter()
+                sync_replica(alias)
+                self.stdout.write(f'{alias}: {connections[alias].settings_dict["NAME"]} за {time.perf_counter() - started:.2f} с')
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,131 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+
+# --- Віддача MEDIA_ROOT
+# MEDIA_SERVE_MODE:
+#   'python'           — Django сам віддає файл (ETag/304, Range, потокове читання блоками);
+#   'x-accel-redirect' — nginx: відповідь із заголовком X-Accel-Redirect, передачу робить вебсервер;
+#   'x-sendfile'       — Apache mod_xsendfile / lighttpd: заголовок X-Sendfile з повним шляхом.
+STREAM_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _file_etag(stat):
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _parse_range(header, size):
+    """Повертає (start, end) включно для одного діапазону bytes=...; None — заголовок ігнорується; ValueError — 416."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N: останні N байт
+        length = int(end)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _stream_file(full_path, start, length):
+    # пам'ять воркера не залежить від розміру файлу: читаємо блоками по STREAM_CHUNK_SIZE
+    with open(full_path, 'rb') as source:
+        source.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload_response(path, full_path, content_type):
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'python')
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + quote(path)
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except Exception:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    # умовні запити та діапазони вебсервер обробить сам
+    if getattr(settings, 'MEDIA_SERVE_MODE', 'python') in ('x-accel-redirect', 'x-sendfile'):
+        return _offload_response(path, full_path, content_type)
+
+    stat = os.stat(full_path)
+    etag = _file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    if_none_match = request.headers.get('If-None-Match')
+    not_modified = (
+        etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if if_none_match
+        else not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime)
+    )
+    if not_modified:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # If-Range: діапазон віддаємо лише якщо файл не змінився, інакше — весь файл
+    if range_header and (not if_range or if_range in (etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_stream_file(full_path, start, length), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = length
+    else:
+        # FileResponse читає файл блоками і може використати wsgi.file_wrapper (sendfile)
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        response['Content-Length'] = stat.st_size
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = getattr(settings, 'MEDIA_CACHE_CONTROL', 'public, max-age=86400')
+    return response
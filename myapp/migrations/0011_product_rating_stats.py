@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_rating_stats(apps, schema_editor):
+    Product = apps.get_model('myapp', 'Product')
+    Comment = apps.get_model('myapp', 'Comment')
+
+    histograms = {}
+    rows = Comment.objects.values_list('product_id', 'rating').annotate(total=Count('id')).order_by()
+    for product_id, rating, total in rows:
+        histograms.setdefault(product_id, {})[rating] = total
+
+    products = []
+    for product in Product.objects.filter(pk__in=histograms):
+        histogram = histograms[product.pk]
+        product.review_count = sum(histogram.get(star, 0) for star in range(1, 6))
+        rating_sum = sum(star * histogram.get(star, 0) for star in range(1, 6))
+        # округлення половиною вгору, як models.rating_average
+        product.average_rating = (20 * rating_sum + product.review_count) // (2 * product.review_count) / 10
+        for star in range(1, 6):
+            setattr(product, f'rating_{star}_count', histogram.get(star, 0))
+        products.append(product)
+
+    fields = ['average_rating', 'review_count'] + [f'rating_{star}_count' for star in range(1, 6)]
+    Product.objects.bulk_update(products, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_ordernotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+PRODUCT_FTS_TABLE = 'myapp_product_fts'
+
+
+def create_product_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {PRODUCT_FTS_TABLE} "
+        f"USING fts5(name, description, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {PRODUCT_FTS_TABLE} (rowid, name, description) "
+        f"SELECT id, name, description FROM myapp_product"
+    )
+
+
+def drop_product_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {PRODUCT_FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_product_rating_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_fts, drop_product_fts),
+    ]
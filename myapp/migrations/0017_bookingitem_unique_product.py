@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # get_or_create + save без обмеження могли залишити кілька рядків одного товару — зливаємо в перший
+    BookingItem = apps.get_model('myapp', 'BookingItem')
+    duplicates = (
+        BookingItem.objects.filter(product__isnull=False)
+        .values('booking_id', 'product_id')
+        .annotate(rows=Count('id'), first_id=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        BookingItem.objects.filter(pk=row['first_id']).update(quantity=row['total'])
+        BookingItem.objects.filter(booking_id=row['booking_id'], product_id=row['product_id']).exclude(pk=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='bookingitem',
+            name='bookingitem_booking_prod_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='bookingitem',
+            constraint=models.UniqueConstraint(fields=('booking', 'product'), name='unique_booking_product'),
+        ),
+    ]
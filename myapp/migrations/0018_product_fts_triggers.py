@@ -0,0 +1,56 @@
+from django.db import migrations
+
+
+PRODUCT_FTS_TABLE = 'myapp_product_fts'
+
+# індекс оновлює сама БД: сигнали post_save/post_delete не спрацьовують для QuerySet.update,
+# bulk_create, bulk_update та видалення з raw SQL, і індекс тихо застарівав
+TRIGGERS = {
+    'myapp_product_fts_insert': (
+        f"AFTER INSERT ON myapp_product BEGIN "
+        f"INSERT INTO {PRODUCT_FTS_TABLE} (rowid, name, description) VALUES (new.id, new.name, new.description); "
+        f"END"
+    ),
+    'myapp_product_fts_update': (
+        f"AFTER UPDATE OF id, name, description ON myapp_product BEGIN "
+        f"DELETE FROM {PRODUCT_FTS_TABLE} WHERE rowid = old.id; "
+        f"INSERT INTO {PRODUCT_FTS_TABLE} (rowid, name, description) VALUES (new.id, new.name, new.description); "
+        f"END"
+    ),
+    'myapp_product_fts_delete': (
+        f"AFTER DELETE ON myapp_product BEGIN "
+        f"DELETE FROM {PRODUCT_FTS_TABLE} WHERE rowid = old.id; "
+        f"END"
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, body in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    # рядки, що розійшлися з товарами до появи тригерів
+    schema_editor.execute(f"DELETE FROM {PRODUCT_FTS_TABLE}")
+    schema_editor.execute(
+        f"INSERT INTO {PRODUCT_FTS_TABLE} (rowid, name, description) "
+        f"SELECT id, name, description FROM myapp_product"
+    )
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_bookingitem_unique_product'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
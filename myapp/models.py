@@ -1,10 +1,42 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.core.cache import cache
+from django.db.models import F, FloatField, DecimalField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, Least, NullIf
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import RegexValidator
+from django.utils import timezone
+
+
+
+#  Возвращает правильную форму слова "відгук" в зависимости от количества
+def pluralize_reviews(count):
+
+    if count % 10 == 1 and count % 100 != 11:
+        return f"{count} відгук"
+    elif 2 <= count % 10 <= 4 and (count % 100 < 10 or count % 100 >= 20):
+        return f"{count} відгуки"
+    else:
+        return f"{count} відгуків"
 
 
+# --- Допустимі оцінки відгуку
+RATING_VALUES = range(1, 6)
+RATING_STATS_FIELDS = ['average_rating', 'review_count'] + [f'rating_{star}_count' for star in RATING_VALUES]
+
+
+def rating_average(rating_sum, review_count):
+    """
+    Середня оцінка, округлена до 0.1 половиною вгору (2.25 → 2.3) цілочисельним діленням —
+    так само, як у SQL-виразі Product.shift_rating_stats, без різниці між round() Python і ROUND() БД.
+    """
+    if not review_count:
+        return 0.0
+    return (20 * rating_sum + review_count) // (2 * review_count) / 10
+
 
 # --- Категорія товара
 class Category(models.Model):
@@ -16,17 +48,104 @@ class Category(models.Model):
 
 # --- Товар
 class Product(models.Model):
+    # артикул постачальника — ключ для імпорту каталогу (catalog_io.py); товари, створені вручну, можуть не мати його
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='myapp/images/', blank=True, default='myapp/images/no-image.jpg')
+    # зменшені варіанти зображення {variant: {'name', 'width'}}, див. images.py
+    image_variants = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     favorites = models.ManyToManyField(User, related_name='favorite_product', blank=True)
+    # збережена статистика відгуків (оновлюється сигналами Comment, див. signals.py)
+    average_rating = models.FloatField(default=0.0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # каталог (ProductListView): активні товари, за категорією та/або відсортовані за ціною.
+        # Часткові індекси замість is_active першою колонкою: фільтр is_active=True на SQLite
+        # компілюється в WHERE "is_active" (без "= 1"), і звичайний індекс за ним не використовується
+        indexes = [
+            models.Index(fields=['category', 'price'], condition=Q(is_active=True), name='product_active_cat_price_idx'),
+            models.Index(fields=['price'], condition=Q(is_active=True), name='product_active_price_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def image_variant_url(self, variant):
+        # якщо варіантів ще немає (не згенеровано) — віддаємо оригінал
+        data = self.image_variants.get(variant)
+        if data:
+            return self.image.storage.url(data['name'])
+        return self.image.url if self.image else ''
+
+    @property
+    def thumb_image_url(self):
+        return self.image_variant_url('thumb')
+
+    @property
+    def card_image_url(self):
+        return self.image_variant_url('card')
+
+    @property
+    def detail_image_url(self):
+        return self.image_variant_url('detail')
+
+    @property
+    def image_srcset(self):
+        """srcset з усіх варіантів, напр. "/media/..._thumb.webp 160w, /media/..._card.webp 400w"."""
+        by_width = {data['width']: data['name'] for data in self.image_variants.values()}
+        return ', '.join(f"{self.image.storage.url(name)} {width}w" for width, name in sorted(by_width.items()))
+
+    @property
+    def review_count_text(self):
+        return pluralize_reviews(self.review_count)
+
+    @property
+    def rating_histogram(self):
+        # {оцінка: кількість відгуків} від 5 до 1
+        return {star: getattr(self, f'rating_{star}_count') for star in reversed(RATING_VALUES)}
+
+    @classmethod
+    def shift_rating_stats(cls, product_id, old_rating=None, new_rating=None):
+        """Інкрементно змінює статистику товару одним UPDATE без читання Comment."""
+        deltas = dict.fromkeys(RATING_VALUES, 0)
+        if old_rating in deltas:
+            deltas[old_rating] -= 1
+        if new_rating in deltas:
+            deltas[new_rating] += 1
+        if not any(deltas.values()):
+            return
+
+        # у SET праві частини бачать старі значення рядка, тому нові лічильники виражаємо як F() + delta
+        counts = {star: F(f'rating_{star}_count') + delta for star, delta in deltas.items()}
+        review_count = F('review_count') + sum(deltas.values())
+        rating_sum = sum(star * counts[star] for star in RATING_VALUES)
+
+        # те саме округлення, що й rating_average: десяті частки — цілочисельне (20 * sum + n) / (2 * n)
+        tenths = (20 * rating_sum + review_count) / NullIf(2 * review_count, 0)
+        cls.objects.filter(pk=product_id).update(
+            review_count=review_count,
+            average_rating=Coalesce(Cast(tenths, FloatField()) / 10.0, 0.0, output_field=FloatField()),
+            **{f'rating_{star}_count': counts[star] for star, delta in deltas.items() if delta},
+        )
+
+    def set_rating_stats(self, histogram):
+        """Записує статистику з готової гістограми {оцінка: кількість} (без збереження)."""
+        self.review_count = sum(histogram.get(star, 0) for star in RATING_VALUES)
+        rating_sum = sum(star * histogram.get(star, 0) for star in RATING_VALUES)
+        self.average_rating = rating_average(rating_sum, self.review_count)
+        for star in RATING_VALUES:
+            setattr(self, f'rating_{star}_count', histogram.get(star, 0))
+
 
 # --- Відгук
 class Comment(models.Model):
@@ -38,20 +157,78 @@ class Comment(models.Model):
 
     class Meta:
         unique_together = ('product', 'user')
+        # гістограма оцінок товару (rebuild_ratings) — без читання самої таблиці
+        indexes = [
+            models.Index(fields=['product', 'rating'], name='comment_product_rating_idx'),
+        ]
 
     def __str__(self):
         return f'Відгук {self.user.username} до "{self.product.name}"'
 
 
 # --- Кошик
+BOOKING_TOTALS_TIMEOUT = 60 * 60
+
+
 class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
 
     def __str__(self):
         return f'Кошик {self.user.username}'
 
+    @staticmethod
+    def totals_cache_key(booking_id):
+        return f'booking_totals:{booking_id}'
+
+    def get_totals(self):
+        """
+        Сума та кількість товарів у кошику одним агрегатним запитом
+        SUM(product.price * quantity); результат кешується до зміни BookingItem або ціни товару.
+        """
+        key = self.totals_cache_key(self.pk)
+        totals = cache.get(key)
+        if totals is None:
+            totals = self.items.filter(product__isnull=False).aggregate(
+                total_price=Sum(F('product__price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+                item_count=Sum('quantity'),
+            )
+            totals = {
+                'total_price': Decimal(totals['total_price'] or 0).quantize(Decimal('0.01')),
+                'item_count': totals['item_count'] or 0,
+            }
+            cache.set(key, totals, BOOKING_TOTALS_TIMEOUT)
+        return totals
+
     def get_total_price(self):
-        return sum(item.product.price * item.quantity for item in self.items.all() if item.product)
+        return self.get_totals()['total_price']
+
+    @classmethod
+    def invalidate_totals(cls, *booking_ids):
+        cache.delete_many([cls.totals_cache_key(booking_id) for booking_id in booking_ids])
+
+    def add_quantities(self, quantities, max_quantity=None):
+        """
+        Атомарно додає кількості {product_id: n}: UPDATE ... SET quantity = quantity + n без читання рядка.
+        Товару ще немає в кошику — INSERT; паралельний INSERT того ж товару (unique booking+product) — знову UPDATE.
+        max_quantity обмежує кількість одного товару (MIN(quantity + n, max_quantity)).
+        """
+        for product_id, quantity in quantities.items():
+            items = BookingItem.objects.filter(booking=self, product_id=product_id)
+            new_quantity = F('quantity') + quantity
+            if max_quantity is not None:
+                new_quantity = Least(new_quantity, max_quantity)
+                quantity = min(quantity, max_quantity)
+            if items.update(quantity=new_quantity):
+                continue
+            try:
+                with transaction.atomic():
+                    BookingItem.objects.create(booking=self, product_id=product_id, quantity=quantity)
+            except IntegrityError:
+                items.update(quantity=new_quantity)
+        # QuerySet.update не надсилає сигналів BookingItem; скидаємо кеш після коміту,
+        # інакше паралельний запит до коміту знову закешує старі підсумки
+        booking_id = self.pk
+        transaction.on_commit(lambda: Booking.invalidate_totals(booking_id))
 
 
 # --- Товар у кошику
@@ -60,6 +237,12 @@ class BookingItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        # один рядок на товар у кошику: атомарні UPDATE/upsert кількості; індекс обмеження — і пошук позиції
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'product'], name='unique_booking_product'),
+        ]
+
     def __str__(self):
         return f'{self.quantity} × {self.product.name}'
 
@@ -88,6 +271,12 @@ class Order(models.Model):
     delivery_address = models.CharField(max_length=255, default='Потребує уточнення')
     payment_method = models.CharField(max_length=30, choices=PAYMENT_CHOICES, default='cash_on_delivery')
 
+    class Meta:
+        # замовлення користувача, новіші першими (OrderListView)
+        indexes = [
+            models.Index(fields=['user', '-date'], name='order_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"Замовлення № {self.id} від {self.user.username}"
 
@@ -134,6 +323,19 @@ class OrderNotification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        # повторний запуск фонової задачі не створює дублікатів (bulk_create з ignore_conflicts)
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'order'], name='unique_notification_per_order'),
+        ]
+        # сповіщення менеджера, новіші першими (OrderNotificationView); is_read в кінці — лічильники
+        # прочитаних/непрочитаних рахуються з індексу без читання таблиці. Непрочитані — окремий
+        # частковий індекс (див. Product.Meta), він же для лічильника в шапці
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id', 'is_read'], name='notification_user_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
+
     def __str__(self):
         return f"Сповіщення для {self.user.username} про замовлення № {self.order.id}"
 
@@ -141,3 +343,36 @@ class OrderNotification(models.Model):
         self.is_read = True
         self.save()
 
+
+# --- Фонова задача (черга в БД, обробляється командою run_worker)
+class BackgroundJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Очікує'),
+        (STATUS_RUNNING, 'Виконується'),
+        (STATUS_DONE, 'Виконано'),
+        (STATUS_FAILED, 'Помилка'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    # однаковий ключ = та сама задача, повторна постановка ігнорується
+    dedup_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"Задача {self.kind} № {self.id} ({self.status})"
@@ -0,0 +1,22 @@
+from django.core.cache import cache
+
+
+# --- Кешований лічильник непрочитаних сповіщень (значок у шапці)
+UNREAD_COUNT_TIMEOUT = 60
+
+
+def _unread_count_key(user_id):
+    return f'notifications_unread:{user_id}'
+
+
+def get_unread_notifications_count(user):
+    key = _unread_count_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = user.user_notifications.filter(is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def invalidate_unread_notifications_count(*user_ids):
+    cache.delete_many([_unread_count_key(user_id) for user_id in user_ids])
@@ -0,0 +1,128 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+from myapp.models import Order, OrderItem
+
+
+# --- Потоковий експорт замовлень для бухгалтерії (OrderExportView)
+# замовлення читаються iterator(chunk_size): на кожну пачку — один запит замовлень і один запит їхніх позицій,
+# тож пам'ять і час до першого байта не залежать від періоду вивантаження
+EXPORT_CHUNK_SIZE = 500
+CSV_COLUMNS = [
+    'order_id', 'date', 'customer', 'customer_email', 'order_total', 'delivery_method', 'payment_method',
+    'delivery_address', 'product_id', 'sku', 'product_name', 'quantity', 'price', 'line_total',
+]
+
+
+def get_export_queryset(date_from=None, date_to=None, delivery_method='', payment_method=''):
+    """date_from / date_to — дати (включно) у часовому поясі магазину."""
+    orders = Order.objects.all()
+    if date_from:
+        orders = orders.filter(date__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        orders = orders.filter(date__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+    if delivery_method:
+        orders = orders.filter(delivery_method=delivery_method)
+    if payment_method:
+        orders = orders.filter(payment_method=payment_method)
+
+    items = OrderItem.objects.select_related('product').only(
+        'id', 'order_id', 'quantity', 'price', 'product__id', 'product__name', 'product__sku',
+    ).order_by('id')
+    return (
+        orders.select_related('user')
+        .only('id', 'date', 'total_price', 'delivery_method', 'payment_method', 'delivery_address', 'user__username', 'user__email')
+        .prefetch_related(Prefetch('items', queryset=items))
+        .order_by('date', 'id')
+    )
+
+
+def _order_data(order):
+    return {
+        'order_id': order.id,
+        'date': localtime(order.date).isoformat(),
+        'customer': order.user.username,
+        'customer_email': order.user.email,
+        'order_total': str(order.total_price),
+        'delivery_method': order.delivery_method,
+        'payment_method': order.payment_method,
+        'delivery_address': order.delivery_address,
+    }
+
+
+def _item_data(item):
+    return {
+        # товар міг бути видалений (OrderItem.product = NULL)
+        'product_id': item.product_id or '',
+        'sku': (item.product.sku or '') if item.product else '',
+        'product_name': item.product.name if item.product else '',
+        'quantity': item.quantity,
+        'price': str(item.price),
+        'line_total': str(item.price * item.quantity),
+    }
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow повертає рядок замість запису в буфер."""
+
+    def write(self, value):
+        return value
+
+
+def _order_csv_lines(writer, order):
+    order_data = _order_data(order)
+    items = order.items.all() or [None]
+    for item in items:
+        row = {**order_data, **(_item_data(item) if item else {})}
+        yield writer.writerow([row.get(column, '') for column in CSV_COLUMNS])
+
+
+def _order_json_line(order):
+    # один рядок — одне замовлення з вкладеним списком позицій
+    data = _order_data(order)
+    data['items'] = [_item_data(item) for item in order.items.all()]
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+# BOM — щоб Excel правильно відкрив кирилицю
+def _csv_header(writer):
+    return '\ufeff' + writer.writerow(CSV_COLUMNS)
+
+
+def stream_orders_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield _csv_header(writer)
+    for order in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield from _order_csv_lines(writer, order)
+
+
+def stream_orders_jsonl(queryset):
+    for order in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _order_json_line(order)
+
+
+# --- Async-версії для ASGI: sync-генератор ASGIHandler спершу споживає повністю (увесь файл у пам'яті
+# і жодного байта до кінця вибірки), а з async-ітератором відправляє кожне замовлення одразу.
+# aiterator() з chunk_size підтримує prefetch_related — ті самі два запити на пачку.
+async def astream_orders_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield _csv_header(writer)
+    async for order in queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield ''.join(_order_csv_lines(writer, order))
+
+
+async def astream_orders_jsonl(queryset):
+    async for order in queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _order_json_line(order)
+
+
+# формат: (sync-генератор, async-генератор, Content-Type)
+EXPORT_FORMATS = {
+    'csv': (stream_orders_csv, astream_orders_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (stream_orders_jsonl, astream_orders_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
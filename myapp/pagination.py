@@ -0,0 +1,155 @@
+import base64
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+# --- Курсорна (keyset) пагінація
+# замість OFFSET фільтруємо за ключем останнього показаного рядка, тому глибокі сторінки
+# коштують стільки ж, скільки перша: (price, id) > (last_price, last_id) LIMIT page_size + 1
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def cursor_fields(queryset, ordering):
+    """Поля моделі (або output_field анотацій, напр. search_rank) для кожного ключа сортування."""
+    annotations = queryset.query.annotations
+    fields = []
+    for field in ordering:
+        name = field.lstrip('-')
+        if name in annotations:
+            fields.append(annotations[name].output_field)
+        else:
+            fields.append(queryset.model._meta.get_field(name))
+    return fields
+
+
+def decode_cursor(cursor, fields):
+    """Значення курсора, приведені до типів полів; зіпсований курсор — як його відсутність."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, ValueError, TypeError):
+        return None
+
+
+def keyset_filter(ordering, values, forward=True):
+    """Q-умова "рядок іде після (або перед) курсора" для складеного ключа сортування."""
+    conditions = []
+    for position, field in enumerate(ordering):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        equal_prefix = {ordering[i].lstrip('-'): values[i] for i in range(position)}
+        conditions.append(Q(**equal_prefix, **{f'{name}__{lookup}': values[position]}))
+    return reduce(lambda left, right: left | right, conditions)
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class KeysetPage:
+    def __init__(self, object_list, ordering, has_next, has_previous, query_params):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, field.lstrip('-')) for field in self.ordering)
+
+    def _query(self, **cursor):
+        params = self.query_params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params.update(cursor)
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        if self.has_next:
+            return self._query(after=self._cursor(self.object_list[-1]))
+        return ''
+
+    @property
+    def previous_query(self):
+        if self.has_previous:
+            return self._query(before=self._cursor(self.object_list[0]))
+        return ''
+
+
+def _keyset_window(queryset, ordering, page_size, query_params):
+    """Запит сторінки (з одним зайвим рядком — ознакою наступної сторінки) і функція, що робить з рядків KeysetPage."""
+    fields = cursor_fields(queryset, ordering)
+    after = decode_cursor(query_params.get('after'), fields)
+    before = decode_cursor(query_params.get('before'), fields)
+
+    if before is not None:
+        window = (
+            queryset.filter(keyset_filter(ordering, before, forward=False))
+            .order_by(*reverse_ordering(ordering))[:page_size + 1]
+        )
+
+        def make_page(rows):
+            has_previous = len(rows) > page_size
+            return KeysetPage(rows[:page_size][::-1], ordering, True, has_previous, query_params)
+        return window, make_page
+
+    queryset = queryset.order_by(*ordering)
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(ordering, after, forward=True))
+
+    def make_page(rows):
+        has_next = len(rows) > page_size
+        return KeysetPage(rows[:page_size], ordering, has_next, after is not None, query_params)
+    return queryset[:page_size + 1], make_page
+
+
+def paginate_keyset(queryset, ordering, page_size, query_params):
+    """
+    Повертає KeysetPage для queryset, впорядкованого за унікальним ключем ordering
+    (останнє поле має бути унікальним, напр. id). Курсори беруться з параметрів after / before.
+    """
+    window, make_page = _keyset_window(queryset, ordering, page_size, query_params)
+    return make_page(list(window))
+
+
+async def apaginate_keyset(queryset, ordering, page_size, query_params):
+    """Async-версія paginate_keyset (async ORM)."""
+    window, make_page = _keyset_window(queryset, ordering, page_size, query_params)
+    return make_page([obj async for obj in window])
+
+
+class KeysetPaginationMixin:
+    """Підміняє OFFSET-пагінацію ListView курсорною; у шаблоні доступні page_obj та is_paginated."""
+    paginate_by = 24
+
+    def get_keyset_ordering(self):
+        return ('id',)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_keyset(queryset, self.get_keyset_ordering(), page_size, self.request.GET)
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,113 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.auth.middleware import get_user
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+
+# --- Ролі (групи) та права користувача
+# визначаються один раз на запит (атрибут на об'єкті user) і кешуються між запитами;
+# кеш скидається сигналами при зміні груп або прав (signals.py)
+ROLE_MANAGER = 'Manager'
+ROLE_CLIENT = 'Client'
+USER_AUTH_TIMEOUT = 60 * 60
+
+
+def _auth_cache_key(user_id):
+    return f'user_auth:{user_id}'
+
+
+def _load_user_auth(user):
+    """Назви груп і права ("app_label.codename") — два запити замість окремих для груп, прав користувача і прав груп."""
+    roles = set()
+    perms = set()
+    for name, app_label, codename in Group.objects.filter(user=user).values_list(
+        'name', 'permissions__content_type__app_label', 'permissions__codename',
+    ):
+        roles.add(name)
+        if codename:
+            perms.add(f'{app_label}.{codename}')
+    perms.update(
+        f'{app_label}.{codename}'
+        for app_label, codename in Permission.objects.filter(user=user).values_list('content_type__app_label', 'codename')
+    )
+    return {'roles': frozenset(roles), 'perms': perms}
+
+
+def get_user_auth(user):
+    if not user.is_authenticated:
+        return {'roles': frozenset(), 'perms': set()}
+
+    data = getattr(user, '_auth_cache', None)
+    if data is None:
+        key = _auth_cache_key(user.pk)
+        data = cache.get(key)
+        if data is None:
+            data = _load_user_auth(user)
+            cache.set(key, data, USER_AUTH_TIMEOUT)
+        user._auth_cache = data
+        # ModelBackend.has_perm бере права з _perm_cache, якщо він є, — тоді перевірка прав без запитів
+        if user.is_active and not user.is_superuser:
+            user._perm_cache = data['perms']
+    return data
+
+
+def get_user_roles(user):
+    return get_user_auth(user)['roles']
+
+
+def is_manager(user):
+    return ROLE_MANAGER in get_user_roles(user)
+
+
+def is_client(user):
+    return ROLE_CLIENT in get_user_roles(user)
+
+
+def invalidate_user_auth(*user_ids):
+    cache.delete_many([_auth_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_group_members_auth(*group_ids):
+    invalidate_user_auth(*Group.objects.filter(pk__in=group_ids).values_list('user__id', flat=True).exclude(user__id=None))
+
+
+# --- Middleware: request.user одразу отримує ролі та права з кешу
+class UserRolesMiddleware:
+    """
+    Має стояти після AuthenticationMiddleware; user, як і раніше, завантажується ліниво.
+    Під ASGI так само доповнює request.auser() для async-view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.user = SimpleLazyObject(lambda: self._load_user(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.user = SimpleLazyObject(lambda: self._load_user(request))
+        load_user = request.auser
+
+        async def auser():
+            user = await load_user()
+            if getattr(user, '_auth_cache', None) is None:
+                await sync_to_async(get_user_auth)(user)
+            return user
+
+        request.auser = auser
+        return await self.get_response(request)
+
+    @staticmethod
+    def _load_user(request):
+        user = get_user(request)
+        get_user_auth(user)
+        return user
+
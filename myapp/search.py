@@ -0,0 +1,64 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+
+# --- Повнотекстовий індекс товарів (SQLite FTS5)
+# unicode61 приводить до нижнього регістру будь-які літери (не лише ASCII, як LIKE),
+# тому "ТЕРМОС" знаходить "термос". rowid рядка індексу = Product.id.
+# Індекс синхронізують тригери БД (міграція 0018) — зокрема після QuerySet.update, bulk_create і bulk_update;
+# rebuild_index() потрібен лише для відновлення (команда rebuild_search_index).
+PRODUCT_FTS_TABLE = 'myapp_product_fts'
+
+# вага колонок для bm25: збіг у назві важить більше, ніж в описі
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_search_index_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """Перетворює введений текст на FTS5-запит: кожне слово в лапках і з префіксним пошуком."""
+    words = WORD_RE.findall(query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def rebuild_index():
+    """
+    Перебудовує індекс з таблиці товарів одним INSERT ... SELECT. Повертає кількість рядків.
+    Одна транзакція: пошук під час перебудови бачить старий індекс, а не порожню таблицю.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PRODUCT_FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {PRODUCT_FTS_TABLE} (rowid, name, description) "
+            f"SELECT id, name, description FROM myapp_product"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {PRODUCT_FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_products(queryset, query):
+    """
+    Фільтрує queryset товарів за повнотекстовим запитом і додає анотацію search_rank
+    (bm25: менше значення = релевантніший результат).
+    """
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+
+    # таблицю індексу приєднуємо один раз (rowid = id товару): MATCH відбирає рядки, bm25 рахується
+    # для того ж рядка індексу, а не окремим корельованим підзапитом на кожен товар
+    queryset = queryset.extra(
+        tables=[PRODUCT_FTS_TABLE],
+        where=[f'{PRODUCT_FTS_TABLE}.rowid = myapp_product.id', f'{PRODUCT_FTS_TABLE} MATCH %s'],
+        params=[match],
+    )
+    rank = RawSQL(f'bm25({PRODUCT_FTS_TABLE}, %s, %s)', [NAME_WEIGHT, DESCRIPTION_WEIGHT], output_field=FloatField())
+    return queryset.annotate(search_rank=rank)
@@ -1,19 +1,171 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import m2m_changed, post_save, post_delete, post_init, pre_delete
 from django.dispatch import receiver
-from django.utils.timezone import localtime
-from .models import Order, OrderNotification
-from django.contrib.auth.models import User
+from .models import Order, Comment, Product, Category, Booking, BookingItem, UserProfile
+from .featured import invalidate_featured_pool
+from .fragments import bump_product_card_version, bump_category_card_version
+from .jobs import enqueue
+from .roles import invalidate_group_members_auth, invalidate_user_auth
+from .auth_backends import invalidate_cached_user
+from .cart import merge_anonymous_cart, persist_user_cart
 
+# --- Сповіщення менеджерів виконується фоновим воркером (jobs.py, команда run_worker),
+# тож оформлення замовлення не чекає на запис сповіщень; задача ставиться в тій самій транзакції, що й замовлення
 @receiver(post_save, sender=Order)
-def notify_manager_on_order(sender, instance, created, **kwargs):
-    if created:
-        managers = User.objects.filter(groups__name='Manager')
-        local_date = localtime(instance.date)
-        formatted_date = local_date.strftime('%d.%m.%Y, %H:%M')
-
-        for manager in managers:
-            OrderNotification.objects.create(
-                user=manager,
-                order=instance,
-                message=f"Нове замовлення № {instance.id} від {formatted_date}"
-            )
\ No newline at end of file
+def notify_manager_on_order(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue('notify_managers', {'order_id': instance.id}, dedup_key=f'notify_managers:{instance.id}')
+
+
+# --- Статистика відгуків товару (Product.average_rating, review_count, rating_N_count)
+# запам'ятовуємо оцінку, з якою відгук був завантажений, щоб при редагуванні зсунути гістограму
+def _remember_comment_rating(instance):
+    instance._stats_snapshot = (instance.__dict__.get('product_id'), instance.__dict__.get('rating'))
+
+
+@receiver(post_init, sender=Comment)
+def comment_loaded(sender, instance, **kwargs):
+    _remember_comment_rating(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_rating_on_comment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    old_product_id, old_rating = (None, None) if created else instance._stats_snapshot
+    if old_product_id == instance.product_id:
+        Product.shift_rating_stats(instance.product_id, old_rating=old_rating, new_rating=instance.rating)
+    else:
+        if old_product_id:
+            Product.shift_rating_stats(old_product_id, old_rating=old_rating)
+            bump_product_card_version(old_product_id)
+        Product.shift_rating_stats(instance.product_id, new_rating=instance.rating)
+    bump_product_card_version(instance.product_id)
+
+    _remember_comment_rating(instance)
+    invalidate_featured_pool()
+
+
+# спрацьовує і для QuerySet.delete() та каскадного видалення (Django надсилає сигнал для кожного об'єкта)
+@receiver(post_delete, sender=Comment)
+def update_rating_on_comment_delete(sender, instance, **kwargs):
+    product_id, rating = instance._stats_snapshot
+    Product.shift_rating_stats(product_id, old_rating=rating)
+    bump_product_card_version(product_id)
+    invalidate_featured_pool()
+
+
+# --- Пул рекомендованих товарів головної сторінки (featured.py)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_featured_on_product_change(sender, instance, **kwargs):
+    invalidate_featured_pool()
+
+
+# --- Кеш відрендерених карток товарів (fragments.py)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_card_on_product_change(sender, instance, **kwargs):
+    bump_product_card_version(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cards_on_category_change(sender, instance, **kwargs):
+    bump_category_card_version(instance.pk)
+
+
+# --- Кешовані підсумки кошика (Booking.get_totals)
+@receiver(post_save, sender=BookingItem)
+@receiver(post_delete, sender=BookingItem)
+def invalidate_booking_totals_on_item_change(sender, instance, **kwargs):
+    Booking.invalidate_totals(instance.booking_id)
+
+
+def _invalidate_bookings_with_product(product_id):
+    booking_ids = BookingItem.objects.filter(product_id=product_id).values_list('booking_id', flat=True).distinct()
+    Booking.invalidate_totals(*booking_ids)
+
+
+@receiver(post_init, sender=Product)
+def product_loaded(sender, instance, **kwargs):
+    instance._loaded_price = instance.__dict__.get('price')
+
+
+@receiver(post_save, sender=Product)
+def invalidate_booking_totals_on_price_change(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    if instance.price != instance._loaded_price:
+        _invalidate_bookings_with_product(instance.pk)
+    instance._loaded_price = instance.price
+
+
+# при видаленні товару BookingItem.product стає NULL без сигналів, тож скидаємо підсумки заздалегідь
+@receiver(pre_delete, sender=Product)
+def invalidate_booking_totals_on_product_delete(sender, instance, **kwargs):
+    _invalidate_bookings_with_product(instance.pk)
+
+
+# --- Кешовані ролі та права користувача (roles.py)
+# user.groups.add(group) / group.user_set.add(user): instance — користувач або група залежно від reverse
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_auth_on_user_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_user_auth(instance.pk)
+    elif action == 'pre_clear':
+        # group.user_set.clear() / permission.user_set.clear(): pk_set порожній, беремо поточних учасників
+        invalidate_user_auth(*instance.user_set.values_list('id', flat=True))
+    else:
+        invalidate_user_auth(*pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_auth_on_group_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_group_members_auth(instance.pk)
+    elif action == 'pre_clear':
+        invalidate_group_members_auth(*instance.group_set.values_list('id', flat=True))
+    else:
+        invalidate_group_members_auth(*pk_set)
+
+
+# перейменування групи змінює роль; видалення прибирає зв'язки каскадно, без m2m_changed
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_auth_on_group_change(sender, instance, **kwargs):
+    invalidate_group_members_auth(instance.pk)
+
+
+# --- Кешований користувач сесії (auth_backends.py)
+# зміна пароля (UserPasswordUpdateView), даних профілю (UserUpdateView), last_login, is_active тощо
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_user_on_profile_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
+
+
+# --- Кошик у кеші (cart.py): запис у БД при вході та виході
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        merge_anonymous_cart(request, user)
+
+
+@receiver(user_logged_out)
+def persist_cart_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        persist_user_cart(user.pk)
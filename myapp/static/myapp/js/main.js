@@ -24,6 +24,20 @@ document.addEventListener('DOMContentLoaded', function() {
         return cookieValue;
     }
 
+    // --- Значок непрочитаних сповіщень (для менеджера) ---
+    const notificationBadge = document.querySelector('.notification-badge');
+    if (notificationBadge) {
+        fetch(notificationBadge.dataset.url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(response => response.json())
+            .then(data => {
+                if (data.unread_count > 0) {
+                    notificationBadge.innerText = data.unread_count;
+                    notificationBadge.hidden = false;
+                }
+            })
+            .catch(error => console.error('Error:', error));
+    }
+
     // --- Логика для навигации ---
     const navLinks = document.querySelectorAll('.product-tabs-nav .tab-link');
     if (navLinks.length > 0) {
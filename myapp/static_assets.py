@@ -0,0 +1,109 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий (pip install brotli): без нього створюються лише .gz
+    brotli = None
+
+
+# --- Статичні файли з хешем у назві та попередньо стиснутими копіями
+# collectstatic з цим сховищем пише style.<hash>.css, style.<hash>.css.gz і (якщо є brotli) style.<hash>.css.br;
+# {% static %} у шаблонах повертає назву з хешем з manifest
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html')
+MIN_COMPRESS_SIZE = 256
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # файл, якого немає в manifest (доданий після collectstatic), хешується на льоту замість помилки
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+
+        encoders = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda data: brotli.compress(data, quality=11)))
+
+        for suffix, compress in encoders:
+            compressed = compress(content)
+            # стиснута копія має сенс лише якщо вона помітно менша
+            if len(compressed) >= len(content) * 0.95:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+
+def storages_without_manifest():
+    """STORAGES для прогонів без DEBUG і без collectstatic (тести, бенчмарки): {% static %} — назви без хешу."""
+    return {**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+
+def _accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    return {part.split(';')[0].strip() for part in header.split(',')}
+
+
+@require_safe
+def serve_static(request, path):
+    """
+    Віддає файли зі STATIC_ROOT: обирає .br/.gz за Accept-Encoding, для назв з хешем
+    ставить Cache-Control immutable на рік (повторні візити не роблять запитів).
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except Exception:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding = None
+    accepted = _accepted_encodings(request)
+    for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if name in accepted and os.path.isfile(full_path + suffix):
+            full_path, encoding = full_path + suffix, name
+            break
+
+    stat = os.stat(full_path)
+    etag = f'"{int(stat.st_mtime)}-{stat.st_size}{"-" + encoding if encoding else ""}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type or 'application/octet-stream')
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(path) else REVALIDATE_CACHE_CONTROL
+    return response
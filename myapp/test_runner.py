@@ -0,0 +1,22 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from myapp.static_assets import storages_without_manifest
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Репліки в тестах — дзеркала default (TEST MIRROR) на окремих з'єднаннях, які не бачать даних,
+    створених у транзакції TestCase, тож увесь прогін читає з default. Маршрутизацію на репліки
+    перевіряють ReplicaRoutingTests з явним списком реплік.
+    Тести виконуються без DEBUG і без collectstatic, тому статика — без manifest (назви без хешу).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._settings_override = override_settings(DATABASE_REPLICAS=[], STORAGES=storages_without_manifest())
+        self._settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings_override.disable()
+        super().teardown_test_environment(**kwargs)
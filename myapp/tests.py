@@ -1,3 +1,1461 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from myapp.auth_backends import CachedUserBackend, user_cache_key
+from myapp.benchmarks.dataset import USERNAME_PREFIX, build_dataset
+from myapp.benchmarks.runner import ROUTES, compare_with_baseline, missing_routes, percentile, route_label, run_route
+from myapp.cart import CART_SESSION_ITEMS_KEY, CART_SESSION_KEY, Cart, check_cart_cache, flush_dirty_carts, get_cart_cache
+from myapp.catalog_io import CATALOG_FORMATS, export_catalog, import_catalog, read_rows
+from myapp.db_router import STICKY_COOKIE_NAME, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from myapp.featured import FEATURED_COUNT, FEATURED_POOL_CACHE_KEY, FEATURED_POOL_SIZE, build_featured_pool, get_featured_products
+from myapp.fragments import get_card_cache_stats, render_product_cards
+from myapp.images import update_product_variants
+from myapp.instrumentation import QueryRecorder, get_instrumentation_settings, get_query_report, record_route_stats, reset_query_report
+from myapp.jobs import JOB_HANDLERS, claim_jobs, enqueue, notify_managers_about_order, run_pending_jobs
+from myapp.models import (
+    RATING_STATS_FIELDS, BackgroundJob, Booking, BookingItem, Category, Comment, Order, OrderNotification, Product, UserProfile,
+    rating_average,
+)
+from myapp.notifications import get_unread_notifications_count
+from myapp.pagination import KeysetPaginationMixin, cursor_fields, decode_cursor, encode_cursor
+from myapp.roles import ROLE_CLIENT, ROLE_MANAGER, get_user_auth
+from myapp.search import rebuild_index, search_products
+from myapp.static_assets import serve_static
+from myapp.views import OrderNotificationView
+
+
+# --- Навантажувальний тест (повний прогін: python manage.py run_benchmark)
+BENCHMARK_TEST_SCALE = {'categories': 3, 'products': 40, 'comments': 120, 'orders': 15, 'customers': 5, 'managers': 2}
+
+
+class BenchmarkSuiteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(BENCHMARK_TEST_SCALE)
+
+    def test_every_named_route_has_scenario(self):
+        self.assertEqual(missing_routes(), [])
+
+    @override_settings(QUERY_INSTRUMENTATION={'ENABLED': False})
+    def test_all_routes_respond_on_small_dataset(self):
+        # один клієнт — запити йдуть у тому ж з'єднанні, що й транзакція TestCase
+        for route in ROUTES:
+            with self.subTest(route=route_label(route)):
+                stats = run_route(route, clients=1, requests=2, warmup=0)
+                self.assertEqual(stats['errors'], 0)
+                self.assertGreater(stats['p50_ms'], 0)
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_compare_with_baseline(self):
+        baseline = {'product_list': {'p95_ms': 10.0, 'queries_max': 2, 'errors': 0}}
+        self.assertEqual(compare_with_baseline({'product_list': {'p95_ms': 11.0, 'queries_max': 2, 'errors': 0}}, baseline, 0.2), [])
+        regressions = compare_with_baseline({'product_list': {'p95_ms': 15.0, 'queries_max': 3, 'errors': 0}}, baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+
+
+# --- Плани запитів гарячих сторінок: жодного повного сканування таблиць
+# повне сканування — рядок плану "SCAN <таблиця>" без індексу; виняток — читання в порядку
+# первинного ключа з LIMIT (перша сторінка каталогу без фільтрів), воно зупиняється після сторінки.
+# Сортування в тимчасовому B-дереві теж рахується: воно читає всі рядки, що пройшли фільтр
+FULL_SCAN_RE = re.compile(r'^SCAN (myapp_\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+PK_ORDER_LIMIT_RE = re.compile(r'ORDER BY "myapp_\w+"\."id" ASC LIMIT')
+# довідник категорій показується повністю на кожній сторінці каталогу
+SMALL_TABLES = {'myapp_category'}
+
+
+def explain_query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[3] for row in cursor.fetchall()]
+
+
+def unindexed_plan_steps(sql):
+    scans = []
+    for detail in explain_query_plan(sql):
+        match = FULL_SCAN_RE.match(detail)
+        if match and match.group(1) not in SMALL_TABLES and not PK_ORDER_LIMIT_RE.search(sql):
+            scans.append(detail)
+        elif detail == TEMP_SORT:
+            scans.append(detail)
+    return scans
+
+
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(BENCHMARK_TEST_SCALE)
+        cls.manager = User.objects.get(username=f'{USERNAME_PREFIX}manager_0')
+        cls.customer = User.objects.get(username=f'{USERNAME_PREFIX}customer_0')
+        cls.category_id = Product.objects.filter(is_active=True).values_list('category_id', flat=True).first()
+
+    def setUp(self):
+        # плани перевіряємо для запитів, які реально йдуть у БД, а не з кешу
+        cache.clear()
+
+    def assertNoFullTableScans(self, user, url, params=None):
+        if user is not None:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or '"myapp_' not in sql:
+                continue
+            checked += 1
+            self.assertEqual(unindexed_plan_steps(sql), [], sql)
+        self.assertGreater(checked, 0)
+        return response
+
+    def test_product_list(self):
+        url = reverse('product_list')
+        for params in ({}, {'sort': 'price_asc'}, {'sort': 'price_desc'}, {'category': self.category_id},
+                       {'category': self.category_id, 'sort': 'price_asc'}, {'category': self.category_id, 'sort': 'price_desc'}):
+            with self.subTest(params=params):
+                response = self.assertNoFullTableScans(None, url, params)
+                # наступна сторінка — з курсором
+                next_query = response.context['page_obj'].next_query
+                if next_query:
+                    self.assertNoFullTableScans(None, f'{url}?{next_query}')
+
+    def test_order_list(self):
+        self.assertNoFullTableScans(self.customer, reverse('order_list'))
+
+    def test_order_notifications(self):
+        url = reverse('order_notification')
+        for params in ({}, {'filter': 'read'}, {'filter': 'all'}):
+            with self.subTest(params=params):
+                self.assertNoFullTableScans(self.manager, url, params)
+        self.assertNoFullTableScans(self.manager, reverse('order_notification_unread_count'))
+
+    def test_full_scan_is_detected(self):
+        self.assertEqual(unindexed_plan_steps('SELECT id FROM myapp_order WHERE total_price > 0'), ['SCAN myapp_order'])
+
+
+# --- Налаштування з'єднання SQLite (settings.SQLITE_PRAGMAS, OPTIONS['transaction_mode'])
+class SQLiteTuningTests(TestCase):
+
+    def test_pragmas_applied_on_connection(self):
+        # тестова БД у пам'яті не має журналу WAL і mmap, решта PRAGMA застосовуються як на робочій
+        expected = {name: value for name, value in settings.SQLITE_PRAGMAS.items() if name not in ('journal_mode', 'mmap_size')}
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    actual = cursor.fetchone()[0]
+                    if name == 'synchronous':
+                        actual = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}[actual]
+                    self.assertEqual(str(actual), str(value))
+
+    def test_write_transactions_begin_immediate(self):
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+# --- Репліки для читання: маршрутизація та read-your-writes
+class ReplicaRoutingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Репліки')
+
+    def setUp(self):
+        # псевдонім без налаштувань: маршрутизація перевіряється без з'єднань з репліками
+        self.router = PrimaryReplicaRouter(replicas=['test_replica'])
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False, view_body=None):
+        """Виконує запит через middleware; повертає БД для читання до і після запису та відповідь."""
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(Product)
+            seen['read_auth'] = self.router.db_for_read(User)
+            if view_body:
+                view_body()
+            if write:
+                seen['write'] = self.router.db_for_write(Product)
+                Category.objects.filter(pk=self.category.pk).update(name='Репліки')
+                seen['read_after_write'] = self.router.db_for_read(Product)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen, response
+
+    def test_lookup_without_write_does_not_pin_primary(self):
+        # get_or_create знайденого рядка викликає db_for_write, але нічого не пише
+        seen, response = self.route(self.factory.get('/'), view_body=lambda: Category.objects.get_or_create(name='Репліки'))
+        self.assertNotIn(STICKY_COOKIE_NAME, response.cookies)
+
+        seen, response = self.route(self.factory.get('/'), view_body=lambda: Category.objects.get_or_create(name='Нова'))
+        self.assertIn(STICKY_COOKIE_NAME, response.cookies)
+
+    def test_outside_request_reads_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_safe_request_reads_replica(self):
+        seen, response = self.route(self.factory.get('/'))
+        self.assertEqual(seen['read'], 'test_replica')
+        self.assertEqual(seen['read_auth'], 'default')
+        self.assertNotIn(STICKY_COOKIE_NAME, response.cookies)
+
+    def test_write_pins_request_and_sets_sticky_cookie(self):
+        seen, response = self.route(self.factory.post('/'), write=True)
+        self.assertEqual(seen['read'], 'default')
+        self.assertEqual(seen['write'], 'default')
+        self.assertIn(STICKY_COOKIE_NAME, response.cookies)
+
+        seen, _ = self.route(self.factory.get('/'), write=True)
+        self.assertEqual(seen['read'], 'test_replica')
+        self.assertEqual(seen['read_after_write'], 'default')
+
+    def test_sticky_cookie_reads_primary(self):
+        _, response = self.route(self.factory.post('/'), write=True)
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE_NAME] = response.cookies[STICKY_COOKIE_NAME].value
+        seen, _ = self.route(request)
+        self.assertEqual(seen['read'], 'default')
+
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE_NAME] = '0'
+        seen, _ = self.route(request)
+        self.assertEqual(seen['read'], 'test_replica')
+
+    def test_no_replicas_reads_primary(self):
+        self.router = PrimaryReplicaRouter(replicas=[])
+        seen, _ = self.route(self.factory.get('/'))
+        self.assertEqual(seen['read'], 'default')
+
+
+# --- Кошик у кеші (write-behind): кліки без запису в БД, запис при вході та flush_carts
+# у тестах псевдонім 'carts' — locmem в одному процесі, тож write-behind можна перевірити без redis
+@override_settings(CART_WRITE_BEHIND=True)
+class SessionCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(BENCHMARK_TEST_SCALE)
+        cls.customer = User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').first()
+        cls.product_ids = list(Product.objects.filter(is_active=True).values_list('pk', flat=True)[:3])
+
+    def setUp(self):
+        cache.clear()
+        get_cart_cache().clear()
+
+    @staticmethod
+    def write_queries(context):
+        return [query['sql'] for query in context.captured_queries if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+    def cart_in_db(self):
+        return dict(BookingItem.objects.filter(booking__user=self.customer).values_list('product_id', 'quantity'))
+
+    def test_cart_clicks_do_not_write_to_database(self):
+        self.client.force_login(self.customer)
+        first, second, _ = self.product_ids
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(reverse('booking_create'), {'product_id': first})
+            self.client.post(reverse('booking_create'), {'product_id': first})
+            self.client.post(reverse('booking_create'), {'product_id': second})
+            self.client.post(reverse('booking_update_quantity'), {'product_id': second, 'quantity': 4})
+            response = self.client.post(reverse('booking_delete'), {'product_id': first})
+        self.assertEqual(self.write_queries(context), [])
+        self.assertEqual(response.json()['item_count'], 4)
+        self.assertEqual(self.cart_in_db(), {})
+
+        self.assertEqual(flush_dirty_carts(), 1)
+        self.assertEqual(self.cart_in_db(), {second: 4})
+        self.assertEqual(flush_dirty_carts(), 0)
+
+    def test_cart_survives_eviction_of_default_cache(self):
+        self.client.force_login(self.customer)
+        first, second, _ = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        self.client.post(reverse('booking_create'), {'product_id': second})
+        # фрагменти карток та інші записи переповнюють default (locmem: 300 записів), але не псевдонім 'carts'
+        for i in range(400):
+            cache.set(f'filler:{i}', i)
+        response = self.client.get(reverse('booking_detail'))
+        self.assertEqual([line['product'].pk for line in response.context['cart_items']], [first, second])
+        self.assertEqual(flush_dirty_carts(), 1)
+        self.assertEqual(self.cart_in_db(), {first: 1, second: 1})
+
+    @override_settings(CACHES={**settings.CACHES, 'carts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_write_behind_rejects_volatile_cache(self):
+        self.assertEqual([error.id for error in check_cart_cache(None)], ['myapp.E001'])
+
+    def test_anonymous_cart_merged_on_login(self):
+        first, second, _ = self.product_ids
+        Booking.objects.create(user=self.customer).items.create(product_id=first, quantity=2)
+
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        self.client.post(reverse('booking_create'), {'product_id': second})
+        response = self.client.get(reverse('booking_detail'))
+        self.assertEqual([(line['product'].pk, line['quantity']) for line in response.context['cart_items']], [(first, 1), (second, 1)])
+
+        self.client.force_login(self.customer)
+        self.assertEqual(self.cart_in_db(), {first: 3, second: 1})
+        self.assertNotIn(CART_SESSION_KEY, self.client.session)
+
+    def test_checkout_persists_cart_and_empties_it(self):
+        self.client.force_login(self.customer)
+        first, _, _ = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        response = self.client.post(reverse('order_create'), {
+            'action_type': 'submit_order', 'delivery_address': 'вул. Тестова, 1', 'payment_method': 'cash_on_delivery',
+        })
+        self.assertEqual(response.status_code, 302)
+        order = Order.objects.filter(user=self.customer).latest('pk')
+        self.assertEqual(list(order.items.values_list('product_id', 'quantity')), [(first, 1)])
+        self.assertEqual(self.cart_in_db(), {})
+        self.assertEqual(self.client.get(reverse('booking_detail')).context['cart_items'], [])
+
+    def test_checkout_query_count_does_not_depend_on_cart_size(self):
+        self.client.force_login(self.customer)
+        # кошик у БД уже є — обидва оформлення виконують ті самі кроки
+        Booking.objects.create(user=self.customer)
+        counts = []
+        for product_ids in (self.product_ids[:1], self.product_ids):
+            for product_id in product_ids:
+                self.client.post(reverse('booking_create'), {'product_id': product_id})
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(reverse('order_create'), {
+                    'action_type': 'submit_order', 'delivery_address': 'вул. Тестова, 1', 'payment_method': 'cash_on_delivery',
+                })
+            counts.append(len(context.captured_queries))
+            order = Order.objects.filter(user=self.customer).latest('pk')
+            prices = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'price'))
+            self.assertEqual(order.total_price, sum(prices.values()))
+            self.assertEqual(order.items.count(), len(product_ids))
+            # сповіщення менеджерам — фоновою задачею, а не в запиті оформлення
+            self.assertTrue(BackgroundJob.objects.filter(dedup_key=f'notify_managers:{order.pk}').exists())
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(self.cart_in_db(), {})
+
+    def test_batch_update_applies_changes_in_one_request(self):
+        self.client.force_login(self.customer)
+        first, second, third = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        response = self.client.post(reverse('booking_batch_update'), {'items': [
+            {'product_id': first, 'quantity': 0},
+            {'product_id': second, 'quantity': 3},
+            {'product_id': third, 'quantity': 1},
+        ]}, content_type='application/json')
+        data = response.json()
+        prices = dict(Product.objects.filter(pk__in=[second, third]).values_list('pk', 'price'))
+        self.assertEqual(data['item_count'], 4)
+        self.assertEqual(Decimal(data['total_price']), prices[second] * 3 + prices[third])
+        self.assertEqual(self.cart_in_db(), {second: 3, third: 1})
+
+        response = self.client.post(reverse('booking_batch_update'), {'items': [
+            {'product_id': second, 'quantity': 5}, {'product_id': 0, 'quantity': 1},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.cart_in_db(), {second: 3, third: 1})
+        self.assertEqual(self.client.post(reverse('booking_batch_update'), 'not json', content_type='application/json').status_code, 400)
+
+    def test_batch_update_rejects_out_of_range_values(self):
+        self.client.force_login(self.customer)
+        first = self.product_ids[0]
+        self.client.post(reverse('booking_batch_update'), {'items': [{'product_id': first, 'quantity': 2}]}, content_type='application/json')
+        for item in ({'product_id': first, 'quantity': 10 ** 20}, {'product_id': first, 'quantity': 1000},
+                     {'product_id': first, 'quantity': -1}, {'product_id': 10 ** 20, 'quantity': 1}):
+            with self.subTest(item=item):
+                response = self.client.post(reverse('booking_batch_update'), {'items': [item]}, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cart_in_db(), {first: 2})
+
+    def test_add_quantities_is_atomic_increment(self):
+        first, second, _ = self.product_ids
+        booking = Booking.objects.create(user=self.customer)
+        booking.items.create(product_id=first, quantity=2)
+        with CaptureQueriesContext(connection) as context:
+            booking.add_quantities({first: 3})
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('"quantity" = ("myapp_bookingitem"."quantity" + 3)', context.captured_queries[0]['sql'])
+        booking.add_quantities({second: 1})
+        self.assertEqual(self.cart_in_db(), {first: 5, second: 1})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            booking.items.create(product_id=first, quantity=1)
+
+    def test_add_quantities_invalidates_totals_after_commit(self):
+        first = self.product_ids[0]
+        booking = Booking.objects.create(user=self.customer)
+        booking.items.create(product_id=first, quantity=1)
+        cache.set(Booking.totals_cache_key(booking.pk), 'stale')
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.add_quantities({first: 1})
+        self.assertEqual(cache.get(Booking.totals_cache_key(booking.pk)), 'stale')
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(Booking.totals_cache_key(booking.pk)))
+
+
+
+# --- Кошик без write-behind (CACHE_BACKEND locmem): одразу в БД або в сесію, кеш можна втратити
+@override_settings(CART_WRITE_BEHIND=False)
+class WriteThroughCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(BENCHMARK_TEST_SCALE)
+        cls.customer = User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').first()
+        cls.product_ids = list(Product.objects.filter(is_active=True).values_list('pk', flat=True)[:2])
+
+    def cart_in_db(self):
+        return dict(BookingItem.objects.filter(booking__user=self.customer).values_list('product_id', 'quantity'))
+
+    def test_user_cart_written_to_database_and_survives_cache_loss(self):
+        self.client.force_login(self.customer)
+        first, second = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        self.client.post(reverse('booking_create'), {'product_id': second})
+        self.assertEqual(self.cart_in_db(), {first: 2, second: 1})
+
+        cache.clear()
+        get_cart_cache().clear()
+        response = self.client.get(reverse('booking_detail'))
+        self.assertEqual([(line['product'].pk, line['quantity']) for line in response.context['cart_items']], [(first, 2), (second, 1)])
+        self.assertEqual(flush_dirty_carts(), 0)
+
+    def test_cart_click_writes_one_row(self):
+        product_ids = list(Product.objects.values_list('pk', flat=True)[:20])
+        self.client.force_login(self.customer)
+        booking = Booking.objects.create(user=self.customer)
+        BookingItem.objects.bulk_create(BookingItem(booking=booking, product_id=product_id, quantity=1) for product_id in product_ids)
+        first, second = product_ids[:2]
+        clicks = [
+            ('booking_create', {'product_id': first}, '"quantity" = MIN(("myapp_bookingitem"."quantity" + 1), 999)'),
+            ('booking_update_quantity', {'product_id': second, 'quantity': 5}, 'UPDATE "myapp_bookingitem" SET "quantity" = 5'),
+            ('booking_delete', {'product_id': second}, 'DELETE FROM "myapp_bookingitem" WHERE "myapp_bookingitem"."id" IN'),
+        ]
+        for url_name, data, expected_sql in clicks:
+            with self.subTest(url=url_name), CaptureQueriesContext(connection) as context:
+                self.client.post(reverse(url_name), data)
+                writes = [query['sql'] for query in context.captured_queries if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+                self.assertEqual(len(writes), 1, writes)
+                self.assertIn(expected_sql, writes[0])
+        self.assertEqual(self.cart_in_db()[first], 2)
+        self.assertNotIn(second, self.cart_in_db())
+        self.assertEqual(len(self.cart_in_db()), 19)
+
+    def test_click_totals_come_from_booking_cache(self):
+        self.client.force_login(self.customer)
+        first, second = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': first})
+        booking = Booking.objects.get(user=self.customer)
+        self.assertIsNotNone(cache.get(Booking.totals_cache_key(booking.pk)))
+
+        product = Product.objects.get(pk=first)
+        product.price = Decimal('12.34')
+        product.save()
+        data = self.client.post(reverse('booking_create'), {'product_id': second}).json()
+        self.assertEqual(Decimal(data['total_price']), Decimal('12.34') + Product.objects.get(pk=second).price)
+        self.assertEqual(data['item_count'], 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(Cart.for_user(self.customer.pk).get_totals()['item_count'], 2)
+
+    def test_anonymous_cart_in_session_merged_on_login(self):
+        first, second = self.product_ids
+        self.client.post(reverse('booking_create'), {'product_id': second})
+        self.assertEqual(self.client.session[CART_SESSION_ITEMS_KEY], [[second, 1]])
+
+        self.client.force_login(self.customer)
+        self.assertEqual(self.cart_in_db(), {second: 1})
+        self.assertNotIn(CART_SESSION_ITEMS_KEY, self.client.session)
+
+
+# --- Збережена статистика відгуків товару (Product.shift_rating_stats, команда rebuild_ratings)
+class ProductRatingStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Відгуки')
+        cls.first = Product.objects.create(name='Перший', category=category, price=100)
+        cls.second = Product.objects.create(name='Другий', category=category, price=200)
+        cls.users = [User.objects.create_user(f'reviewer-{i}', password='x') for i in range(3)]
+
+    def assertStatsMatchComments(self):
+        """Збережені поля збігаються з set_rating_stats по гістограмі з таблиці Comment."""
+        for product in (self.first, self.second):
+            histogram = dict(
+                Comment.objects.filter(product=product).values_list('rating').annotate(total=Count('id')).values_list('rating', 'total')
+            )
+            expected = Product(pk=product.pk)
+            expected.set_rating_stats(histogram)
+            stored = Product.objects.filter(pk=product.pk).values(*RATING_STATS_FIELDS).get()
+            self.assertEqual(stored, {field: getattr(expected, field) for field in RATING_STATS_FIELDS})
+
+    def test_stats_follow_create_edit_move_and_delete(self):
+        comments = [
+            Comment.objects.create(product=self.first, user=user, text='ok', rating=rating)
+            for user, rating in zip(self.users, (5, 4, 2))
+        ]
+        self.assertStatsMatchComments()
+        self.assertEqual(Product.objects.get(pk=self.first.pk).average_rating, 3.7)
+
+        edited = Comment.objects.get(pk=comments[2].pk)
+        edited.rating = 5
+        edited.save()
+        self.assertStatsMatchComments()
+
+        moved = Comment.objects.get(pk=comments[1].pk)
+        moved.product = self.second
+        moved.save()
+        self.assertStatsMatchComments()
+        self.assertEqual(Product.objects.get(pk=self.second.pk).rating_4_count, 1)
+
+        Comment.objects.get(pk=comments[0].pk).delete()
+        self.assertStatsMatchComments()
+        Comment.objects.all().delete()
+        self.assertStatsMatchComments()
+        self.assertEqual(Product.objects.get(pk=self.first.pk).average_rating, 0.0)
+
+    def test_incremental_and_rebuild_round_half_up_alike(self):
+        # 9 / 4 = 2.25: round() Python дав би 2.2, ROUND() SQLite — 2.3
+        for user, rating in zip(self.users, (1, 2, 3)):
+            Comment.objects.create(product=self.first, user=user, text='ok', rating=rating)
+        Comment.objects.create(product=self.first, user=User.objects.create_user('reviewer-extra'), text='ok', rating=3)
+        self.assertEqual(Product.objects.get(pk=self.first.pk).average_rating, 2.3)
+        call_command('rebuild_ratings', stdout=io.StringIO())
+        self.assertEqual(Product.objects.get(pk=self.first.pk).average_rating, 2.3)
+        self.assertEqual([rating_average(rating_sum, 20) for rating_sum in (45, 47, 49)], [2.3, 2.4, 2.5])
+
+    def test_rebuild_ratings_restores_stats(self):
+        for user, rating in zip(self.users, (1, 3, 3)):
+            Comment.objects.create(product=self.second, user=user, text='ok', rating=rating)
+        Product.objects.update(average_rating=4.9, review_count=42, rating_3_count=0, rating_5_count=7)
+        call_command('rebuild_ratings', batch_size=1, stdout=io.StringIO())
+        self.assertStatsMatchComments()
+
+
+# --- Пул рекомендованих товарів головної сторінки (featured.py)
+class FeaturedProductsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Головна')
+        Product.objects.bulk_create(
+            Product(name=f'Товар {i}', category=category, price=100, is_active=i % 4 != 0) for i in range(40)
+        )
+        # розріджені id: частину товарів видалено
+        Product.objects.filter(pk__in=list(Product.objects.values_list('pk', flat=True)[10:25])).delete()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pool_contains_only_active_products(self):
+        pool = build_featured_pool(pool_size=FEATURED_POOL_SIZE)
+        active_ids = set(Product.objects.filter(is_active=True).values_list('pk', flat=True))
+        self.assertEqual({product.pk for product in pool}, active_ids)
+        self.assertEqual(len(pool), len(active_ids))
+        self.assertEqual(len(build_featured_pool(pool_size=5)), 5)
+
+    def test_cached_pool_serves_without_queries(self):
+        self.assertEqual(len(get_featured_products()), FEATURED_COUNT)
+        with self.assertNumQueries(0):
+            featured = get_featured_products()
+        self.assertEqual(len({product.pk for product in featured}), FEATURED_COUNT)
+
+    def test_pool_invalidated_by_product_change(self):
+        get_featured_products()
+        product = Product.objects.filter(is_active=True).first()
+        product.is_active = False
+        product.save()
+        self.assertIsNone(cache.get(FEATURED_POOL_CACHE_KEY))
+        self.assertNotIn(product.pk, [featured.pk for featured in get_featured_products(count=FEATURED_POOL_SIZE)])
+
+
+# --- Кеш відрендерених карток товарів (fragments.py)
+class ProductCardFragmentsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Картки')
+        Product.objects.bulk_create(Product(name=f'Картка {i}', category=cls.category, price=100) for i in range(3))
+        cls.user = User.objects.create_user('card-reviewer', password='x')
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        return dict((product.pk, str(html)) for product, html in render_product_cards(Product.objects.order_by('pk'), 'catalog'))
+
+    def misses_after(self, action):
+        before = get_card_cache_stats()['misses']
+        action()
+        cards = self.render()
+        return get_card_cache_stats()['misses'] - before, cards
+
+    def test_second_render_comes_from_cache(self):
+        self.render()
+        with self.assertNumQueries(1):
+            self.render()
+        self.assertEqual(get_card_cache_stats(), {'hits': 3, 'misses': 3, 'hit_ratio': 0.5})
+
+    def test_product_and_category_changes_rerender_affected_cards(self):
+        self.render()
+        product = Product.objects.order_by('pk').first()
+
+        def rename():
+            product.name = 'Нова назва'
+            product.save()
+        misses, cards = self.misses_after(rename)
+        self.assertEqual(misses, 1)
+        self.assertIn('Нова назва', cards[product.pk])
+
+        misses, _ = self.misses_after(lambda: Comment.objects.create(product=product, user=self.user, text='ok', rating=5))
+        self.assertEqual(misses, 1)
+
+        misses, _ = self.misses_after(lambda: self.category.save())
+        self.assertEqual(misses, 3)
+
+
+# --- Кешовані підсумки кошика (Booking.get_totals)
+class BookingTotalsCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Кошик')
+        cls.cheap = Product.objects.create(name='Дешевий', category=category, price=Decimal('10.50'))
+        cls.expensive = Product.objects.create(name='Дорогий', category=category, price=Decimal('99.99'))
+        cls.user = User.objects.create_user('totals-user', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.booking = Booking.objects.create(user=self.user)
+        self.item = self.booking.items.create(product=self.cheap, quantity=2)
+        self.booking.items.create(product=self.expensive, quantity=1)
+
+    def totals(self):
+        return Booking.objects.get(pk=self.booking.pk).get_totals()
+
+    def test_totals_aggregated_once_and_cached(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.totals(), {'total_price': Decimal('120.99'), 'item_count': 3})
+        with self.assertNumQueries(1):
+            self.totals()
+
+    def test_cache_invalidated_by_items_and_prices(self):
+        self.totals()
+        self.item.quantity = 4
+        self.item.save()
+        self.assertEqual(self.totals(), {'total_price': Decimal('141.99'), 'item_count': 5})
+
+        self.expensive.price = Decimal('50.00')
+        self.expensive.save()
+        self.assertEqual(self.totals()['total_price'], Decimal('92.00'))
+
+        self.cheap.delete()
+        self.assertEqual(self.totals(), {'total_price': Decimal('50.00'), 'item_count': 1})
+
+
+# --- Фонові задачі: сповіщення менеджерів про замовлення (jobs.py)
+class BackgroundJobsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        manager_group, _ = Group.objects.get_or_create(name=ROLE_MANAGER)
+        cls.managers = [User.objects.create_user(f'job-manager-{i}', password='x') for i in range(2)]
+        manager_group.user_set.add(*cls.managers)
+        cls.customer = User.objects.create_user('job-customer', password='x')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_order_enqueues_notification_once(self):
+        order = Order.objects.create(user=self.customer, total_price=10)
+        self.assertEqual(OrderNotification.objects.count(), 0)
+        enqueue('notify_managers', {'order_id': order.pk}, dedup_key=f'notify_managers:{order.pk}')
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+        self.assertEqual(run_pending_jobs(), (1, 0))
+        self.assertEqual(
+            set(OrderNotification.objects.values_list('user_id', 'order_id')),
+            {(manager.pk, order.pk) for manager in self.managers},
+        )
+        self.assertEqual(BackgroundJob.objects.get().status, BackgroundJob.STATUS_DONE)
+        self.assertEqual(run_pending_jobs(), (0, 0))
+
+        # повторне виконання не дублює сповіщень
+        notify_managers_about_order(order.pk)
+        self.assertEqual(OrderNotification.objects.count(), len(self.managers))
+
+    def test_failed_job_retried_with_backoff_then_failed(self):
+        enqueue('notify_managers', {'order_id': 1}, dedup_key='broken')
+        job = BackgroundJob.objects.get()
+        job.max_attempts = 2
+        job.save()
+
+        with patch.dict(JOB_HANDLERS, {'notify_managers': Mock(side_effect=RuntimeError('boom'))}), self.assertLogs('myapp.jobs'):
+            self.assertEqual(run_pending_jobs(), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_PENDING, 1))
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(run_pending_jobs(), (0, 0))
+
+            BackgroundJob.objects.update(run_after=timezone.now())
+            self.assertEqual(run_pending_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_FAILED, 2))
+        self.assertEqual(job.last_error, 'RuntimeError: boom')
+
+    def test_stale_running_job_is_reclaimed(self):
+        order = Order.objects.create(user=self.customer, total_price=10)
+        BackgroundJob.objects.update(status=BackgroundJob.STATUS_RUNNING, updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([job.payload for job in claim_jobs(10)], [{'order_id': order.pk}])
+
+
+# --- Сповіщення менеджера: лічильники, курсорна пагінація, позначення прочитаними
+class OrderNotificationsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('notified-manager', password='x')
+        customer = User.objects.create_user('notifying-customer', password='x')
+        orders = Order.objects.bulk_create(Order(user=customer, total_price=10) for _ in range(7))
+        OrderNotification.objects.bulk_create(
+            OrderNotification(user=cls.manager, order=order, message=f'Замовлення {order.pk}', is_read=i < 2)
+            for i, order in enumerate(orders)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.manager)
+
+    def unread_ids(self):
+        return set(OrderNotification.objects.filter(user=self.manager, is_read=False).values_list('pk', flat=True))
+
+    def test_counters_and_cursor_pages(self):
+        url = reverse('order_notification')
+        with patch.object(OrderNotificationView, 'paginate_by', 2):
+            response = self.client.get(url, {'filter': 'all'})
+            self.assertEqual(
+                {key: response.context[key] for key in ('unread_count', 'read_count', 'total_count')},
+                {'unread_count': 5, 'read_count': 2, 'total_count': 7},
+            )
+            seen = []
+            while True:
+                page = response.context['page_obj']
+                seen.extend(notification.pk for notification in page)
+                if not page.has_next:
+                    break
+                response = self.client.get(f'{url}?{page.next_query}')
+        expected = OrderNotification.objects.filter(user=self.manager).order_by('-created_at', '-id')
+        self.assertEqual(seen, list(expected.values_list('pk', flat=True)))
+
+    def test_mark_selected_and_all_in_one_update(self):
+        url = reverse('order_notification')
+        selected = sorted(self.unread_ids())[:3]
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(url, {'action': 'mark_selected', 'notification_ids': [*map(str, selected), 'x']})
+        self.assertEqual(len([query for query in context.captured_queries if query['sql'].startswith('UPDATE "myapp_ordernotification"')]), 1)
+        self.assertEqual(len(self.unread_ids()), 2)
+
+        self.client.post(url, {'action': 'mark_all'})
+        self.assertEqual(self.unread_ids(), set())
+
+    def test_unread_count_cached_until_marked_read(self):
+        url = reverse('order_notification_unread_count')
+        self.assertEqual(self.client.get(url).json(), {'unread_count': 5})
+        self.assertEqual(get_unread_notifications_count(self.manager), 5)
+        with self.assertNumQueries(0):
+            get_unread_notifications_count(self.manager)
+
+        self.client.post(reverse('order_notification'), {'action': 'notification', 'notification_id': str(min(self.unread_ids()))})
+        self.assertEqual(self.client.get(url).json(), {'unread_count': 4})
+
+
+# --- Віддача медіафайлів (media_serving.py)
+class MediaServingTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        with open(f'{media_root}/file.txt', 'wb') as target:
+            target.write(b'0123456789')
+        self.url = f'{settings.MEDIA_URL}file.txt'
+
+    def test_full_file_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_byte_ranges(self):
+        cases = [('bytes=2-5', b'2345', 'bytes 2-5/10'), ('bytes=7-', b'789', 'bytes 7-9/10'), ('bytes=-3', b'789', 'bytes 7-9/10')]
+        for header, body, content_range in cases:
+            with self.subTest(range=header):
+                response = self.client.get(self.url, headers={'Range': header})
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=20-'})
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+        # If-Range зі старим ETag — весь файл
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_offload_and_missing_files(self):
+        with override_settings(MEDIA_SERVE_MODE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/file.txt')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_SERVE_MODE='x-sendfile'):
+            self.assertTrue(self.client.get(self.url)['X-Sendfile'].endswith('file.txt'))
+
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}missing.txt').status_code, 404)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}..%2Fsecret.txt').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+
+# --- Імпорт / експорт каталогу (catalog_io.py)
+class CatalogImportExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Чайники')
+        Product.objects.create(sku='KT-1', name='Чайник скляний', category=category, description='1,7 л', price=Decimal('899.00'))
+        Product.objects.create(sku='KT-2', name='Чайник сталевий', category=category, description='', price=Decimal('650.50'), is_active=False)
+
+    def export(self, fmt):
+        file = io.StringIO()
+        export_catalog(file, fmt)
+        file.seek(0)
+        return file
+
+    def test_round_trip_changes_nothing(self):
+        for fmt in CATALOG_FORMATS:
+            with self.subTest(fmt=fmt):
+                stats = import_catalog(read_rows(self.export(fmt), fmt))
+                self.assertEqual((stats['created'], stats['updated'], stats['unchanged'], stats['error_count']), (0, 0, 2, 0))
+
+    def test_import_creates_and_updates_by_sku(self):
+        rows = [json.loads(line) for line in self.export('jsonl')]
+        rows[0]['price'] = '799.00'
+        rows.append({'sku': 'TH-1', 'name': 'Термос', 'category': 'Термоси', 'price': '450', 'is_active': 'так'})
+        stats = import_catalog(enumerate(rows, start=1))
+        self.assertEqual((stats['created'], stats['updated'], stats['categories_created']), (1, 1, 1))
+        self.assertEqual(Product.objects.get(sku='KT-1').price, Decimal('799.00'))
+        self.assertEqual(Product.objects.get(sku='TH-1').category.name, 'Термоси')
+        # імпорт (bulk_create) одразу потрапляє в повнотекстовий індекс
+        self.assertEqual(list(search_products(Product.objects.all(), 'термос').values_list('sku', flat=True)), ['TH-1'])
+
+    def test_image_change_resets_variants(self):
+        variants = {'card': {'name': 'myapp/images/variants/old_jpg_card.webp', 'width': 400}}
+        Product.objects.filter(sku='KT-1').update(image='myapp/images/old.jpg', image_variants=variants)
+        Product.objects.filter(sku='KT-2').update(image_variants=variants)
+        rows = [json.loads(line) for line in self.export('jsonl')]
+        rows[0]['image'] = 'myapp/images/new.jpg'
+        rows[1]['name'] = 'Чайник сталевий 2 л'
+        import_catalog(enumerate(rows, start=1))
+
+        changed = Product.objects.get(sku='KT-1')
+        self.assertEqual(changed.image_variants, {})
+        self.assertEqual(changed.card_image_url, '/media/myapp/images/new.jpg')
+        self.assertEqual(Product.objects.get(sku='KT-2').image_variants, variants)
+
+    def test_bad_rows_reported_without_aborting_import(self):
+        file = io.StringIO('\n'.join([
+            '{"sku": "NAN-1", "name": "a", "category": "c", "price": NaN}',
+            '{"sku": "INF-1", "name": "a", "category": "c", "price": Infinity}',
+            '{"sku": "NAN-2", "name": "a", "category": "c", "price": "nan"}',
+            '{"sku": "NEG-1", "name": "a", "category": "c", "price": "-1"}',
+            '{"sku": "BIG-1", "name": "a", "category": "c", "price": "1e30"}',
+            '{"name": "без sku", "category": "c", "price": "1"}',
+            '{"sku": "ACT-1", "name": "a", "category": "c", "price": "1", "is_active": "можливо"}',
+            'не json',
+            '{"sku": "OK-1", "name": "Добрий", "category": "c", "price": "10,5"}',
+        ]))
+        stats = import_catalog(read_rows(file, 'jsonl'))
+        self.assertEqual(stats['error_count'], 8)
+        self.assertEqual([line_no for line_no, _ in stats['errors']], list(range(1, 9)))
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(Product.objects.get(sku='OK-1').price, Decimal('10.50'))
+
+
+# --- Курсорна пагінація (pagination.py)
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Посуд')
+        # однакові ціни перевіряють, що id розриває нічию і рядки не губляться на межі сторінок
+        Product.objects.bulk_create(
+            Product(sku=f'KP-{i}', name=f'Товар {i}', category=category, price=Decimal(100 + i // 3))
+            for i in range(10)
+        )
+
+    def walk(self, url, params, page_size=4):
+        """Проходить сторінки вперед, потім назад; повертає списки id сторінок в обох напрямках."""
+        forward, backward = [], []
+        with patch.object(KeysetPaginationMixin, 'paginate_by', page_size):
+            query = params
+            while True:
+                page = self.client.get(f'{url}?{query}').context['page_obj']
+                forward.append([product.id for product in page])
+                if not page.has_next:
+                    break
+                query = page.next_query
+            while page.has_previous:
+                query = page.previous_query
+                page = self.client.get(f'{url}?{query}').context['page_obj']
+                backward.insert(0, [product.id for product in page])
+        backward.append(forward[-1])
+        return forward, backward
+
+    def test_pages_cover_ordering_in_both_directions(self):
+        products = Product.objects.all()
+        cases = [
+            ('product_list', 'sort=price_asc', products.order_by('price', 'id')),
+            ('product_list', 'sort=price_desc', products.order_by('-price', '-id')),
+            ('product_search', 'q=&sort=price_asc', products.order_by('price', 'id')),
+        ]
+        for url_name, params, expected in cases:
+            with self.subTest(url=url_name, params=params):
+                forward, backward = self.walk(reverse(url_name), params)
+                self.assertEqual(sum(forward, []), list(expected.values_list('id', flat=True)))
+                self.assertEqual(backward, forward)
+
+    def test_malformed_cursor_is_ignored(self):
+        cursors = ['%%%', 'bm90IGpzb24', encode_cursor(['x']), encode_cursor(['abc', '1']), encode_cursor(['1', '2', '3'])]
+        for url_name in ('product_list', 'product_search'):
+            for cursor in cursors:
+                for direction in ('after', 'before'):
+                    with self.subTest(url=url_name, cursor=cursor, direction=direction):
+                        response = self.client.get(reverse(url_name), {'sort': 'price_asc', direction: cursor})
+                        self.assertEqual(response.status_code, 200)
+                        self.assertFalse(response.context['page_obj'].has_previous)
+
+    def test_decode_cursor_converts_values_to_field_types(self):
+        fields = cursor_fields(Product.objects.all(), ('-price', '-id'))
+        self.assertEqual(decode_cursor(encode_cursor([Decimal('12.50'), 7]), fields), [Decimal('12.50'), 7])
+        self.assertIsNone(decode_cursor(encode_cursor(['NaN', 7]), fields))
+
+
+# --- Інструментування SQL (instrumentation.py)
+class QueryInstrumentationTests(TestCase):
+
+    def setUp(self):
+        reset_query_report()
+
+    def record(self, route, count, suspects=()):
+        recorder = QueryRecorder()
+        recorder.count = count
+        record_route_stats(route, recorder, list(suspects))
+
+    @override_settings(QUERY_INSTRUMENTATION={'ENABLED': True, 'RESPONSE_HEADERS': False})
+    def test_headers_only_for_staff_when_disabled(self):
+        self.assertNotIn('X-Query-Count', self.client.get(reverse('product_list')))
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn('X-Query-Count', self.client.get(reverse('product_list')))
+
+    @override_settings(QUERY_INSTRUMENTATION={'ENABLED': True, 'RESPONSE_HEADERS': True})
+    def test_headers_for_everyone_when_enabled(self):
+        response = self.client.get(reverse('product_list'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+    @override_settings(QUERY_INSTRUMENTATION={}, DEBUG=False)
+    def test_defaults_follow_debug(self):
+        options = get_instrumentation_settings()
+        self.assertFalse(options['ENABLED'])
+        self.assertFalse(options['RESPONSE_HEADERS'])
+        self.client.get(reverse('product_list'))
+        self.assertEqual(get_query_report(), [])
+
+    @override_settings(QUERY_INSTRUMENTATION={'ENABLED': True, 'SAMPLE_RATE': 0.5})
+    def test_only_sampled_requests_recorded(self):
+        with patch('myapp.instrumentation.random.random', side_effect=[0.9, 0.1, 0.7, 0.2]):
+            for _ in range(4):
+                self.client.get(reverse('product_list'))
+        self.assertEqual(get_query_report()[0]['requests'], 2)
+
+    def test_concurrent_requests_do_not_lose_updates(self):
+        threads = [threading.Thread(target=lambda: [self.record('product_list', 3) for _ in range(50)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        (row,) = get_query_report()
+        self.assertEqual((row['requests'], row['queries'], row['avg_queries']), (400, 1200, 3.0))
+
+    def test_report_merges_suspects_and_reset_starts_over(self):
+        self.record('order_list', 2)
+        self.record('order_list', 12, [('SELECT * FROM item WHERE id = ?', 10)])
+        (row,) = get_query_report()
+        self.assertEqual((row['requests'], row['max_queries'], row['n_plus_one_requests']), (2, 12, 1))
+        self.assertEqual(row['suspects'], [('SELECT * FROM item WHERE id = ?', 10)])
+
+        reset_query_report()
+        self.assertEqual(get_query_report(), [])
+        self.record('order_list', 1)
+        self.assertEqual(get_query_report()[0]['requests'], 1)
+
+
+# --- Ролі та права з кешу (roles.py, сигнали в signals.py)
+class UserRolesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager_group, _ = Group.objects.get_or_create(name=ROLE_MANAGER)
+        cls.client_group, _ = Group.objects.get_or_create(name=ROLE_CLIENT)
+        cls.user = User.objects.create_user('both-roles', password='x')
+        cls.permission = Permission.objects.get(codename='add_category')
+
+    def setUp(self):
+        cache.clear()
+
+    def auth(self):
+        # новий об'єкт користувача — без запам'ятованих на ньому ролей, лише кеш
+        return get_user_auth(User.objects.get(pk=self.user.pk))
+
+    def test_user_in_both_groups_sees_client_and_manager_links(self):
+        self.user.groups.add(self.client_group, self.manager_group)
+        self.client.force_login(self.user)
+        content = self.client.get(reverse('index_page')).content.decode()
+        for url_name in ('order_list', 'user_favorites', 'booking_detail', 'category_list', 'order_notification'):
+            self.assertIn(f'href="{reverse(url_name)}"', content)
+
+    def test_cache_invalidated_by_user_groups_change(self):
+        self.assertEqual(self.auth()['roles'], frozenset())
+        self.user.groups.add(self.manager_group)
+        self.assertEqual(self.auth()['roles'], {ROLE_MANAGER})
+        self.client_group.user_set.add(self.user)
+        self.assertEqual(self.auth()['roles'], {ROLE_MANAGER, ROLE_CLIENT})
+        self.manager_group.user_set.remove(self.user)
+        self.assertEqual(self.auth()['roles'], {ROLE_CLIENT})
+        self.client_group.user_set.clear()
+        self.assertEqual(self.auth()['roles'], frozenset())
+
+    def test_cache_invalidated_by_permissions_change(self):
+        self.user.groups.add(self.manager_group)
+        self.assertNotIn('myapp.add_category', self.auth()['perms'])
+        self.manager_group.permissions.add(self.permission)
+        self.assertIn('myapp.add_category', self.auth()['perms'])
+        self.permission.group_set.clear()
+        self.assertNotIn('myapp.add_category', self.auth()['perms'])
+        self.user.user_permissions.add(self.permission)
+        self.assertIn('myapp.add_category', self.auth()['perms'])
+
+    def test_cache_invalidated_by_group_rename_and_delete(self):
+        group = Group.objects.create(name='Temp')
+        self.user.groups.add(group)
+        self.assertEqual(self.auth()['roles'], {'Temp'})
+        group.name = 'Renamed'
+        group.save()
+        self.assertEqual(self.auth()['roles'], {'Renamed'})
+        group.delete()
+        self.assertEqual(self.auth()['roles'], frozenset())
+
+
+# --- Користувач сесії з кешу (auth_backends.py)
+class CachedUserBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached-user', password='old-password')
+        UserProfile.objects.create(user=cls.user, phone='+380501112233')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_uses_cached_backend_and_caches_user(self):
+        self.assertTrue(self.client.login(username='cached-user', password='old-password'))
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'myapp.auth_backends.CachedUserBackend')
+        self.client.get(reverse('profile_user'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_session_with_model_backend_stays_logged_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('profile_user')).status_code, 200)
+
+    def test_wrong_password_checked_once(self):
+        with patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='cached-user', password='wrong'))
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_password_change_invalidates_cached_user(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('profile_user'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        # хеш сесії вже не збігається з новим паролем — сесію розлогінено, а не впущено зі старим користувачем з кешу
+        self.assertEqual(self.client.get(reverse('profile_user')).status_code, 302)
+
+    def test_profile_save_invalidates_cached_user(self):
+        backend = CachedUserBackend()
+        self.assertEqual(backend.get_user(self.user.pk).userprofile.phone, '+380501112233')
+        profile = UserProfile.objects.get(user=self.user)
+        profile.phone = '+380509998877'
+        profile.save()
+        self.assertEqual(backend.get_user(self.user.pk).userprofile.phone, '+380509998877')
+
+
+# --- Повнотекстовий пошук (search.py, тригери індексу — міграція 0018)
+class ProductSearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Кухня')
+        cls.in_name = Product.objects.create(sku='S-1', name='Термос сталевий', category=cls.category, description='1 л', price=500)
+        cls.in_description = Product.objects.create(sku='S-2', name='Кружка', category=cls.category, description='як термос', price=200)
+
+    def found(self, query):
+        return set(search_products(Product.objects.all(), query).values_list('sku', flat=True))
+
+    def test_name_match_ranks_first_with_single_index_join(self):
+        queryset = search_products(Product.objects.all(), 'ТЕРМОС').order_by('search_rank', 'id')
+        self.assertEqual([product.sku for product in queryset], ['S-1', 'S-2'])
+        sql = str(queryset.query)
+        self.assertEqual(sql.count('MATCH'), 1)
+        self.assertNotIn('SELECT bm25', sql)
+
+    def test_index_follows_bulk_and_queryset_writes(self):
+        Product.objects.filter(pk=self.in_name.pk).update(name='Пляшка')
+        self.assertEqual(self.found('термос'), {'S-2'})
+        self.assertEqual(self.found('пляшка'), {'S-1'})
+
+        Product.objects.bulk_create([Product(sku='S-3', name='Термокухоль', category=self.category, price=300)])
+        self.assertEqual(self.found('термокухоль'), {'S-3'})
+
+        mug = Product.objects.get(sku='S-3')
+        mug.description = 'подвійні стінки'
+        Product.objects.bulk_update([mug], ['description'])
+        self.assertEqual(self.found('стінки'), {'S-3'})
+
+        Product.objects.filter(sku__in=['S-2', 'S-3']).delete()
+        self.assertEqual(self.found('термос'), set())
+        self.assertEqual(self.found('стінки'), set())
+
+    def test_rebuild_index_matches_triggers(self):
+        self.assertEqual(rebuild_index(), Product.objects.count())
+        self.assertEqual(self.found('термос'), {'S-1', 'S-2'})
+
+
+# --- Фасети пошуку: кожен фасет рахується без власного фільтра (facets.py)
+class ProductSearchFacetsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchen = Category.objects.create(name='Кухня')
+        cls.garden = Category.objects.create(name='Сад')
+        Product.objects.bulk_create([
+            Product(sku='F-1', name='Чайник', category=cls.kitchen, price=500, average_rating=4.5),
+            Product(sku='F-2', name='Чайник електричний', category=cls.kitchen, price=2000, average_rating=2.5),
+            Product(sku='F-3', name='Чайник садовий', category=cls.garden, price=2500, average_rating=4.2),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        context = self.client.get(reverse('product_search'), {'q': 'чайник', **params}).context
+        return (
+            {facet['name']: facet['count'] for facet in context['result_categories']},
+            {facet['key']: facet['count'] for facet in context['price_facets']},
+            {facet['key']: facet['count'] for facet in context['rating_facets']},
+        )
+
+    def test_selected_bucket_keeps_other_buckets(self):
+        categories, prices, ratings = self.facets(price='0-1000')
+        self.assertEqual(categories, {'Кухня': 2, 'Сад': 1})
+        self.assertEqual(prices['0-1000'], 1)
+        self.assertEqual(prices['1000-5000'], 2)
+        # оцінки рахуються в межах вибраної ціни
+        self.assertEqual(ratings[4], 1)
+        self.assertEqual(ratings[2], 1)
+
+    def test_non_numeric_category_is_ignored(self):
+        for url_name in ('product_search', 'product_list'):
+            with self.subTest(url=url_name):
+                response = self.client.get(reverse(url_name), {'q': 'чайник', 'category': 'abc'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['products']), 3)
+
+    def test_other_facet_filters_apply(self):
+        categories, prices, ratings = self.facets(category=self.kitchen.pk, rating=4)
+        self.assertEqual(categories, {'Кухня': 2, 'Сад': 1})
+        self.assertEqual(prices, {'0-1000': 1, '1000-5000': 0, '5000-10000': 0, '10000-20000': 0, '20000-': 0})
+        self.assertEqual(ratings, {4: 1, 3: 1, 2: 2, 1: 2})
+
+
+# --- Варіанти зображень товару (images.py)
+class ProductImageVariantsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фото')
+        cls.manager = User.objects.create_user('image-manager', password='x')
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename__in=['add_product', 'change_product']))
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.client.force_login(self.manager)
+
+    def upload(self, name):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (1200, 800), 'orange').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def product_data(self, **extra):
+        return {'sku': 'IMG-1', 'name': 'Фотоапарат', 'category': self.category.pk, 'description': '', 'price': '100', **extra}
+
+    def test_create_without_image_skips_variants(self):
+        with patch('myapp.images.generate_variants') as generate:
+            self.client.post(reverse('product_create'), self.product_data())
+        generate.assert_not_called()
+        self.assertEqual(Product.objects.get(sku='IMG-1').image_variants, {})
+
+    def test_update_regenerates_only_on_new_image_and_deletes_old_variants(self):
+        self.client.post(reverse('product_create'), self.product_data(image=self.upload('first.png')))
+        product = Product.objects.get(sku='IMG-1')
+        old_names = [data['name'] for data in product.image_variants.values()]
+        self.assertEqual(len(old_names), 3)
+        self.assertEqual(product.image_variants['card']['width'], 400)
+
+        with patch('myapp.images.generate_variants') as generate:
+            self.client.post(reverse('product_update', args=[product.pk]), self.product_data(name='Інша назва'))
+        generate.assert_not_called()
+
+        self.client.post(reverse('product_update', args=[product.pk]), self.product_data(image=self.upload('second.png')))
+        product.refresh_from_db()
+        self.assertTrue(all(default_storage.exists(data['name']) for data in product.image_variants.values()))
+        self.assertFalse(any(default_storage.exists(name) for name in old_names))
+
+    def test_variants_of_shared_image_are_kept(self):
+        self.client.post(reverse('product_create'), self.product_data(image=self.upload('shared.png')))
+        product = Product.objects.get(sku='IMG-1')
+        Product.objects.create(sku='IMG-2', name='Копія', category=self.category, price=1, image=product.image.name)
+        old_names = [data['name'] for data in product.image_variants.values()]
+        self.client.post(reverse('product_update', args=[product.pk]), self.product_data(image=self.upload('new.png')))
+        self.assertTrue(all(default_storage.exists(name) for name in old_names))
+
+    def test_missing_source_file_falls_back_to_original(self):
+        product = Product.objects.create(sku='IMG-3', name='Без файлу', category=self.category, price=1, image='products/missing.png')
+        with self.assertLogs('myapp.images', 'WARNING'):
+            update_product_variants(product)
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants, {})
+        self.assertEqual(product.card_image_url, product.image.url)
+
+
+# --- Async-версії сторінок каталогу (ASYNC_VIEWS): той самий контекст шаблону, що й у sync-версій
+# адреси вибирають версію при імпорті urls.py, тож для кожного варіанта URLconf перезавантажується
+def reload_urlconf():
+    clear_url_caches()
+    importlib.reload(import_module('myapp.urls'))
+    importlib.reload(import_module(settings.ROOT_URLCONF))
+
+
+class AsyncViewsTests(TestCase):
+    # службові змінні generic-view, яких шаблони не використовують
+    GENERIC_CONTEXT_KEYS = {'view', 'paginator', 'object_list'}
+
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(BENCHMARK_TEST_SCALE)
+        cls.customer = User.objects.filter(username__startswith=f'{USERNAME_PREFIX}customer_').first()
+        cls.product = Product.objects.filter(comments__isnull=False).first()
+
+    def tearDown(self):
+        reload_urlconf()
+
+    def urls(self):
+        """(адреса, чи порівнювати значення): головна показує випадкову вибірку з пулу рекомендованих."""
+        return [
+            (reverse('index_page'), False),
+            (reverse('product_list'), True),
+            (reverse('product_list') + '?sort=price_desc', True),
+            (reverse('product_search') + '?q=товар', True),
+            (reverse('product_search') + '?sort=price_asc&price=0-1000', True),
+            (reverse('product_detail', args=[self.product.pk]), True),
+            (reverse('comment_list', args=[self.product.pk]), True),
+        ]
+
+    async def render(self, url, async_views):
+        # порожній кеш — обидві версії однаково рендерять картки товарів, а не беруть їх з кешу фрагментів
+        await sync_to_async(cache.clear)()
+        with self.settings(ASYNC_VIEWS=async_views):
+            await sync_to_async(reload_urlconf)()
+            response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        view = response.resolver_match.func
+        is_async = view.view_class.view_is_async if hasattr(view, 'view_class') else iscoroutinefunction(view)
+        self.assertEqual(is_async, async_views, url)
+        return response
+
+    async def assert_same_context(self, user=None):
+        if user is not None:
+            await self.async_client.aforce_login(user)
+        for url, compare_values in self.urls():
+            with self.subTest(url=url, user=user):
+                sync_response = await self.render(url, async_views=False)
+                async_response = await self.render(url, async_views=True)
+                self.assertEqual(
+                    set(async_response.context.keys()) - self.GENERIC_CONTEXT_KEYS,
+                    set(sync_response.context.keys()) - self.GENERIC_CONTEXT_KEYS,
+                )
+                if not compare_values:
+                    continue
+                for key in ('cards', 'product', 'comments', 'price_facets', 'rating_facets', 'result_categories', 'is_in_cart', 'has_commented'):
+                    if key in sync_response.context:
+                        # sync-версії передають QuerySet (вже виконаний при рендері), async — список
+                        expected = sync_response.context[key]
+                        if isinstance(expected, QuerySet):
+                            expected = list(expected)
+                        self.assertEqual(async_response.context[key], expected, key)
+
+    async def test_anonymous_context_matches_sync_views(self):
+        await self.assert_same_context()
+
+    async def test_customer_context_matches_sync_views(self):
+        await self.assert_same_context(self.customer)
+
+
+# --- Експорт замовлень (order_export.py, OrderExportView)
+class OrderExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Експорт')
+        cls.product = Product.objects.create(sku='EX-1', name='Чайник', category=category, price=Decimal('250.00'))
+        cls.customer = User.objects.create_user('export-customer', email='c@example.com', password='x')
+        cls.manager = User.objects.create_user('export-manager', password='x')
+        cls.manager.groups.add(Group.objects.get_or_create(name=ROLE_MANAGER)[0])
+
+        cls.card_order = Order.objects.create(user=cls.customer, total_price=Decimal('500.00'), payment_method='card')
+        cls.card_order.items.create(product=cls.product, quantity=2, price=Decimal('250.00'))
+        cls.cash_order = Order.objects.create(user=cls.customer, total_price=Decimal('0.00'), delivery_method='meest_courier')
+        Order.objects.filter(pk=cls.cash_order.pk).update(date=timezone.make_aware(datetime(2024, 1, 10, 12, 0)))
+
+    def export(self, **params):
+        self.client.force_login(self.manager)
+        return self.client.get(reverse('order_export'), params)
+
+    def csv_rows(self, response):
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('\ufeff'))
+        return list(csv.DictReader(io.StringIO(content.lstrip('\ufeff'))))
+
+    def test_csv_has_row_per_item_and_order_without_items(self):
+        response = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="orders_all.csv"')
+        rows = self.csv_rows(response)
+        self.assertEqual([row['order_id'] for row in rows], [str(self.cash_order.pk), str(self.card_order.pk)])
+        self.assertEqual(rows[0]['product_id'], '')
+        self.assertEqual(
+            (rows[1]['customer_email'], rows[1]['sku'], rows[1]['quantity'], rows[1]['line_total']),
+            ('c@example.com', 'EX-1', '2', '500.00'),
+        )
+
+    def test_filters(self):
+        rows = self.csv_rows(self.export(format='csv', payment_method='card'))
+        self.assertEqual([row['order_id'] for row in rows], [str(self.card_order.pk)])
+        rows = self.csv_rows(self.export(format='csv', date_from='2024-01-10', date_to='2024-01-10'))
+        self.assertEqual([row['order_id'] for row in rows], [str(self.cash_order.pk)])
+        self.assertEqual(self.export(format='csv', date_from='2024-02-01', date_to='2024-01-01').status_code, 400)
+
+    def test_jsonl_nests_items(self):
+        lines = b''.join(self.export(format='jsonl', delivery_method='nova_poshta_branch').streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['items'][0]['quantity'], 2)
+
+    def test_only_managers_can_export(self):
+        self.assertEqual(self.client.get(reverse('order_export'), {'format': 'csv'}).status_code, 302)
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(reverse('order_export'), {'format': 'csv'}).status_code, 403)
+
+    async def test_asgi_streams_async_iterator(self):
+        await self.async_client.aforce_login(self.manager)
+        response = await self.async_client.get(reverse('order_export'), {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(content.splitlines()), 3)
+
+
+# --- Статика з хешем у назві та стиснутими копіями (static_assets.py)
+class StaticAssetsTests(TestCase):
+
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        static_override = override_settings(STATIC_ROOT=static_root, STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'myapp.static_assets.CompressedManifestStaticFilesStorage'},
+        })
+        static_override.enable()
+        self.addCleanup(static_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.factory = RequestFactory()
+
+    def test_hashed_compressed_file_served_immutable(self):
+        hashed = staticfiles_storage.stored_name('myapp/css/style.css')
+        self.assertRegex(hashed, r'style\.[0-9a-f]{12}\.css$')
+        self.assertTrue(staticfiles_storage.exists(hashed + '.gz'))
+
+        response = serve_static(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'), hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        etag = response['ETag']
+        response = serve_static(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag), hashed)
+        self.assertEqual(response.status_code, 304)
+
+    def test_file_missing_from_manifest_is_hashed_on_the_fly(self):
+        staticfiles_storage.save('myapp/late.css', ContentFile(b'body {}'))
+        self.assertRegex(staticfiles_storage.stored_name('myapp/late.css'), r'late\.[0-9a-f]{12}\.css$')
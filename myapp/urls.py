@@ -1,8 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+
+def hot_view(sync_view, async_view):
+    # під ASGI (ASYNC_VIEWS) — async-версії сторінок каталогу, під WSGI — sync
+    return async_view if settings.ASYNC_VIEWS else sync_view
+
+
 urlpatterns = [
-    path('', views.index_page, name='index_page'),
+    path('', hot_view(views.index_page, views.async_index_page), name='index_page'),
+    path('cache/cards/stats/', views.CardCacheStatsView.as_view(), name='card_cache_stats'),
+    path('debug/queries/', views.QueryReportView.as_view(), name='query_report'),
 
     # Booking
     path('booking/create/', views.BookingCreateView.as_view(), name='booking_create'),
@@ -10,6 +19,7 @@ urlpatterns = [
     path('booking/delete/', views.BookingDeleteView.as_view(), name='booking_delete'),
     path('booking/update/', views.BookingUpdateQuantityView.as_view(), name='booking_update_quantity'),
     path('booking/clear/', views.BookingClearView.as_view(), name='booking_clear'),
+    path('booking/batch/', views.BookingBatchUpdateView.as_view(), name='booking_batch_update'),
 
     # User
     path('profile/', views.UserDetailView.as_view(), name='profile_user'),
@@ -30,23 +40,25 @@ urlpatterns = [
 
     # Product
     path('product/create/', views.ProductCreateView.as_view(), name='product_create'),
-    path('product/<int:pk>/', views.ProductDetailView.as_view(), name='product_detail'),
+    path('product/<int:pk>/', hot_view(views.ProductDetailView, views.AsyncProductDetailView).as_view(), name='product_detail'),
     path('product/<int:pk>/update/', views.ProductUpdateView.as_view(), name='product_update'),
     path('product/<int:pk>/delete/', views.ProductDeleteView.as_view(), name='product_delete'),
-    path('products/', views.ProductListView.as_view(), name='product_list'),
+    path('products/', hot_view(views.ProductListView, views.AsyncProductListView).as_view(), name='product_list'),
     path('product/<int:pk>/favorite/', views.ProductFavoriteView.as_view(), name='favorite_product'),
-    path('search/', views.ProductSearchView.as_view(), name='product_search'),
+    path('search/', hot_view(views.ProductSearchView, views.AsyncProductSearchView).as_view(), name='product_search'),
 
     # Comment
     path('product/<int:pk>/comment/create/', views.CommentCreateView.as_view(), name='comment_create'),
     path('comment/<int:pk>/update/', views.CommentUpdateView.as_view(), name='comment_update'),
     path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment_delete'),
-    path('product/<int:pk>/comments/', views.CommentListView.as_view(), name='comment_list'),
+    path('product/<int:pk>/comments/', hot_view(views.CommentListView, views.AsyncCommentListView).as_view(), name='comment_list'),
 
     # Order
     path('order/create/', views.OrderCreateView.as_view(), name='order_create'),
     path('order/confirm/<int:order_id>/', views.OrderConfirmView.as_view(), name='order_confirm'),
     path('order/list/', views.OrderListView.as_view(), name='order_list'),
+    path('order/export/', views.OrderExportView.as_view(), name='order_export'),
     path('order/notifications/', views.OrderNotificationView.as_view(), name='order_notification'),
+    path('order/notifications/unread-count/', views.OrderNotificationUnreadCountView.as_view(), name='order_notification_unread_count'),
 
 ]
\ No newline at end of file
@@ -1,52 +1,80 @@
-from django.shortcuts import get_object_or_404, render, redirect
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, get_object_or_404, render, redirect
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import Group, User
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError, PermissionDenied
-from django.db.models import Avg, Q
+from django.db import connection, transaction
+from django.db.models import Count, Q
 from django.views import View
 from django.views.generic import TemplateView, ListView, DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
-from collections import defaultdict
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.core.handlers.asgi import ASGIRequest
 
 from myapp.models import Product, Category, Comment, Booking, BookingItem, Order, OrderItem, OrderNotification
 from myapp.forms import MyUserRegistrationForm, UserPasswordUpdateForm, UserUpdateForm
-from myapp.forms import CategoryForm, ProductForm, CommentForm
+from myapp.forms import CategoryForm, ProductForm, CommentForm, OrderExportForm
+from myapp.pagination import KeysetPaginationMixin, apaginate_keyset, paginate_keyset
+from myapp.search import is_search_index_enabled, search_products
+from myapp.featured import get_featured_products
+from myapp.fragments import render_product_cards, get_card_cache_stats
+from myapp.facets import acategory_facets, aprice_and_rating_facets, category_facets, price_and_rating_facets, price_bucket_filter, rating_bucket_filter
+from myapp.instrumentation import QueryCounter, get_query_report, get_instrumentation_settings, reset_query_report
+from myapp.images import update_product_variants
+from myapp.notifications import get_unread_notifications_count, invalidate_unread_notifications_count
+from myapp.order_export import EXPORT_FORMATS, get_export_queryset
+from myapp.roles import is_manager
+from myapp.cart import MAX_ITEM_QUANTITY, Cart, is_in_cart, locked_cart
+
+
+logger = logging.getLogger(__name__)
 
 
 
 # --- index
 def index_page(req):
-    products = Product.objects.filter(is_active=True).order_by('?')[:10]
-    enriched_products = []
-    for product in products:
-        comments = Comment.objects.filter(product=product)
-        avg_rating, review_count = get_review_stats(comments)
-        enriched_products.append({
-            'product': product,
-            'average_rating': avg_rating,
-            'review_count': review_count,
-            'review_count_text': pluralize_reviews(review_count)
-        })
+    products = get_featured_products()
 
     context = {
-        'products': enriched_products
+        'cards': render_product_cards(products, 'home')
     }
 
     return render(req, 'myapp/index.html', context)
 
 
+# --- Лічильники кешу карток товарів (лише для персоналу)
+class CardCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse(get_card_cache_stats())
+
+
+class QueryReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Звіт QueryInstrumentationMiddleware: кількість і час SQL по кожному URL та підозри на N+1."""
 
-# --- Статистика коментарів та оцінок
-def get_review_stats(comments_queryset):
-    stats = comments_queryset.aggregate(avg_rating=Avg('rating'))
-    average_rating = stats['avg_rating'] or 0.0     # average_rating — обчислює середню оцінку (від 1 до 5) серед усіх коментарів.
-    review_count = comments_queryset.count()        # review_count — рахує загальну кількість коментарів по товару.
-    return round(average_rating, 1), review_count
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        context = {
+            'rows': get_query_report(),
+            'threshold': get_instrumentation_settings()['N_PLUS_ONE_THRESHOLD'],
+        }
+        return render(request, 'myapp/debug/query_report.html', context)
+
+    def post(self, request):
+        reset_query_report()
+        return redirect('query_report')
 
 
 
@@ -89,6 +117,12 @@ class ProductCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView)
     template_name = 'myapp/product/product_create.html'
     permission_required = 'myapp.add_product'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            update_product_variants(self.object)
+        return response
+
     def get_success_url(self):
         return reverse_lazy('product_detail', kwargs={'pk': self.object.pk})
 
@@ -100,20 +134,18 @@ class ProductUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView)
     context_object_name = 'product'
     permission_required = 'myapp.change_product'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            # form.initial — значення з БД до редагування
+            old_image = form.initial.get('image')
+            update_product_variants(self.object, old_image.name if old_image else '')
+        return response
+
     def get_success_url(self):
         return reverse_lazy('product_detail', kwargs={'pk': self.object.pk})
 
 
-#  Возвращает правильную форму слова "відгук" в зависимости от количества
-def pluralize_reviews(count):
-
-    if count % 10 == 1 and count % 100 != 11:
-        return f"{count} відгук"
-    elif 2 <= count % 10 <= 4 and (count % 100 < 10 or count % 100 >= 20):
-        return f"{count} відгуки"
-    else:
-        return f"{count} відгуків"
-
 class ProductDetailView(DetailView):
     model = Product
     template_name = 'myapp/product/product_detail.html'
@@ -124,27 +156,18 @@ class ProductDetailView(DetailView):
         product = self.object
         user = self.request.user
 
-        # --- Перевірка: чи є товар у кошику поточного користувача
-        if user.is_authenticated:
-            booking = Booking.objects.filter(user=user).first()
-            if booking:
-                context['is_in_cart'] = booking.items.filter(product=product).exists()
-            else:
-                context['is_in_cart'] = False
-        else:
-            context['is_in_cart'] = False
+        # --- Перевірка: чи є товар у кошику поточного користувача (кошик у кеші, див. cart.py)
+        context['is_in_cart'] = is_in_cart(self.request, product.pk)
 
         # --- Перевірка: чи є товар у списку бажань поточного користувача
         context['is_favorite'] = (
             user.is_authenticated and user in product.favorites.all()
         )
 
-        # --- Відгуки
-        comments_queryset = Comment.objects.filter(product=product)
-        average_rating, review_count = get_review_stats(comments_queryset)
-        context['average_rating'] = average_rating
-        context['review_count'] = review_count
-        context['review_count_text'] = pluralize_reviews(review_count)
+        # --- Відгуки (збережена статистика товару)
+        context['average_rating'] = product.average_rating
+        context['review_count'] = product.review_count
+        context['review_count_text'] = product.review_count_text
 
         return context
 
@@ -157,165 +180,207 @@ class ProductDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView)
     success_url = reverse_lazy('product_list')
 
 
-class ProductListView(ListView):
+# ключ курсорної пагінації для параметра sort (id робить ключ унікальним)
+def get_product_keyset_ordering(sort_option):
+    if sort_option == 'price_asc':
+        return ('price', 'id')
+    elif sort_option == 'price_desc':
+        return ('-price', '-id')
+    return ('id',)
+
+
+def get_product_list_queryset(params):
+    queryset = Product.objects.filter(is_active=True)
+    category_id = params.get('category', '')
+
+    # нечисловий ?category=abc ігнорується (інакше ValueError у filter і 500)
+    if category_id.isdigit():
+        queryset = queryset.filter(category_id=category_id)
+
+    return queryset
+
+
+class ProductListView(KeysetPaginationMixin, ListView):
     model = Product
     template_name = 'myapp/product/product_list.html'
     context_object_name = 'products'
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True)
-        category_id = self.request.GET.get('category')
-        sort_order = self.request.GET.get('sort')
-
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
+        return get_product_list_queryset(self.request.GET)
 
-        if sort_order == 'price_asc':
-            queryset = queryset.order_by('price')
-        elif sort_order == 'price_desc':
-            queryset = queryset.order_by('-price')
-
-        return queryset
+    def get_keyset_ordering(self):
+        return get_product_keyset_ordering(self.request.GET.get('sort'))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        products = context['products']
-
-        enriched_products = []
-        for product in products:
-            comments_queryset = Comment.objects.filter(product=product)
-            average_rating, review_count = get_review_stats(comments_queryset)
-            # --- Відгуки
-            product.average_rating = average_rating
-            product.review_count = review_count
-            product.review_count_text = pluralize_reviews(review_count)
-            enriched_products.append(product)
+        # --- Картки товарів (з кешу фрагментів)
+        context['cards'] = render_product_cards(context['products'], 'catalog')
         # --- Категорії
-        context['products'] = enriched_products
         context['categories'] = Category.objects.all()
         context['selected_category'] = int(self.request.GET['category']) if self.request.GET.get('category', '').isdigit() else 0
         context['selected_sort'] = self.request.GET.get('sort', '')
         return context
 
 
-class ProductSearchView(ListView):
-    model = Product
-    template_name = 'myapp/product/product_search.html'
-    context_object_name = 'products'
+def get_product_search_base_queryset(params):
+    """Активні товари за текстовим запитом q — без фільтрів з фасетів (категорія, ціна, оцінка)."""
+    query = params.get('q', '').strip()
 
-    def get_queryset(self):
-        query = self.request.GET.get('q', '').strip()
-        category_id = self.request.GET.get('category')
-        sort_option = self.request.GET.get('sort')
+    queryset = Product.objects.filter(is_active=True).select_related('category')
 
-        queryset = Product.objects.filter(is_active=True)
-
-        if query:
+    if query:
+        if is_search_index_enabled():
+            # повнотекстовий індекс FTS5 з ранжуванням за релевантністю (search_rank)
+            queryset = search_products(queryset, query)
+        else:
             queryset = queryset.filter(
                 Q(name__icontains=query) | Q(description__icontains=query)
             )
+    return queryset
+
+
+def filter_product_search(queryset, params, exclude=()):
+    """Фільтри з фасетів; exclude — фасети, чиї лічильники рахуються (без власного фільтра)."""
+    category_id = params.get('category', '')
+    if category_id.isdigit() and 'category' not in exclude:
+        queryset = queryset.filter(category_id=category_id)
+
+    # фільтри з фасетів: ціновий діапазон та мінімальна оцінка
+    price_filter = price_bucket_filter(params.get('price'))
+    if price_filter is not None and 'price' not in exclude:
+        queryset = queryset.filter(price_filter)
+
+    rating_filter = rating_bucket_filter(params.get('rating'))
+    if rating_filter is not None and 'rating' not in exclude:
+        queryset = queryset.filter(rating_filter)
+
+    return queryset
+
+
+def get_product_search_queryset(params):
+    return filter_product_search(get_product_search_base_queryset(params), params)
+
+
+def get_product_search_facet_querysets(params):
+    """
+    Кожен фасет рахується без власного фільтра, інакше вибір діапазону обнуляє решту діапазонів.
+    Категорії — лише за запитом q (посилання категорії скидає ціну й оцінку); ціна та оцінка — одним
+    агрегатом по товарах без обох цих фільтрів, умова іншого фасету додається в COUNT(... FILTER).
+    """
+    base = get_product_search_base_queryset(params)
+    return {
+        'categories': base,
+        'price_and_rating': filter_product_search(base, params, exclude=('price', 'rating')),
+        'price_filter': price_bucket_filter(params.get('price')),
+        'rating_filter': rating_bucket_filter(params.get('rating')),
+    }
 
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
 
-        if sort_option == 'price_asc':
-            queryset = queryset.order_by('price')
-        elif sort_option == 'price_desc':
-            queryset = queryset.order_by('-price')
+def get_product_search_ordering(params, queryset):
+    sort_option = params.get('sort')
+    # без явного сортування за ціною — спочатку найрелевантніші
+    if not sort_option and 'search_rank' in queryset.query.annotations:
+        return ('search_rank', 'id')
+    return get_product_keyset_ordering(sort_option)
+
+
+def get_product_search_params_context(params):
+    category_id = params.get('category', '')
+    try:
+        selected_category = int(category_id)
+    except (ValueError, TypeError):
+        selected_category = ''
+    return {
+        'search_query': params.get('q', ''),
+        'selected_category': selected_category,
+        'selected_sort': params.get('sort', ''),
+        'selected_price': params.get('price', ''),
+        'selected_rating': params.get('rating', ''),
+    }
+
 
-        return queryset
+class ProductSearchView(KeysetPaginationMixin, ListView):
+    model = Product
+    template_name = 'myapp/product/product_search.html'
+    context_object_name = 'products'
+
+    def get_queryset(self):
+        return get_product_search_queryset(self.request.GET)
+
+    def get_keyset_ordering(self):
+        return get_product_search_ordering(self.request.GET, self.object_list)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['search_query'] = self.request.GET.get('q', '')
-        category_id = self.request.GET.get('category', '')
-        try:
-            context['selected_category'] = int(category_id)
-        except (ValueError, TypeError):
-            context['selected_category'] = ''
-        context['selected_sort'] = self.request.GET.get('sort', '')
+        context.update(get_product_search_params_context(self.request.GET))
         context['categories'] = Category.objects.all()
 
-        # Підрахунок кількості товарів у кожній категорії
-        category_counts = defaultdict(int)
-        for product in context['products']:
-            category_counts[product.category] += 1
+        # --- Картки товарів (з кешу фрагментів)
+        context['cards'] = render_product_cards(context['products'], 'catalog')
 
-        # Сортуємо за назвою категорії
-        context['result_categories'] = sorted(category_counts.items(), key=lambda x: x[0].name)
+        # Фасети по всіх результатах (а не лише по сторінці): категорії, ціна, оцінка
+        facets = get_product_search_facet_querysets(self.request.GET)
+        context['result_categories'] = category_facets(facets['categories'])
+        context['price_facets'], context['rating_facets'] = price_and_rating_facets(
+            facets['price_and_rating'], facets['price_filter'], facets['rating_filter'],
+        )
         return context
 
 
 
 # --- Booking (Кошик)
-class BookingCreateView(LoginRequiredMixin, View):
+# кошик (myapp/cart.py): з write-behind кліки змінюють лише кеш, без нього — один рядок у БД (або сесію);
+# анонімні відвідувачі теж можуть збирати кошик
+class BookingCreateView(View):
     def post(self, request, *args, **kwargs):
         product_id = request.POST.get('product_id')
         if not product_id:
             return JsonResponse({'success': False, 'error': 'Product ID is missing.'}, status=400)
 
-        product = get_object_or_404(Product, pk=product_id)
+        product = get_object_or_404(Product.objects.only('pk'), pk=product_id)
 
-        booking, _ = Booking.objects.get_or_create(user=request.user)
-        item, created = BookingItem.objects.get_or_create(booking=booking, product=product)
+        with locked_cart(request, create=True) as cart:
+            cart.add(product.pk)
 
-        if not created:
-            item.quantity += 1
-            item.save()
+        totals = cart.get_totals()
+        return JsonResponse({'success': True, 'total_price': totals['total_price'], 'item_count': totals['item_count']})
 
-        return JsonResponse({'success': True, 'total_price': booking.get_total_price()})
 
-
-class BookingDetailView(LoginRequiredMixin, TemplateView):
-    model = Booking
+class BookingDetailView(TemplateView):
     template_name = 'myapp/booking/booking_detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        booking = Booking.objects.filter(user=self.request.user).first()
-
-        if booking:
-            items = booking.items.select_related('product')
-            cart_items = []
-            for item in items:
-                cart_items.append({
-                    'product': item.product,
-                    'quantity': item.quantity,
-                    'total': item.quantity * item.product.price,
-                })
-            context['cart_items'] = cart_items
-            context['total_price'] = booking.get_total_price()
-        else:
-            context['cart_items'] = []
-            context['total_price'] = 0
-
+        cart = Cart.for_request(self.request)
+        cart_items = cart.get_lines()
+        context['cart_items'] = cart_items
+        context['total_price'] = cart.get_totals(cart_items)['total_price'] if cart_items else 0
         return context
 
 
       # відаляє один товар із кошика
-class BookingDeleteView(LoginRequiredMixin, View):
+class BookingDeleteView(View):
     def post(self, request, *args, **kwargs):
         product_id = request.POST.get('product_id')
         if not product_id:
             return JsonResponse({'success': False, 'error': 'Product ID is missing.'}, status=400)
 
-        booking = Booking.objects.filter(user=request.user).first()
-        if not booking:
-            return JsonResponse({'success': False, 'error': 'No booking found.'}, status=404)
-
-        item = booking.items.filter(product_id=product_id).first()
-        if item:
-            item.delete()
+        with locked_cart(request) as cart:
+            if not cart:
+                return JsonResponse({'success': False, 'error': 'No booking found.'}, status=404)
+            cart.remove(product_id)
 
+        totals = cart.get_totals()
         return JsonResponse({
             'success': True,
-            'total_price': booking.get_total_price(),
+            'total_price': totals['total_price'],
+            'item_count': totals['item_count'],
             'deleted_product_id': product_id
         })
 
 
       # зміна кількості товару у кошику (+/-)
-class BookingUpdateQuantityView(LoginRequiredMixin, View):
+class BookingUpdateQuantityView(View):
     def post(self, request, *args, **kwargs):
         product_id = request.POST.get('product_id')
         quantity = request.POST.get('quantity')
@@ -324,28 +389,61 @@ class BookingUpdateQuantityView(LoginRequiredMixin, View):
             return HttpResponseRedirect(reverse('booking_detail'))
 
         try:
-            quantity = max(1, int(quantity))  # Мінімум 1
+            product_id = int(product_id)
+            quantity = min(max(1, int(quantity)), MAX_ITEM_QUANTITY)  # Мінімум 1
         except ValueError:
             return HttpResponseRedirect(reverse('booking_detail'))
 
-        booking = Booking.objects.filter(user=request.user).first()
-        if not booking:
-            return HttpResponseRedirect(reverse('booking_detail'))
-
-        item = booking.items.filter(product_id=product_id).first()
-        if item:
-            item.quantity = quantity
-            item.save()
+        with locked_cart(request) as cart:
+            cart.update_quantity(product_id, quantity)
 
         return HttpResponseRedirect(reverse('booking_detail'))
 
 
+      # кілька змін кошика одним запитом (JSON): {"items": [{"product_id": 1, "quantity": 3}, ...]}
+      # quantity — нова кількість, 0 видаляє товар; зміни кошика користувача записуються в БД однією транзакцією
+class BookingBatchUpdateView(View):
+    def post(self, request, *args, **kwargs):
+        try:
+            changes = {int(change['product_id']): int(change['quantity']) for change in json.loads(request.body)['items']}
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'success': False, 'error': 'Invalid payload.'}, status=400)
+        # значення поза діапазоном полів БД — 400, а не OverflowError у драйвері
+        min_product_id, max_product_id = connection.ops.integer_field_range('BigIntegerField')
+        if not all(min_product_id <= product_id <= max_product_id for product_id in changes):
+            return JsonResponse({'success': False, 'error': 'Invalid product ID.'}, status=400)
+        if not all(0 <= quantity <= MAX_ITEM_QUANTITY for quantity in changes.values()):
+            return JsonResponse({'success': False, 'error': f'Quantity must be between 0 and {MAX_ITEM_QUANTITY}.'}, status=400)
+
+        added = [product_id for product_id, quantity in changes.items() if quantity]
+        missing = set(added) - set(Product.objects.filter(pk__in=added).values_list('pk', flat=True))
+        if missing:
+            return JsonResponse({'success': False, 'error': 'Product not found.', 'product_ids': sorted(missing)}, status=404)
+
+        with locked_cart(request, create=True) as cart:
+            for product_id, quantity in changes.items():
+                if quantity:
+                    cart.set_quantity(product_id, quantity)
+                else:
+                    cart.remove(product_id)
+            # пачка змін — вже підсумок багатьох кліків, тож одразу в БД (upsert однією транзакцією)
+            cart.save()
+            cart.persist()
+
+        totals = cart.get_totals()
+        return JsonResponse({
+            'success': True,
+            'total_price': totals['total_price'],
+            'item_count': totals['item_count'],
+            'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in cart.items.items()],
+        })
+
+
       # повне очищення кошика
-class BookingClearView(LoginRequiredMixin, View):
+class BookingClearView(View):
     def post(self, request, *args, **kwargs):
-        booking = Booking.objects.filter(user=request.user).first()
-        if booking:
-            booking.items.all().delete()
+        with locked_cart(request) as cart:
+            cart.clear()
 
         return HttpResponseRedirect(reverse('booking_detail'))
 
@@ -354,30 +452,19 @@ class BookingClearView(LoginRequiredMixin, View):
 # --- Order (Замовлення)
 class OrderCreateView(LoginRequiredMixin, View):
     def get(self, request):
-        booking = Booking.objects.filter(user=request.user).first()
-        if not booking or not booking.items.exists():
+        cart = Cart.for_request(request)
+        lines = cart.get_lines()
+        if not lines:
             return render(request, 'myapp/booking/booking_detail.html')
 
-        items = booking.items.select_related('product')
-        item_totals = [
-            {
-                'name': item.product.name,
-                'quantity': item.quantity,
-                'price': item.product.price,
-                'total': item.quantity * item.product.price
-            }
-            for item in items
-        ]
-
         payment_method = request.GET.get('payment_method', 'cash_on_delivery')
         delivery_method = request.GET.get('delivery_method', 'nova_poshta_branch')
         delivery_address = request.GET.get('delivery_address', '')
         show_card_fields = payment_method == 'card'
 
         context = {
-            'booking': booking,
-            'items': item_totals,
-            'total_price': booking.get_total_price(),
+            'items': self._item_totals(lines),
+            'total_price': cart.get_totals(lines)['total_price'],
             'delivery_choices': Order.DELIVERY_CHOICES,
             'payment_choices': Order.PAYMENT_CHOICES,
             'selected_payment_method': payment_method,
@@ -392,8 +479,8 @@ class OrderCreateView(LoginRequiredMixin, View):
         if request.POST.get('action_type') != 'submit_order':
             return redirect('order_create')
 
-        booking = Booking.objects.filter(user=request.user).first()
-        if not booking or not booking.items.exists():
+        cart = Cart.for_request(request)
+        if not cart:
             return redirect('order_create')
 
         delivery_method = request.POST.get('delivery_method', 'nova_poshta_branch')
@@ -408,15 +495,15 @@ class OrderCreateView(LoginRequiredMixin, View):
             card_cvv = request.POST.get('card_cvv', '')
 
             if not (card_number.isdigit() and len(card_number) == 16):
-                return self._render_with_error(request, booking, "Некоректний номер картки", delivery_method, delivery_address, payment_method)
+                return self._render_with_error(request, cart, "Некоректний номер картки", delivery_method, delivery_address, payment_method)
             if not (card_month.isdigit() and len(card_month) == 2 and 1 <= int(card_month) <= 12):
-                return self._render_with_error(request, booking, "Некоректний місяць", delivery_method, delivery_address, payment_method)
+                return self._render_with_error(request, cart, "Некоректний місяць", delivery_method, delivery_address, payment_method)
             if not (card_year.isdigit() and len(card_year) == 2):
-                return self._render_with_error(request, booking, "Некоректний рік", delivery_method, delivery_address, payment_method)
+                return self._render_with_error(request, cart, "Некоректний рік", delivery_method, delivery_address, payment_method)
             if not (card_cvv.isdigit() and len(card_cvv) == 3):
-                return self._render_with_error(request, booking, "Некоректний CVV", delivery_method, delivery_address, payment_method)
+                return self._render_with_error(request, cart, "Некоректний CVV", delivery_method, delivery_address, payment_method)
 
-        total_price = booking.get_total_price()
+        total_price = cart.get_totals()['total_price']
         order = Order(
             user=request.user,
             date=timezone.now(),
@@ -431,42 +518,74 @@ class OrderCreateView(LoginRequiredMixin, View):
         except ValidationError as e:
             return self._render_with_error(
                 request,
-                booking,
+                cart,
                 error_message=e.messages[0],  # показує перше повідомлення
                 delivery_method=delivery_method,
                 delivery_address=delivery_address,
                 payment_method=payment_method
             )
 
-        order.save()
+        with QueryCounter() as counter:
+            # кошик з кешу записується в БД лише тут (write-behind), далі — оформлення з рядків Booking
+            booking = cart.persist()
+            order = self._place_order(booking, order) if booking is not None else None
+
+        logger.info('Checkout for user %s: order %s, %s queries', request.user.pk, order.pk if order else None, counter.count)
+        if order is None:
+            # кошик вже оформлено паралельним запитом (або він порожній)
+            return redirect('order_create')
+        cart.reset()
+
+        return redirect(f"{reverse('order_confirm', args=[order.id])}?success=1")
 
-        for item in booking.items.select_related('product'):
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price
+    @staticmethod
+    def _place_order(booking, order):
+        """
+        Оформлення як одна транзакція: блокуємо кошик, читаємо всі рядки з цінами одним запитом,
+        вставляємо OrderItem одним bulk_create і очищаємо кошик. Кількість запитів не залежить від розміру кошика.
+        """
+        with transaction.atomic():
+            Booking.objects.select_for_update().only('pk').get(pk=booking.pk)
+            items = list(
+                BookingItem.objects.filter(booking=booking, product__isnull=False)
+                .values_list('pk', 'product_id', 'quantity', 'product__price')
             )
+            if not items:
+                return None
 
-        booking.items.all().delete()
+            # очищаємо кошик першим: якщо паралельне оформлення вже забрало рядки, відкочуємося
+            deleted, _ = BookingItem.objects.filter(pk__in=[pk for pk, _, _, _ in items]).delete()
+            if deleted != len(items):
+                transaction.set_rollback(True)
+                return None
 
-        return redirect(f"{reverse('order_confirm', args=[order.id])}?success=1")
+            order.total_price = sum(price * quantity for _, _, quantity, price in items)
+            order.save()
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+                for _, product_id, quantity, price in items
+            ])
 
-    def _render_with_error(self, request, booking, error_message, delivery_method, delivery_address, payment_method):
-        items = booking.items.select_related('product')
-        item_totals = [
+        return order
+
+
+    @staticmethod
+    def _item_totals(lines):
+        return [
             {
-                'name': item.product.name,
-                'quantity': item.quantity,
-                'price': item.product.price,
-                'total': item.quantity * item.product.price
+                'name': line['product'].name,
+                'quantity': line['quantity'],
+                'price': line['product'].price,
+                'total': line['total'],
             }
-            for item in items
+            for line in lines
         ]
+
+    def _render_with_error(self, request, cart, error_message, delivery_method, delivery_address, payment_method):
+        lines = cart.get_lines()
         context = {
-            'booking': booking,
-            'items': item_totals,
-            'total_price': booking.get_total_price(),
+            'items': self._item_totals(lines),
+            'total_price': cart.get_totals(lines)['total_price'],
             'delivery_choices': Order.DELIVERY_CHOICES,
             'payment_choices': Order.PAYMENT_CHOICES,
             'selected_payment_method': payment_method,
@@ -484,8 +603,7 @@ class OrderConfirmView(LoginRequiredMixin, View):
         # для взаємодії двох сторінок: order_notification та order_confirm
         came_from_order_notification = request.GET.get('from_notification') == '1'
         # доступ дозволено власнику або менеджеру
-        is_manager = request.user.groups.filter(name='Manager').exists()
-        if order.user != request.user and not is_manager:
+        if order.user_id != request.user.id and not is_manager(request.user):
             raise PermissionDenied("У вас немає доступу до цього замовлення.")
 
         items_with_total = []
@@ -515,19 +633,54 @@ class OrderListView(LoginRequiredMixin, ListView):
     context_object_name = 'orders'
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-date')
+        # мініатюри товарів у списку: без prefetch — по два запити на кожне замовлення
+        return Order.objects.filter(user=self.request.user).prefetch_related('items__product').order_by('-date')
+
+
+# --- Експорт замовлень з позиціями для бухгалтерії (лише менеджери)
+class OrderExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        user = self.request.user
+        return user.is_superuser or is_manager(user)
+
+    def get(self, request):
+        # без параметрів — сторінка з фільтрами; з параметрами — файл
+        if not request.GET:
+            return render(request, 'myapp/order/order_export.html', {'form': OrderExportForm()})
+
+        form = OrderExportForm(request.GET)
+        if not form.is_valid():
+            return render(request, 'myapp/order/order_export.html', {'form': form}, status=400)
+
+        filters = form.cleaned_data
+        export_format = filters.pop('format')
+        stream, astream, content_type = EXPORT_FORMATS[export_format]
+        queryset = get_export_queryset(**filters)
+
+        # файл формується під час відправки, тому воркер не тримає всі замовлення в пам'яті;
+        # під ASGI — async-ітератор, інакше ASGIHandler буферизує весь sync-генератор
+        content = astream(queryset) if isinstance(request, ASGIRequest) else stream(queryset)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        period = '_'.join(str(filters[key]) for key in ('date_from', 'date_to') if filters[key]) or 'all'
+        response['Content-Disposition'] = f'attachment; filename="orders_{period}.{export_format}"'
+        response['Cache-Control'] = 'no-store'
+        return response
 
 
       # --- Сигнал Менеджеру про нове Замовлення
 class OrderNotificationView(LoginRequiredMixin, View):
+    paginate_by = 20
+
     def get(self, request):
         filter_value = request.GET.get('filter')
 
-        # всі сповіщення
+        # всі сповіщення; три лічильники — одним запитом з умовною агрегацією
         notifications_all = request.user.user_notifications.all()
-        unread_count = notifications_all.filter(is_read=False).count()
-        read_count = notifications_all.filter(is_read=True).count()
-        total_count = notifications_all.count()
+        counts = notifications_all.aggregate(
+            unread_count=Count('id', filter=Q(is_read=False)),
+            read_count=Count('id', filter=Q(is_read=True)),
+            total_count=Count('id'),
+        )
 
         # фільтр для відображення
         if filter_value == 'read':
@@ -538,25 +691,41 @@ class OrderNotificationView(LoginRequiredMixin, View):
             filter_value = 'unread'
             notifications = notifications_all.filter(is_read=False)
 
-        notifications = notifications.order_by('-created_at')
+        # курсорна пагінація за (created_at, id) — глибокі сторінки не дорожчі за першу
+        page = paginate_keyset(notifications, ('-created_at', '-id'), self.paginate_by, request.GET)
 
         return render(request, 'myapp/order/order_notification.html', {
-            'notifications': notifications,
-            'notifications_all': notifications_all,
+            'notifications': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
             'filter_value': filter_value,
-            'unread_count': unread_count,
-            'read_count': read_count,
-            'total_count': total_count
+            **counts,
         })
 
     def post(self, request):
-        notification_id = request.POST.get('notification_id')
-        if notification_id:
-            notification = request.user.user_notifications.filter(pk=notification_id).first()
-            if notification and not notification.is_read:
-                notification.is_read = True
-                notification.save()
-        return redirect(request.path)
+        notifications = request.user.user_notifications.filter(is_read=False)
+        action = request.POST.get('action')
+
+        # позначення прочитаними — завжди один UPDATE
+        if action == 'mark_all':
+            notifications.update(is_read=True)
+        else:
+            if action == 'mark_selected':
+                ids = request.POST.getlist('notification_ids')
+            else:
+                ids = [request.POST.get('notification_id')]
+            ids = [pk for pk in ids if pk and pk.isdigit()]
+            if ids:
+                notifications.filter(pk__in=ids).update(is_read=True)
+
+        invalidate_unread_notifications_count(request.user.pk)
+        return redirect(request.get_full_path())
+
+
+      # кількість непрочитаних сповіщень для значка в шапці (кешується)
+class OrderNotificationUnreadCountView(LoginRequiredMixin, View):
+    def get(self, request):
+        return JsonResponse({'unread_count': get_unread_notifications_count(request.user)})
 
 
 
@@ -708,6 +877,7 @@ class UserFavoritesListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile_user'] = self.profile_user
+        context['cards'] = render_product_cards(context['favorite_product'], 'favorite')
         return context
 
 
@@ -760,8 +930,7 @@ class CommentDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView)
     def has_permission(self):
         comment = self.get_object()
         user = self.request.user
-        is_manager = user.groups.filter(name='Manager').exists()
-        return comment.user == user or is_manager
+        return comment.user_id == user.id or is_manager(user)
 
     def get_success_url(self):
         return reverse_lazy('product_detail', kwargs={'pk': self.object.product.pk})
@@ -781,24 +950,140 @@ class CommentListView(ListView):
         context = super().get_context_data(**kwargs)
         comments = context['comments']
 
-        average_rating, review_count = get_review_stats(comments)
-
         user = self.request.user
         has_commented = False
         user_comment = None
-        is_manager = False
 
         if user.is_authenticated:
             user_comment = comments.filter(user=user).first()
             has_commented = user_comment is not None
-            is_manager = user.groups.filter(name='Manager').exists()
 
         context.update({
             'product': self.product,
-            'average_rating': average_rating,
-            'review_count': review_count,
+            'average_rating': self.product.average_rating,
+            'review_count': self.product.review_count,
+            'rating_histogram': self.product.rating_histogram.items(),
             'has_commented': has_commented,
             'user_comment': user_comment,
-            'is_manager': is_manager,
+            'is_manager': is_manager(user),
         })
         return context
+
+
+
+# --- Async (ASGI) версії сторінок каталогу
+# під ASGI sync-view тримає потік увесь запит, поки чекає на БД; async-версії чекають на async ORM.
+# Запити однієї сторінки виконуються по черзі: async ORM Django запускає їх через sync_to_async
+# (thread_sensitive) в одному потоці, тож asyncio.gather не дав би паралельності. Вмикаються ASYNC_VIEWS (встановлюється в asgi.py),
+# під WSGI працюють sync-версії вище. Відповідь — TemplateResponse: Django рендерить її в потоці запиту,
+# тож шаблони, як і раніше, можуть ліниво звертатися до сесії та user.
+
+async def _aload_user(request):
+    """Користувач з ролями (UserRolesMiddleware); підставляється в request.user для рендера шаблону."""
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def async_index_page(request):
+    products = await sync_to_async(get_featured_products)()
+    cards = await sync_to_async(render_product_cards)(products, 'home')
+    return TemplateResponse(request, 'myapp/index.html', {'cards': cards})
+
+
+class AsyncProductListView(View):
+    paginate_by = KeysetPaginationMixin.paginate_by
+
+    async def get(self, request):
+        params = request.GET
+        ordering = get_product_keyset_ordering(params.get('sort'))
+        page = await apaginate_keyset(get_product_list_queryset(params), ordering, self.paginate_by, params)
+        categories = await _alist(Category.objects.all())
+        cards = await sync_to_async(render_product_cards)(page.object_list, 'catalog')
+        return TemplateResponse(request, 'myapp/product/product_list.html', {
+            'products': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'cards': cards,
+            'categories': categories,
+            'selected_category': int(params['category']) if params.get('category', '').isdigit() else 0,
+            'selected_sort': params.get('sort', ''),
+        })
+
+
+class AsyncProductSearchView(View):
+    paginate_by = KeysetPaginationMixin.paginate_by
+
+    async def get(self, request):
+        params = request.GET
+        queryset = get_product_search_queryset(params)
+        ordering = get_product_search_ordering(params, queryset)
+        facets = get_product_search_facet_querysets(params)
+        page = await apaginate_keyset(queryset, ordering, self.paginate_by, params)
+        categories = await _alist(Category.objects.all())
+        # фасети по всіх результатах, а не лише по сторінці
+        result_categories = await acategory_facets(facets['categories'])
+        price_facets, rating_facets = await aprice_and_rating_facets(
+            facets['price_and_rating'], facets['price_filter'], facets['rating_filter'],
+        )
+        cards = await sync_to_async(render_product_cards)(page.object_list, 'catalog')
+        return TemplateResponse(request, 'myapp/product/product_search.html', {
+            **get_product_search_params_context(params),
+            'products': page.object_list,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'cards': cards,
+            'categories': categories,
+            'result_categories': result_categories,
+            'price_facets': price_facets,
+            'rating_facets': rating_facets,
+        })
+
+
+class AsyncProductDetailView(View):
+    async def get(self, request, pk):
+        user = await _aload_user(request)
+        product = await aget_object_or_404(Product.objects.select_related('category'), pk=pk)
+
+        in_cart = await sync_to_async(is_in_cart)(request, product.pk)
+        is_favorite = user.is_authenticated and await product.favorites.filter(pk=user.pk).aexists()
+
+        # відгуки — збережена статистика товару, окремого запиту не потрібно
+        return TemplateResponse(request, 'myapp/product/product_detail.html', {
+            'object': product,
+            'product': product,
+            'is_in_cart': in_cart,
+            'is_favorite': is_favorite,
+            'average_rating': product.average_rating,
+            'review_count': product.review_count,
+            'review_count_text': product.review_count_text,
+        })
+
+
+class AsyncCommentListView(View):
+    async def get(self, request, pk):
+        user = await _aload_user(request)
+        product = await aget_object_or_404(Product, pk=pk)
+
+        comments = await _alist(Comment.objects.filter(product=product).select_related('user').order_by('-id'))
+        user_comment = None
+        if user.is_authenticated:
+            user_comment = await Comment.objects.filter(product=product, user=user).select_related('user').afirst()
+
+        return TemplateResponse(request, 'myapp/comment/comment_list.html', {
+            'object_list': comments,
+            'comments': comments,
+            'page_obj': None,
+            'is_paginated': False,
+            'product': product,
+            'average_rating': product.average_rating,
+            'review_count': product.review_count,
+            'rating_histogram': product.rating_histogram.items(),
+            'has_commented': user_comment is not None,
+            'user_comment': user_comment,
+            'is_manager': is_manager(user),
+        })